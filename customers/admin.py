@@ -34,14 +34,19 @@ class CustomerAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_order_totals()
+    
     def orders_count(self, obj):
         return obj.total_orders_count
     orders_count.short_description = 'Total Orders'
+    orders_count.admin_order_field = 'annotated_orders_count'
     
     def total_spent_display(self, obj):
         total = obj.total_spent
-        return format_html('<strong>AED {:,.2f}</strong>', total)
+        return format_html('<strong>AED {}</strong>', f'{total:,.2f}')
     total_spent_display.short_description = 'Total Spent'
+    total_spent_display.admin_order_field = 'annotated_total_spent'
     
     def vip_badge(self, obj):
         if obj.is_vip:
@@ -1,5 +1,19 @@
 from django.db import models
 from django.core.validators import RegexValidator
+from farmcloud.respcache import VersionedQuerySet
+
+
+class CustomerQuerySet(VersionedQuerySet):
+    def with_order_totals(self):
+        """Annotate total_orders_count/total_spent so lists don't query them per customer"""
+        from orders.models import OrderStatus
+        return self.annotate(
+            annotated_orders_count=models.Count('orders'),
+            annotated_total_spent=models.Sum(
+                'orders__total_amount',
+                filter=models.Q(orders__status__in=[OrderStatus.COMPLETED, OrderStatus.DELIVERED]),
+            ),
+        )
 
 
 class Customer(models.Model):
@@ -51,6 +65,8 @@ class Customer(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     last_order_date = models.DateTimeField(null=True, blank=True)
     
+    objects = CustomerQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
         indexes = [
@@ -65,11 +81,15 @@ class Customer(models.Model):
     @property
     def total_orders_count(self):
         """Count of all orders"""
+        if hasattr(self, 'annotated_orders_count'):
+            return self.annotated_orders_count
         return self.orders.count()
     
     @property
     def total_spent(self):
         """Total amount spent by customer"""
+        if hasattr(self, 'annotated_total_spent'):
+            return self.annotated_total_spent or 0
         from django.db.models import Sum
         from orders.models import OrderStatus
         return self.orders.filter(
@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from farmcloud.mixins import RoleFieldsMixin
 from .models import Customer
 
 
-class CustomerSerializer(serializers.ModelSerializer):
+class CustomerSerializer(RoleFieldsMixin, serializers.ModelSerializer):
     total_orders_count = serializers.ReadOnlyField()
     total_spent = serializers.ReadOnlyField()
     
@@ -10,3 +11,14 @@ class CustomerSerializer(serializers.ModelSerializer):
         model = Customer
         fields = '__all__'
         read_only_fields = ['created_at', 'updated_at', 'last_order_date']
+        role_fields = {
+            'STAFF': [
+                'id', 'full_name', 'phone_number', 'email', 'address_line1', 'address_line2', 'city', 'emirate',
+                'postal_code', 'customer_type', 'preferred_language', 'whatsapp_number', 'notes',
+                'is_active', 'is_vip', 'total_orders_count', 'last_order_date', 'created_at', 'updated_at',
+            ],
+            'DELIVERY': [
+                'id', 'full_name', 'phone_number', 'whatsapp_number', 'address_line1', 'address_line2',
+                'city', 'emirate', 'postal_code', 'preferred_language',
+            ],
+        }
@@ -0,0 +1,44 @@
+from farmcloud.testing import QueryCountTestCase
+from orders.models import DeliveryMethod, Order, OrderStatus
+from .models import Customer
+from .views import CustomerViewSet
+
+
+def seed_customers(start, stop):
+    Customer.objects.bulk_create([
+        Customer(full_name=f'Customer {i}', phone_number=f'05{i:08d}', address_line1='Street 1', city='Dubai',
+                 emirate='DUBAI')
+        for i in range(start, stop)
+    ])
+    # Every customer has spent something, so total_spent has rows to add up
+    Order.objects.bulk_create([
+        Order(order_number=f'QC-{customer.pk}', customer=customer, status=OrderStatus.COMPLETED,
+              delivery_method=DeliveryMethod.FARM_PICKUP, total_amount=500)
+        for customer in Customer.objects.order_by('id')[start:stop]
+    ])
+
+
+class CustomerQueryCountTests(QueryCountTestCase):
+    def test_customer_list(self):
+        self.assertConstantQueries('/api/customers/', seed_customers)
+    
+    def test_customer_serialization_time(self):
+        self.assertSerializesWithinBudget(CustomerViewSet, seed_customers)
+    
+    def test_customer_changelist(self):
+        self.assertConstantChangelistQueries(Customer, seed_customers)
+
+
+class CustomerConditionalGetTests(QueryCountTestCase):
+    def test_new_orders_change_the_etag(self):
+        self.seed_to(seed_customers, 1)
+        customer = Customer.objects.get()
+        response = self.client.get('/api/customers/', secure=True)
+        self.assertEqual(self.client.get('/api/customers/', secure=True, HTTP_IF_NONE_MATCH=response['ETag'])
+                         .status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.create(customer=customer, status=OrderStatus.COMPLETED, subtotal=100,
+                                 delivery_method=DeliveryMethod.FARM_PICKUP)
+        response = self.client.get('/api/customers/', secure=True, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['total_spent'], 600)
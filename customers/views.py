@@ -1,15 +1,36 @@
 from rest_framework import viewsets, filters
 from rest_framework.permissions import AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
+from farmcloud.mixins import (
+    CachedResponseMixin, ConditionalGetMixin, ExportMixin, ReplicaReadMixin, RoleScopedMixin,
+)
+from orders.models import Delivery, Order
 from .models import Customer
 from .serializers import CustomerSerializer
 
 
-class CustomerViewSet(viewsets.ModelViewSet):
-    queryset = Customer.objects.all().order_by('-created_at')
+class CustomerViewSet(
+    ReplicaReadMixin, RoleScopedMixin, ExportMixin, CachedResponseMixin, ConditionalGetMixin, viewsets.ModelViewSet,
+):
+    queryset = Customer.objects.with_order_totals().order_by('-created_at')
     serializer_class = CustomerSerializer
     permission_classes = [AllowAny]  # Changed for development
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['is_vip', 'is_active', 'emirate', 'customer_type']
     search_fields = ['full_name', 'phone_number', 'email']
     ordering_fields = ['created_at', 'full_name', 'last_order_date']
+    # Order totals are annotated; drivers are scoped through their deliveries
+    cache_actions = {'list': None, 'retrieve': None}
+    cache_models = [Customer, Order, Delivery]
+    replica_actions = {'export'}
+    export_fields = {
+        'id': 'id', 'full_name': 'full_name', 'phone_number': 'phone_number', 'email': 'email',
+        'address_line1': 'address_line1', 'city': 'city', 'emirate': 'emirate', 'customer_type': 'customer_type',
+        'preferred_language': 'preferred_language', 'is_vip': 'is_vip', 'is_active': 'is_active',
+        'total_orders_count': 'annotated_orders_count', 'total_spent': 'annotated_total_spent',
+        'last_order_date': 'last_order_date', 'created_at': 'created_at',
+    }
+    
+    def scope_delivery(self, queryset, user):
+        """Drivers only see the customers they deliver to"""
+        return queryset.filter(pk__in=Order.objects.filter(delivery__driver=user).values('customer_id'))
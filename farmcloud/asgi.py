@@ -2,9 +2,16 @@
 ASGI config for farmcloud project.
 """
 
+import atexit
 import os
 from django.core.asgi import get_asgi_application
 
+from farmcloud import dbpool
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'farmcloud.settings')
 
 application = get_asgi_application()
+
+# Database pools (farmcloud.dbpool) open with each worker's first query;
+# close them when it exits so the server sees clean disconnects
+atexit.register(dbpool.close_pools)
@@ -0,0 +1,57 @@
+"""
+Database connection pools: metrics and lifecycle
+
+With DB_POOL (the default) every PostgreSQL alias checks its connections
+out of a psycopg_pool pool owned by the process - Django's native pooling -
+instead of connecting, authenticating and disconnecting on each request.
+Connections are health-checked on checkout (CONN_HEALTH_CHECKS) and
+replaced after DB_POOL_MAX_LIFETIME seconds; a request waits up to
+DB_POOL_TIMEOUT seconds for one when all DB_POOL_MAX_SIZE are in use.
+
+Pools are opened lazily by the first query of a process. A process that
+forks workers (farmcloud.serve) must close them first, and every process
+should close them on exit so the server sees clean disconnects:
+close_pools() does both. The metrics endpoint (/api/ops/metrics/) calls
+record_stats() at scrape time, off the request path, to export pool size,
+saturation and checkout waits; with several workers each one's gauges are
+as of the last scrape it answered.
+"""
+from django.db import connections
+
+from farmcloud import metrics
+
+
+def open_pools():
+    """[(alias, pool)] of the pools this process has opened"""
+    result = []
+    for connection in connections.all(initialized_only=True):
+        if connection.vendor != 'postgresql' or not connection.settings_dict['OPTIONS'].get('pool'):
+            continue
+        pool = connection.pool
+        if not pool.closed:
+            result.append((connection.alias, pool))
+    return result
+
+
+def record_stats():
+    """Move the counters of every open pool into the Prometheus metrics"""
+    for alias, pool in open_pools():
+        stats = pool.pop_stats()
+        size, idle, limit = stats['pool_size'], stats['pool_available'], stats['pool_max']
+        metrics.DB_POOL_CONNECTIONS.labels(alias, 'idle').set(idle)
+        metrics.DB_POOL_CONNECTIONS.labels(alias, 'in_use').set(size - idle)
+        metrics.DB_POOL_SATURATION.labels(alias).set((size - idle) / limit)
+        metrics.DB_POOL_WAITING.labels(alias).set(stats.get('requests_waiting', 0))
+        metrics.DB_POOL_CHECKOUTS.labels(alias).inc(stats.get('requests_num', 0))
+        metrics.DB_POOL_QUEUED.labels(alias).inc(stats.get('requests_queued', 0))
+        metrics.DB_POOL_WAIT.labels(alias).inc(stats.get('requests_wait_ms', 0) / 1000)
+        metrics.DB_POOL_TIMEOUTS.labels(alias).inc(stats.get('requests_errors', 0))
+        metrics.DB_POOL_CONNECTS.labels(alias).inc(stats.get('connections_num', 0))
+
+
+def close_pools():
+    """Close this process's connections and pools (before forking, or on exit)"""
+    connections.close_all()
+    for connection in connections.all():
+        if connection.vendor == 'postgresql':
+            connection.close_pool()
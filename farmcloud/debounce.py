@@ -0,0 +1,51 @@
+"""
+Debounced background calls (in-process, one timer thread per debouncer)
+"""
+import logging
+import threading
+import time
+
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class Debouncer:
+    """
+    Coalesce bursts of calls into one run after `delay` seconds of quiet,
+    but never postpone a pending run by more than `max_wait` seconds.
+    """
+
+    def __init__(self, func, delay, max_wait):
+        self.func = func
+        self.delay = delay
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._timer = None
+        self._first_call = None
+
+    def trigger(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._timer is not None:
+                if now - self._first_call >= self.max_wait:
+                    return
+                self._timer.cancel()
+            else:
+                self._first_call = now
+            delay = min(self.delay, self.max_wait - (now - self._first_call))
+            self._timer = threading.Timer(delay, self._run)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _run(self):
+        with self._lock:
+            self._timer = None
+            self._first_call = None
+        close_old_connections()
+        try:
+            self.func()
+        except Exception:
+            logger.exception('Debounced %s failed', getattr(self.func, '__name__', self.func))
+        finally:
+            close_old_connections()
@@ -0,0 +1,219 @@
+"""
+Streaming file exports: CSV, NDJSON and XLSX
+
+Each writer turns an iterable of value tuples into an iterator of bytes
+chunks for a StreamingHttpResponse, holding at most one batch of rows in
+memory. CSV and XLSX send their header before the first row is fetched,
+so a client sees bytes as soon as the view returns.
+
+CSV text cells that a spreadsheet would run as a formula (starting with =,
++, -, @, tab or carriage return) are prefixed with a quote; XLSX cells are
+inline strings, never formulas.
+
+XLSX is written as a zip stream (data descriptors, no seeking) with the
+sheet XML generated row by row; files past MAX_XLSX_ROWS continue on a
+new sheet.
+"""
+import csv
+import io
+import re
+import zipfile
+from datetime import date, datetime, time
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+BATCH_ROWS = 1000
+MAX_XLSX_ROWS = 1_048_576  # per sheet, header included
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def _batches(rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_ROWS:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return str(value)
+
+
+# Leading characters that make Excel, LibreOffice or Sheets evaluate a cell
+_FORMULA_START = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _csv_text(value):
+    text = _text(value)
+    # Only free text: numbers and dates of our own (e.g. -5.00) stay as they are
+    if isinstance(value, str) and text.startswith(_FORMULA_START):
+        return "'" + text
+    return text
+
+
+def write_csv(columns, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM so Excel opens UTF-8 (Arabic names) correctly
+    buffer.write('\ufeff')
+    writer.writerow(columns)
+    yield buffer.getvalue().encode()
+    for batch in _batches(rows):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_text(value) for value in row] for row in batch)
+        yield buffer.getvalue().encode()
+
+
+def write_ndjson(columns, rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for batch in _batches(rows):
+        yield ''.join(encoder.encode(dict(zip(columns, row))) + '\n' for row in batch).encode()
+
+
+# Characters XML 1.0 does not allow, even escaped
+_INVALID_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+
+def _cell(value):
+    if value is None:
+        return '<c/>'
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        return f'<c><v>{value}</v></c>'
+    text = escape(_INVALID_XML.sub('', _text(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _row(values):
+    return '<row>' + ''.join(_cell(value) for value in values) + '</row>'
+
+
+class _Sink:
+    """Write-only file object whose output is drained between zip writes"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_END = '</sheetData></worksheet>'
+
+
+def _package_parts(sheets):
+    names = range(1, sheets + 1)
+    content_types = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        + ''.join(
+            f'<Override PartName="/xl/worksheets/sheet{n}.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for n in names
+        )
+        + '</Types>'
+    )
+    root_rels = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/></Relationships>'
+    )
+    workbook = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>'
+        + ''.join(f'<sheet name="Sheet{n}" sheetId="{n}" r:id="rId{n}"/>' for n in names)
+        + '</sheets></workbook>'
+    )
+    workbook_rels = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        + ''.join(
+            f'<Relationship Id="rId{n}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+            f'Target="worksheets/sheet{n}.xml"/>'
+            for n in names
+        )
+        + '</Relationships>'
+    )
+    return [
+        ('[Content_Types].xml', content_types),
+        ('_rels/.rels', root_rels),
+        ('xl/workbook.xml', workbook),
+        ('xl/_rels/workbook.xml.rels', workbook_rels),
+    ]
+
+
+def write_xlsx(columns, rows):
+    sink = _Sink()
+    archive = zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED)
+    header = _SHEET_START + _row(columns)
+    sheets = 1
+    sheet = archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True)
+    sheet.write(header.encode())
+    sheet_rows = 1
+    yield sink.drain()
+
+    for batch in _batches(rows):
+        parts = []
+        for row in batch:
+            if sheet_rows >= MAX_XLSX_ROWS:
+                sheet.write((''.join(parts) + _SHEET_END).encode())
+                sheet.close()
+                sheets += 1
+                sheet = archive.open(f'xl/worksheets/sheet{sheets}.xml', 'w', force_zip64=True)
+                parts = [header]
+                sheet_rows = 1
+            parts.append(_row(row))
+            sheet_rows += 1
+        sheet.write(''.join(parts).encode())
+        yield sink.drain()
+
+    sheet.write(_SHEET_END.encode())
+    sheet.close()
+    for name, content in _package_parts(sheets):
+        archive.writestr(name, content)
+    archive.close()
+    yield sink.drain()
+
+
+WRITERS = {
+    'csv': write_csv,
+    'ndjson': write_ndjson,
+    'xlsx': write_xlsx,
+}
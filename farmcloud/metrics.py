@@ -0,0 +1,195 @@
+"""
+Per-request performance metrics in Prometheus text format
+
+RequestMetricsMiddleware (farmcloud.middleware) records, per resolved view,
+histograms of latency, database query count and query time, and response
+size. A request that runs the same SQL statement METRICS_N_PLUS_ONE_THRESHOLD
+times or more (with different parameters, typically one query per row of a
+list) is counted as a likely N+1, and the statement is logged once per view
+to the `farmcloud.metrics` logger. Counting repeats per statement costs a
+dict update per query, so only METRICS_N_PLUS_ONE_SAMPLE_RATE of the
+requests do it.
+
+`record_queries` stays installed on each connection from its first use
+(`connection_created`) and only times queries while a QueryRecorder is
+active, so requests don't wrap connections they never touch.
+
+Observations reach the histograms in batches, at most FLUSH_EVERY requests
+or FLUSH_SECONDS late. Under the production server (farmcloud.serve) every
+worker writes its samples to PROMETHEUS_MULTIPROC_DIR and `render()` adds
+them up, so a scrape sees the whole pool whichever worker answers it.
+"""
+import collections
+import contextvars
+import logging
+import os
+import time
+
+from django.conf import settings
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+
+logger = logging.getLogger(__name__)
+
+REQUEST_LATENCY = Histogram(
+    'farmcloud_request_duration_seconds', 'Request latency', ['view', 'method', 'status'],
+)
+QUERY_COUNT = Histogram(
+    'farmcloud_request_queries', 'Database queries per request', ['view'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250),
+)
+QUERY_TIME = Histogram(
+    'farmcloud_request_query_seconds', 'Database time per request', ['view'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+RESPONSE_SIZE = Histogram(
+    'farmcloud_response_size_bytes', 'Response body size', ['view'],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+)
+N_PLUS_ONE = Counter(
+    'farmcloud_n_plus_one_requests', 'Requests repeating one SQL statement past the N+1 threshold', ['view'],
+)
+RESPONSE_CACHE = Counter(
+    'farmcloud_response_cache_requests', 'Response cache lookups (farmcloud.respcache)', ['view', 'action', 'result'],
+)
+DB_READ_ROUTES = Counter(
+    'farmcloud_db_read_routes', 'Replica-eligible requests by the database serving their reads', ['database'],
+)
+DB_REPLICA_LAG = Gauge(
+    'farmcloud_db_replica_lag_seconds', 'Last measured replication lag (-1: unreachable)', ['database'],
+    multiprocess_mode='max',
+)
+# Connection pools (farmcloud.dbpool): gauges add up over the live workers
+DB_POOL_CONNECTIONS = Gauge(
+    'farmcloud_db_pool_connections', 'Pooled connections by state', ['database', 'state'], multiprocess_mode='livesum',
+)
+DB_POOL_SATURATION = Gauge(
+    'farmcloud_db_pool_saturation', 'Share of the pool in use, in the busiest worker', ['database'],
+    multiprocess_mode='livemax',
+)
+DB_POOL_WAITING = Gauge(
+    'farmcloud_db_pool_waiting', 'Requests waiting for a pooled connection', ['database'], multiprocess_mode='livesum',
+)
+DB_POOL_CHECKOUTS = Counter('farmcloud_db_pool_checkouts', 'Connections checked out of the pool', ['database'])
+DB_POOL_QUEUED = Counter(
+    'farmcloud_db_pool_queued_checkouts', 'Checkouts that waited for a connection to be returned', ['database'],
+)
+DB_POOL_WAIT = Counter('farmcloud_db_pool_wait_seconds', 'Time spent waiting for pooled connections', ['database'])
+DB_POOL_TIMEOUTS = Counter(
+    'farmcloud_db_pool_timeouts', 'Checkouts that gave up after DB_POOL_TIMEOUT', ['database'],
+)
+DB_POOL_CONNECTS = Counter(
+    'farmcloud_db_pool_connects', 'New server connections opened by the pool', ['database'],
+)
+
+# (view, sql) pairs already logged by this process
+_reported = set()
+
+# (view, method, status): histogram children observed by this process
+_children = {}
+
+# Requests observed but not yet written to the histograms: flush() runs
+# every FLUSH_EVERY requests, after FLUSH_SECONDS, on scrape and on exit
+_pending = collections.deque()
+_flushed_at = time.monotonic()
+FLUSH_EVERY = 32
+FLUSH_SECONDS = 1.0
+
+
+# QueryRecorder of the request being served, if any
+_recorder = contextvars.ContextVar('query_recorder', default=None)
+
+
+class QueryRecorder:
+    """Counts queries, their time and (when `statements` is a dict) repeats per statement"""
+    __slots__ = ('count', 'duration', 'statements', '_token')
+
+    def __init__(self, statements=False):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = {} if statements else None
+
+    def __enter__(self):
+        self._token = _recorder.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _recorder.reset(self._token)
+
+
+def record_queries(execute, sql, params, many, context):
+    """Execute wrapper feeding the active QueryRecorder; a plain call otherwise"""
+    recorder = _recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        recorder.duration += time.perf_counter() - started
+        recorder.count += 1
+        if recorder.statements is not None:
+            recorder.statements[sql] = recorder.statements.get(sql, 0) + 1
+
+
+def install(connection, **kwargs):
+    """`connection_created` receiver: put record_queries on the connection once"""
+    if record_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_queries)
+
+
+def observe(view, method, status, seconds, recorder, size):
+    # Histogram writes are queued and applied in batches by flush(), which
+    # runs hot instead of paying cold-cache prices on every request
+    _pending.append((view, method, status, seconds, recorder.count, recorder.duration, size))
+    if len(_pending) >= FLUSH_EVERY or time.monotonic() - _flushed_at >= FLUSH_SECONDS:
+        flush()
+
+    if recorder.statements is None:
+        return
+    threshold = settings.METRICS_N_PLUS_ONE_THRESHOLD
+    if recorder.count < threshold:
+        return
+    repeated = [(sql, n) for sql, n in recorder.statements.items() if n >= threshold]
+    if repeated:
+        N_PLUS_ONE.labels(view).inc()
+        for sql, n in repeated:
+            if (view, sql) not in _reported:
+                _reported.add((view, sql))
+                logger.warning('Possible N+1 in %s: %d x %s', view, n, sql)
+
+
+def flush():
+    """Write the queued observations of this process to the histograms"""
+    global _flushed_at
+    _flushed_at = time.monotonic()
+    while True:
+        try:
+            view, method, status, seconds, count, duration, size = _pending.popleft()
+        except IndexError:
+            return
+        children = _children.get((view, method, status))
+        if children is None:
+            # Looking up labelled children costs more than observing; keep them per label set
+            children = _children[view, method, status] = (
+                REQUEST_LATENCY.labels(view, method, status), QUERY_COUNT.labels(view),
+                QUERY_TIME.labels(view), RESPONSE_SIZE.labels(view),
+            )
+        latency, query_count, query_time, response_size = children
+        latency.observe(seconds)
+        query_count.observe(count)
+        query_time.observe(duration)
+        if size is not None:
+            response_size.observe(size)
+
+
+def render():
+    """(payload, content type) of every metric, across worker processes when multiprocess"""
+    flush()
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -1,9 +1,17 @@
 """
 Custom middleware for FarmCloud
 """
+import json
+import logging
+import random
 import re
+import time
 from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
 from django.http import HttpResponsePermanentRedirect
+from farmcloud import metrics, routers
 
 class StaticFilesSSLRedirectMiddleware:
     """
@@ -32,3 +40,125 @@ class StaticFilesSSLRedirectMiddleware:
         
         response = self.get_response(request)
         return response
+
+
+class RequestMetricsMiddleware:
+    """
+    Record latency, DB query count/time and response size per view.
+    
+    Should come first in MIDDLEWARE so the latency covers the whole stack.
+    Samples go to the Prometheus metrics in farmcloud.metrics, which also
+    flags likely N+1 query patterns in a sample of the requests
+    (METRICS_N_PLUS_ONE_SAMPLE_RATE); disable with METRICS_ENABLED=False.
+    """
+    
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.METRICS_N_PLUS_ONE_SAMPLE_RATE
+        # Connections opened from now on get the wrapper as they connect
+        connection_created.connect(metrics.install, dispatch_uid='farmcloud.metrics.install')
+        for connection in connections.all(initialized_only=True):
+            metrics.install(connection)
+    
+    def __call__(self, request):
+        sampled = self.sample_rate >= 1 or (self.sample_rate > 0 and random.random() < self.sample_rate)
+        started = time.perf_counter()
+        with metrics.QueryRecorder(statements=sampled) as recorder:
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+        
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name or match.route) if match else '<unresolved>'
+        # CommonMiddleware sets Content-Length on every non-streaming response;
+        # reading response.content instead would copy the body
+        length = response.get('Content-Length')
+        if length is not None:
+            size = int(length)
+        else:
+            size = None if response.streaming else len(response.content)
+        metrics.observe(view, request.method, str(response.status_code), elapsed, recorder, size)
+        return response
+
+
+class PrimaryAfterWriteMiddleware:
+    """
+    Keep a caller's reads on the primary database for REPLICA_STICKY_SECONDS
+    after a successful write request, so replica lag never hides their own
+    changes (see farmcloud.routers).
+    
+    Runs after authentication: DRF sets the JWT user on the Django request
+    during the view, which is done by the time the response comes back here.
+    """
+    
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in self.SAFE_METHODS and response.status_code < 400:
+            routers.stick_to_primary(request)
+        return response
+
+
+class QueryShapeMiddleware:
+    """
+    Record the filter/ordering/search shape of API list requests.
+    
+    One JSON line per sampled request goes to the `farmcloud.query_shapes`
+    logger; `manage.py advise_indexes` replays them to propose indexes.
+    Only parameter names are kept, plus values of boolean/choice filters
+    (needed to propose partial indexes).
+    """
+    
+    logger = logging.getLogger('farmcloud.query_shapes')
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.QUERY_SHAPE_SAMPLE_RATE
+    
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            self.sample_rate > 0
+            and request.method == 'GET'
+            and response.status_code == 200
+            and (self.sample_rate >= 1 or random.random() < self.sample_rate)
+        ):
+            shape = self.shape(request)
+            if shape:
+                self.logger.info(json.dumps(shape, sort_keys=True))
+        return response
+    
+    @staticmethod
+    def shape(request):
+        match = getattr(request, 'resolver_match', None)
+        view_class = getattr(getattr(match, 'func', None), 'cls', None)
+        if view_class is None or (getattr(match.func, 'actions', None) or {}).get('get') != 'list':
+            return None
+        
+        queryset = getattr(view_class, 'queryset', None)
+        model = getattr(queryset, 'model', None)
+        if model is None:
+            return None
+        
+        filters = {}
+        for name in getattr(view_class, 'filterset_fields', None) or []:
+            if name not in request.GET:
+                continue
+            try:
+                field = model._meta.get_field(name)
+            except Exception:
+                continue
+            keep_value = bool(field.choices) or field.get_internal_type() == 'BooleanField'
+            filters[name] = request.GET[name] if keep_value else '?'
+        
+        return {
+            'view': f'{view_class.__module__}.{view_class.__name__}',
+            'filters': filters,
+            'ordering': request.GET.get('ordering', ''),
+            'search': bool(request.GET.get('search')),
+        }
@@ -0,0 +1,314 @@
+"""
+Shared viewset and serializer mixins for FarmCloud APIs
+"""
+import hashlib
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from farmcloud import exports, respcache, routers
+
+
+def _scoped_role(request):
+    """The caller's role when it is subject to scoping (superusers never are)"""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated or user.is_superuser:
+        return None
+    return getattr(user, 'role', None)
+
+
+class ConditionalGetMixin:
+    """
+    Conditional GET (ETag / Last-Modified) for list and retrieve.
+
+    Validators come from the model's `updated_at`: the object's own value for
+    detail views, and MAX(updated_at) plus COUNT(*) of the filtered queryset
+    for list views. When the client's If-None-Match / If-Modified-Since still
+    match, a 304 is returned before anything is serialized.
+
+    Every ETag also carries the version stamps (farmcloud.respcache) of the
+    viewset's model and of `validator_models` - the related rows the
+    serializer renders, by default the viewset's `cache_models` - so saves,
+    deletes and queryset updates of any of them change it. Last-Modified
+    can't see those, so it is only sent for detail views without related
+    models; lists (where deletions don't move MAX(updated_at)) get an ETag
+    only. The caller's role is part of every ETag, since roles may see
+    different rows and fields.
+    """
+    validator_field = 'updated_at'
+    validator_models = None
+
+    def get_validator_role(self):
+        return _scoped_role(self.request) or ''
+
+    def get_validator_models(self, model):
+        """The versioned models whose stamps go into the ETags: `model` first, then the related ones"""
+        related = self.validator_models if self.validator_models is not None else getattr(self, 'cache_models', [])
+        return [m for m in [model, *related] if isinstance(m._default_manager, respcache.VersionedManager)]
+
+    def get_object_validators(self, instance):
+        """(etag, last_modified) for a single object"""
+        updated_at = getattr(instance, self.validator_field)
+        model = type(instance)
+        versioned = self.get_validator_models(model)
+        etag = '-'.join([
+            instance._meta.label_lower, str(instance.pk), str(updated_at.timestamp() if updated_at else 0),
+            *respcache.versions(versioned),
+        ])
+        role = self.get_validator_role()
+        if role:
+            etag = f'{etag}-{role.lower()}'
+        related = [m for m in versioned if m is not model]
+        return f'W/"{hashlib.md5(etag.encode()).hexdigest()}"', None if related else updated_at
+
+    def get_list_validators(self, queryset):
+        """(etag, None) for a filtered list, one aggregate query plus the stamps"""
+        stats = queryset.order_by().aggregate(
+            last_modified=Max(self.validator_field),
+            count=Count('pk'),
+        )
+        last_modified = stats['last_modified']
+        # Page, ordering and filters all live in the query string
+        key = '|'.join([
+            self.request.get_full_path(),
+            self.get_validator_role(),
+            str(stats['count']),
+            str(last_modified.timestamp() if last_modified else 0),
+            *respcache.versions(self.get_validator_models(queryset.model)),
+        ])
+        etag = hashlib.md5(key.encode()).hexdigest()
+        return f'W/"{etag}"', None
+
+    def conditional_response(self, request, validators, render):
+        """Return 304 if validators match, otherwise render() with validators set"""
+        etag, last_modified = validators
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = render()
+            if response.status_code != 200:
+                return response
+
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        validators = self.get_list_validators(self.filter_queryset(self.get_queryset()))
+        return self.conditional_response(
+            request, validators, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+
+        def render():
+            serializer = self.get_serializer(instance)
+            return Response(serializer.data)
+
+        return self.conditional_response(request, self.get_object_validators(instance), render)
+
+
+class CachedResponseMixin:
+    """
+    Versioned response cache (see farmcloud.respcache) for list and retrieve.
+
+    `cache_actions` maps each cached action to its timeout in seconds (None
+    for RESPONSE_CACHE_TIMEOUT); `cache_models` lists every model the
+    response is built from - the queryset's own model, related rows the
+    serializer reads, and models that role scopes filter on. Responses are
+    kept per role, and per user for roles this viewset scopes by user.
+
+    Hits are served without touching the database and answer If-None-Match
+    from the cached ETag. Responses read from a replica (ReplicaReadMixin)
+    are not stored: they may lag the stamps they would be keyed by. Goes
+    before ConditionalGetMixin in the bases.
+    """
+    cache_actions = {}
+    cache_models = []
+
+    def get_cache_key(self):
+        role = _scoped_role(self.request) or ''
+        per_user = role and hasattr(self, f'scope_{role.lower()}')
+        return respcache.cache_key(
+            self.request, type(self).__name__, self.action, self.cache_models,
+            role=role, user=self.request.user if per_user else None,
+        )
+
+    def cached(self, request, render):
+        if not settings.RESPONSE_CACHE_ENABLED or self.action not in self.cache_actions:
+            return render()
+        key = self.get_cache_key()
+        entry = respcache.cache().get(key)
+        respcache.record(type(self).__name__, self.action, hit=entry is not None)
+        if entry is None:
+            self._response_cache_key = key
+            return render()
+
+        content, content_type, headers = entry
+        last_modified = headers.get('Last-Modified')
+        response = get_conditional_response(
+            request, etag=headers.get('ETag'),
+            last_modified=int(parse_http_date(last_modified)) if last_modified else None,
+        )
+        if response is None:
+            response = HttpResponse(content, content_type=content_type)
+        for header, value in headers.items():
+            response[header] = value
+        response['X-Cache'] = 'HIT'
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, '_response_cache_key', None)
+        if getattr(self, '_read_alias', None):
+            key = None
+        if key and response.status_code == 200 and isinstance(response, Response):
+            response.render()
+            headers = {header: response[header] for header in ('ETag', 'Last-Modified') if header in response}
+            timeout = self.cache_actions[self.action]
+            respcache.cache().set(
+                key, (response.content, response['Content-Type'], headers),
+                settings.RESPONSE_CACHE_TIMEOUT if timeout is None else timeout,
+            )
+            response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached(request, lambda: super(CachedResponseMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached(request, lambda: super(CachedResponseMixin, self).retrieve(request, *args, **kwargs))
+
+
+class ExportMixin:
+    """
+    GET <list>/export/?file_format=csv|ndjson|xlsx streams every row of the
+    list as a file download.
+
+    The list's filters, search, ordering and role scoping all apply, but not
+    pagination. `export_fields` maps column names to values_list() paths;
+    columns are limited to the serializer's `role_fields` for the caller's
+    role. Rows are read through a server-side cursor, export_chunk_size at a
+    time, so memory stays flat however many rows match.
+    """
+    export_fields = {}
+    export_chunk_size = 2000
+
+    def get_export_columns(self):
+        allowed = getattr(self.get_serializer_class().Meta, 'role_fields', {}).get(_scoped_role(self.request))
+        return [column for column in self.export_fields if allowed is None or column in allowed]
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def export(self, request):
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in exports.WRITERS:
+            raise ValidationError({'file_format': f'Use one of: {", ".join(exports.WRITERS)}.'})
+
+        columns = self.get_export_columns()
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        rows = queryset.values_list(*[self.export_fields[column] for column in columns])
+        response = StreamingHttpResponse(
+            exports.WRITERS[file_format](columns, rows.iterator(chunk_size=self.export_chunk_size)),
+            content_type=exports.CONTENT_TYPES[file_format],
+        )
+        filename = f'{queryset.model._meta.verbose_name_plural}-{timezone.localdate():%Y%m%d}.{file_format}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class RoleScopedMixin:
+    """
+    Row-level scoping by users.User.role.
+
+    A viewset restricts a role by defining `scope_<role>(queryset, user)`,
+    e.g. `scope_delivery`; roles without a scope method (and anonymous
+    development access) get the unscoped queryset. Filters, pagination,
+    detail lookups and conditional-GET validators all run on the scoped
+    queryset, so out-of-scope rows are simply not found.
+
+    Writes are checked too: `allows_<role>(attrs, user)` gets the validated
+    data of a create or update and returns False when it would point the
+    row outside the caller's scope (e.g. an item on someone else's order),
+    which is refused with 403.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        role = _scoped_role(self.request)
+        scope = getattr(self, f'scope_{role.lower()}', None) if role else None
+        return scope(queryset, self.request.user) if scope else queryset
+
+    def check_write_scope(self, attrs):
+        role = _scoped_role(self.request)
+        allows = getattr(self, f'allows_{role.lower()}', None) if role else None
+        if allows is not None and not allows(attrs, self.request.user):
+            raise PermissionDenied('You can only change records assigned to you.')
+
+    def perform_create(self, serializer):
+        self.check_write_scope(serializer.validated_data)
+        super().perform_create(serializer)
+
+    def perform_update(self, serializer):
+        self.check_write_scope(serializer.validated_data)
+        super().perform_update(serializer)
+
+
+class RoleFieldsMixin:
+    """
+    Field-level scoping for ModelSerializers: `Meta.role_fields` maps a role
+    to the only fields it may read or write, and `Meta.role_read_only_fields`
+    to fields it may read but not write. Nested serializers apply their own,
+    since they share the request in their context.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        role = _scoped_role(self.context.get('request'))
+        for name in getattr(self.Meta, 'role_read_only_fields', {}).get(role, ()):
+            if name in fields:
+                fields[name].read_only = True
+                fields[name].required = False
+        allowed = getattr(self.Meta, 'role_fields', {}).get(role)
+        if allowed is None:
+            return fields
+        return {name: field for name, field in fields.items() if name in allowed}
+
+
+class ReplicaReadMixin:
+    """
+    Serve GET/HEAD requests to `replica_actions` from a read replica (see
+    farmcloud.routers) unless the caller wrote within the sticky window or
+    no replica is healthy. The choice is made after authentication; the
+    viewset's queryset is pinned to it, so lazily streamed exports read
+    from the same database after the view returns.
+    """
+    replica_actions = {'list', 'retrieve', 'export'}
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in ('GET', 'HEAD') and self.action in self.replica_actions:
+            self._read_alias = routers.choose_replica(request)
+            self._read_token = routers.use_replica(self._read_alias)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        alias = getattr(self, '_read_alias', None)
+        return queryset.using(alias) if alias else queryset
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_read_token', None)
+        if token is not None:
+            routers.reset(token)
+            self._read_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,185 @@
+"""
+In-process read-through cache for small, hot reference data
+
+Each ReferenceCache keeps one loaded value per worker process, tagged with
+the version stamp it was loaded under. Stamps live in a store shared by all
+workers - the Redis cache when REDIS_URL is set, otherwise the
+ops.ReferenceVersion table - and are bumped on commit of any write to the
+underlying rows, so every worker reloads on its next read.
+
+    BREEDS = ReferenceCache('breeds', lambda: {b.pk: b for b in Breed.objects.all()})
+    BREEDS.get()          # loaded once per process, until the stamp moves
+    BREEDS.invalidate()   # from save/delete signals
+
+Stamps are re-read at most every REFERENCE_CACHE_RECHECK seconds, and at
+most once per request: the first get() of a request reads them for all
+caches, the rest reuse them, so a serializer calling BREEDS.get() per row
+costs one round trip to the stamp store, not one per row (with Redis the
+recheck interval is 0).
+
+Cached values are shared between threads: treat them as read-only.
+"""
+import contextvars
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import request_finished, request_started
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from farmcloud import routers
+
+_registry = {}
+
+# Stamps read during the current request ({name: stamp}), None outside requests
+_request_stamps = contextvars.ContextVar('request_stamps', default=None)
+
+
+class CacheStamps:
+    """Version stamps as keys in a (shared) Django cache"""
+
+    def __init__(self, alias='default'):
+        self.cache = caches[alias]
+
+    def _key(self, name):
+        return f'refcache:{name}'
+
+    def read(self, names):
+        keys = {self._key(name): name for name in names}
+        found = self.cache.get_many(list(keys))
+        stamps = {keys[key]: value for key, value in found.items()}
+        for name in names:
+            if name not in stamps:
+                # Evicted or never set: agree on a fresh stamp
+                self.cache.add(self._key(name), uuid.uuid4().hex, timeout=None)
+                stamps[name] = self.cache.get(self._key(name))
+        return stamps
+
+    def bump(self, name):
+        self.cache.set(self._key(name), uuid.uuid4().hex, timeout=None)
+
+
+class DatabaseStamps:
+    """Version stamps as rows of ops.ReferenceVersion"""
+
+    def read(self, names):
+        from ops.models import ReferenceVersion
+        stamps = dict.fromkeys(names)  # never bumped yet
+        # From the primary even in replica-routed requests: a lagging stamp would tag fresh rows as old
+        stamps.update(ReferenceVersion.objects.using(DEFAULT_DB_ALIAS).filter(name__in=names)
+                      .values_list('name', 'version'))
+        return stamps
+
+    def bump(self, name):
+        from django.db.models import F
+        from ops.models import ReferenceVersion
+        if not ReferenceVersion.objects.filter(name=name).update(version=F('version') + 1):
+            ReferenceVersion.objects.get_or_create(name=name)
+
+
+class _StampReader:
+    """Reads every registered stamp in one round trip, at most once per request and recheck interval"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stamps = {}
+        self._read_at = 0.0
+        self._store = None
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = DatabaseStamps() if settings.REFERENCE_CACHE_STAMPS == 'database' else CacheStamps()
+        return self._store
+
+    def current(self, name):
+        memo = _request_stamps.get()
+        if memo is not None and name in memo:
+            return memo[name]
+        now = time.monotonic()
+        if now - self._read_at >= settings.REFERENCE_CACHE_RECHECK or name not in self._stamps:
+            with self._lock:
+                self._stamps = self.store.read(list(_registry))
+                self._read_at = now
+        stamps = self._stamps
+        if memo is not None:
+            memo.update(stamps)
+        return stamps.get(name)
+
+    def bump(self, name):
+        self.store.bump(name)
+        # This worker (and request) sees its own writes immediately
+        self._read_at = 0.0
+        memo = _request_stamps.get()
+        if memo is not None:
+            memo.clear()
+
+
+stamps = _StampReader()
+
+
+def _start_request(**kwargs):
+    _request_stamps.set({})
+
+
+def _finish_request(**kwargs):
+    _request_stamps.set(None)
+
+
+request_started.connect(_start_request, dispatch_uid='farmcloud.refcache.start_request')
+request_finished.connect(_finish_request, dispatch_uid='farmcloud.refcache.finish_request')
+
+
+class ReferenceCache:
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self.hits = 0
+        self.misses = 0
+        self._entry = None  # (stamp, value)
+        self._lock = threading.Lock()
+        _registry[name] = self
+
+    def get(self):
+        # Read the stamp before loading: a bump racing the load forces a reload next time
+        stamp = stamps.current(self.name)
+        entry = self._entry
+        if entry is not None and entry[0] == stamp:
+            self.hits += 1
+            return entry[1]
+        with self._lock:
+            entry = self._entry
+            if entry is not None and entry[0] == stamp:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            with routers.primary():  # a replica's lagging rows would be kept under the newest stamp
+                value = self.loader()
+            self._entry = (stamp, value)
+            return value
+
+    def invalidate(self):
+        """Move the shared stamp once the current transaction commits"""
+        transaction.on_commit(lambda: stamps.bump(self.name))
+
+
+def warm():
+    """Load every registered cache (e.g. before a server forks its workers)"""
+    for cache in _registry.values():
+        cache.get()
+    return sorted(_registry)
+
+
+def stats():
+    """Per-process hit/miss counters of every registered cache"""
+    result = {}
+    for name, cache in sorted(_registry.items()):
+        total = cache.hits + cache.misses
+        result[name] = {
+            'hits': cache.hits,
+            'misses': cache.misses,
+            'hit_rate': round(cache.hits / total, 4) if total else None,
+        }
+    return result
@@ -0,0 +1,147 @@
+"""
+Versioned response cache for read-heavy API endpoints
+
+Every model whose manager is built from VersionedQuerySet has a version
+stamp in the refcache stamp store (Redis, or ops.ReferenceVersion). The
+stamp moves on commit of any save, delete, queryset update() - admin
+actions included - or bulk write of that model. Cached responses are keyed
+by the stamps of the models they were built from, so invalidating is one
+stamp bump: old entries are never looked up again and simply expire.
+
+    class Breed(models.Model):
+        objects = VersionedQuerySet.as_manager()
+
+Viewsets opt in with farmcloud.mixins.CachedResponseMixin. Raw-SQL writers
+(e.g. ops.dataset) call bump() themselves.
+"""
+import hashlib
+import threading
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+
+from farmcloud.refcache import stamps
+
+_lock = threading.Lock()
+_stats = {}  # {(view, action): [hits, misses]}
+
+
+def stamp_name(model):
+    return f'model:{model._meta.label_lower}'
+
+
+def bump(*models_):
+    """Move the version of each model once the current transaction commits"""
+    connection = transaction.get_connection()
+    # Only callbacks of enclosing savepoints: those of a nested one are lost if it rolls back
+    savepoints = set(connection.savepoint_ids)
+    pending = {
+        getattr(func, 'stamp_name', None) for sids, func, _ in connection.run_on_commit
+        if sids <= savepoints and not getattr(func, 'done', False)
+    }
+    for model in models_:
+        name = stamp_name(model)
+        if name in pending:
+            continue  # one bump per model and transaction is enough
+
+        def move(name=name):
+            stamps.bump(name)
+            move.done = True
+        move.stamp_name = name
+        transaction.on_commit(move)
+
+
+def versions(models_):
+    """Current stamp of each model, in one round trip to the stamp store"""
+    names = [stamp_name(model) for model in models_]
+    found = stamps.store.read(names)
+    return [str(found.get(name)) for name in names]
+
+
+def _model_changed(sender, **kwargs):
+    bump(sender)
+
+
+class VersionedQuerySet(models.QuerySet):
+    """QuerySet whose bulk writes move the model's version stamp"""
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        if rows:
+            bump(self.model)
+        return rows
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        created = super().bulk_create(objs, *args, **kwargs)
+        if created:
+            bump(self.model)
+        return created
+    bulk_create.alters_data = True
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        if rows:
+            bump(self.model)
+        return rows
+    bulk_update.alters_data = True
+
+    @classmethod
+    def as_manager(cls):
+        manager = VersionedManager.from_queryset(cls)()
+        manager._built_with_as_manager = True
+        return manager
+    as_manager.queryset_only = True
+
+
+class VersionedManager(models.Manager):
+    """Connects the save/delete signals that move the version of the model it is attached to"""
+
+    def contribute_to_class(self, cls, name):
+        super().contribute_to_class(cls, name)
+        if not cls._meta.abstract:
+            uid = f'respcache:{cls._meta.label_lower}'
+            post_save.connect(_model_changed, sender=cls, weak=False, dispatch_uid=uid)
+            post_delete.connect(_model_changed, sender=cls, weak=False, dispatch_uid=uid)
+
+
+def cache_key(request, view, action, models_, role='', user=None):
+    """
+    Key of one response: view, action, the normalized query string, host,
+    renderer, the caller's role (and user, for per-user querysets) and the
+    version of every model the response was built from
+    """
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    parts = [
+        view, action, request.path, query, request.get_host(), str(request.is_secure()),
+        getattr(request.accepted_renderer, 'format', ''), role,
+        str(user.pk) if user is not None else '', *versions(models_),
+    ]
+    return 'respcache:' + hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+
+def cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def record(view, action, hit):
+    from farmcloud import metrics
+    with _lock:
+        counts = _stats.setdefault((view, action), [0, 0])
+        counts[0 if hit else 1] += 1
+    metrics.RESPONSE_CACHE.labels(view, action, 'hit' if hit else 'miss').inc()
+
+
+def stats():
+    """Per-process hit/miss counters by view and action"""
+    result = {}
+    for (view, action), (hits, misses) in sorted(_stats.items()):
+        result[f'{view}.{action}'] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 4) if hits + misses else None,
+        }
+    return result
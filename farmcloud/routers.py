@@ -0,0 +1,160 @@
+"""
+Read-replica routing for safe API reads
+
+DATABASE_REPLICAS lists database aliases holding read-only copies of
+`default`. Reads go to a replica only inside views that opt in with
+farmcloud.mixins.ReplicaReadMixin (reports, exports, the catalog), and only
+for GET/HEAD requests to their replica actions; everything else - writes,
+admin, other endpoints, background work - stays on the primary.
+
+A caller who wrote recently reads from the primary for REPLICA_STICKY_SECONDS
+afterwards (PrimaryAfterWriteMiddleware marks them), so they see their own
+writes. Replicas more than REPLICA_MAX_LAG seconds behind - or unreachable -
+are skipped; lag is measured at most every REPLICA_LAG_CHECK_INTERVAL
+seconds per replica and process. With no healthy replica, reads fall back
+to the primary.
+
+Reference data (farmcloud.refcache loaders) and version stamps are always
+read from the primary: they are cached under the newest stamp, so a lagging
+copy would be served until the next write. Responses built from a replica
+are not stored in the response cache for the same reason.
+
+The stickiness marks live in the default cache, so they are shared by all
+workers only when it is Redis.
+"""
+import contextlib
+import contextvars
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from farmcloud import metrics
+
+# Replica chosen for the reads of the current request, if any
+_read_alias = contextvars.ContextVar('read_alias', default=None)
+
+# Seconds the replica's last replayed transaction is behind; 0 when caught up
+# (nothing left to replay) or when the database is not a standby at all. NULL
+# - unhealthy - when no WAL receiver is streaming: a disconnected standby has
+# nothing left to replay either, however far behind the primary it is. Roles
+# without pg_read_all_stats see no receiver status, only whether one runs.
+POSTGRES_LAG_SQL = (
+    'SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0 '
+    "WHEN NOT EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE coalesce(status, 'streaming') = 'streaming') "
+    'THEN NULL '
+    'WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+    'ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END'
+)
+
+
+class ReplicaHealth:
+    """Per-process replication lag of each replica, re-measured every REPLICA_LAG_CHECK_INTERVAL"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked = {}  # {alias: (monotonic time, lag in seconds or None if unreachable)}
+
+    def measure(self, alias):
+        try:
+            connection = connections[alias]
+            if connection.vendor != 'postgresql':
+                connection.ensure_connection()
+                return 0.0  # no replication to lag behind (local aliases of one database)
+            with connection.cursor() as cursor:
+                cursor.execute(POSTGRES_LAG_SQL)
+                lag = cursor.fetchone()[0]
+                return None if lag is None else float(lag)
+        except DatabaseError:
+            return None
+
+    def lag(self, alias):
+        now = time.monotonic()
+        checked = self._checked.get(alias)
+        if checked is None or now - checked[0] >= settings.REPLICA_LAG_CHECK_INTERVAL:
+            with self._lock:
+                lag = self.measure(alias)
+                self._checked[alias] = (now, lag)
+            metrics.DB_REPLICA_LAG.labels(alias).set(-1 if lag is None else lag)
+            return lag
+        return checked[1]
+
+    def healthy(self):
+        """Replicas that answered their last check and are within REPLICA_MAX_LAG"""
+        result = []
+        for alias in settings.DATABASE_REPLICAS:
+            lag = self.lag(alias)
+            if lag is not None and lag <= settings.REPLICA_MAX_LAG:
+                result.append(alias)
+        return result
+
+    def reset(self):
+        self._checked.clear()
+
+
+health = ReplicaHealth()
+
+
+def _caller_key(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'dbrouter:primary:user:{user.pk}'
+    return f'dbrouter:primary:addr:{request.META.get("REMOTE_ADDR", "")}'
+
+
+def stick_to_primary(request):
+    """Serve this caller's reads from the primary for the next REPLICA_STICKY_SECONDS"""
+    if settings.DATABASE_REPLICAS:
+        cache.set(_caller_key(request), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def choose_replica(request):
+    """A healthy replica for this caller's reads, or None for the primary"""
+    if not settings.DATABASE_REPLICAS or cache.get(_caller_key(request)):
+        return None
+    replicas = health.healthy()
+    return random.choice(replicas) if replicas else None
+
+
+def use_replica(alias):
+    """Route the reads of the current context to `alias` (None: the primary); returns a token for reset()"""
+    metrics.DB_READ_ROUTES.labels(alias or DEFAULT_DB_ALIAS).inc()
+    return _read_alias.set(alias)
+
+
+def reset(token):
+    _read_alias.reset(token)
+
+
+@contextlib.contextmanager
+def primary():
+    """Route the reads inside the block to the primary, whatever the request chose"""
+    token = _read_alias.set(None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+class ReplicaRouter:
+    """Sends reads to the replica chosen for the current request; never writes to a replica"""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        # Rows read from a replica are saved to the primary, not back where they came from
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db in settings.DATABASE_REPLICAS:
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the primary's rows, so objects from any of them may be related
+        aliases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
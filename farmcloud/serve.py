@@ -0,0 +1,107 @@
+"""
+Production server: gunicorn workers forked from a preloaded, warmed master
+Run: python -m farmcloud.serve [--bind 0.0.0.0:8000] [--workers N] [--threads N]
+
+The master imports Django, builds the WSGI handler and runs
+farmcloud.warmup once, before forking, so every worker starts hot and
+shares that memory copy-on-write. Database connection pools are closed
+before the fork: each worker opens its own on its first query and closes
+it on exit. Debug-only apps and middleware (debug_toolbar) are never
+loaded, whatever DEBUG says. Defaults come from
+the SERVE_* settings (WEB_CONCURRENCY for the worker count). Request
+metrics are collected across workers in PROMETHEUS_MULTIPROC_DIR, which
+is emptied at startup.
+
+Signals to the master:
+    HUP         replace the workers gracefully (in-flight requests finish)
+    USR2        start a new master on the deployed code next to this one;
+                then WINCH/TERM the old master for a zero-downtime upgrade
+    TERM        graceful shutdown, waiting up to SERVE_GRACEFUL_TIMEOUT
+"""
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+import django
+from gunicorn.app.base import BaseApplication
+
+STARTED = time.perf_counter()
+
+logger = logging.getLogger('gunicorn.error')
+
+
+class FarmCloudServer(BaseApplication):
+    def __init__(self, options):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from django.core.wsgi import get_wsgi_application
+        from farmcloud import warmup
+
+        application = get_wsgi_application()
+        for step, (count, seconds) in warmup.warm().items():
+            status = 'failed' if count is None else f'{count} warmed'
+            logger.info('Warm-up %s: %s in %.0fms', step, status, seconds * 1000)
+        return application
+
+
+def when_ready(server):
+    server.log.info('Accepting connections %.2fs after start', time.perf_counter() - STARTED)
+
+
+def worker_exit(server, worker):
+    from farmcloud import dbpool, metrics
+    metrics.flush()
+    dbpool.close_pools()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def main(argv=None):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'farmcloud.settings')
+    os.environ['DEBUG_TOOLBAR'] = 'False'
+    # Must be set before prometheus_client is first imported
+    metrics_dir = os.environ.setdefault(
+        'PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'farmcloud-metrics')
+    )
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+    django.setup(set_prefix=False)
+    from django.conf import settings
+
+    parser = argparse.ArgumentParser(description='Serve FarmCloud with preloaded gunicorn workers')
+    parser.add_argument('--bind', default=settings.SERVE_BIND)
+    parser.add_argument('--workers', type=int, default=settings.SERVE_WORKERS)
+    parser.add_argument('--threads', type=int, default=settings.SERVE_THREADS)
+    args = parser.parse_args(argv)
+
+    FarmCloudServer({
+        'bind': args.bind,
+        'workers': args.workers,
+        'threads': args.threads,
+        'worker_class': 'gthread' if args.threads > 1 else 'sync',
+        'preload_app': True,
+        'timeout': settings.SERVE_TIMEOUT,
+        'graceful_timeout': settings.SERVE_GRACEFUL_TIMEOUT,
+        'max_requests': settings.SERVE_MAX_REQUESTS,
+        'max_requests_jitter': settings.SERVE_MAX_REQUESTS // 10,
+        'proc_name': 'farmcloud',
+        'when_ready': when_ready,
+        'worker_exit': worker_exit,
+        'child_exit': child_exit,
+    }).run()
+
+
+if __name__ == '__main__':
+    main()
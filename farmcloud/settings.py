@@ -3,6 +3,7 @@ Django settings for FarmCloud project.
 """
 
 import os
+import sys
 from pathlib import Path
 from decouple import config, Csv
 
@@ -15,6 +16,8 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = config('SECRET_KEY', default='dev-secret-key-CHANGE-THIS-IN-PRODUCTION')
 DEBUG = config('DEBUG', default=False, cast=bool)  # Changed to False for production safety
 ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='localhost,127.0.0.1', cast=Csv())
+# Debug-only apps and middleware; the production server (farmcloud.serve) always turns this off
+DEBUG_TOOLBAR = config('DEBUG_TOOLBAR', default=DEBUG, cast=bool)
 
 # Application definition
 INSTALLED_APPS = [
@@ -35,7 +38,6 @@ INSTALLED_APPS = [
     'rest_framework_simplejwt',
     'corsheaders',
     'django_filters',
-    'debug_toolbar',
     'axes',  # Brute force protection
     
     # Local apps
@@ -44,9 +46,14 @@ INSTALLED_APPS = [
     'orders.apps.OrdersConfig',
     'customers.apps.CustomersConfig',
     'settings.apps.SettingsConfig',
+    'ops.apps.OpsConfig',
+    'reports.apps.ReportsConfig',
+    'jobs.apps.JobsConfig',
+    'webhooks.apps.WebhooksConfig',
 ]
 
 MIDDLEWARE = [
+    'farmcloud.middleware.RequestMetricsMiddleware',  # first, so latency covers the whole stack
     'django.middleware.security.SecurityMiddleware',
     'farmcloud.middleware.StaticFilesSSLRedirectMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -56,10 +63,15 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
     'axes.middleware.AxesMiddleware',  # Brute force protection
+    'farmcloud.middleware.PrimaryAfterWriteMiddleware',
+    'farmcloud.middleware.QueryShapeMiddleware',
 ]
 
+if DEBUG_TOOLBAR:
+    INSTALLED_APPS.insert(INSTALLED_APPS.index('django_filters') + 1, 'debug_toolbar')
+    MIDDLEWARE.insert(MIDDLEWARE.index('axes.middleware.AxesMiddleware'), 'debug_toolbar.middleware.DebugToolbarMiddleware')
+
 ROOT_URLCONF = 'farmcloud.urls'
 
 TEMPLATES = [
@@ -89,9 +101,98 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD', default='changeme123'),
         'HOST': config('DB_HOST', default='db'),
         'PORT': config('DB_PORT', default='5432'),
+        # Checked before a connection is reused: from the pool, or a persistent one
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Connection pool per process (farmcloud.dbpool); size it to the requests a
+# process serves at once (SERVE_THREADS). DB_POOL=False connects per request,
+# or keeps connections DB_CONN_MAX_AGE seconds
+if config('DB_POOL', default=True, cast=bool):
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': config('DB_POOL_MIN_SIZE', default=1, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=4, cast=int),
+            'max_lifetime': config('DB_POOL_MAX_LIFETIME', default=1800.0, cast=float),  # seconds, then reconnected
+            'max_idle': config('DB_POOL_MAX_IDLE', default=300.0, cast=float),  # seconds before idle extras close
+            'timeout': config('DB_POOL_TIMEOUT', default=10.0, cast=float),  # seconds to wait for a free connection
+        },
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = config('DB_CONN_MAX_AGE', default=0, cast=int)
+
+# Read replicas (farmcloud.routers): DB_REPLICA_HOSTS=host[:port],... adds the
+# aliases replica1..n, connecting with the primary's database and credentials
+DATABASE_REPLICAS = []
+for number, address in enumerate(config('DB_REPLICA_HOSTS', default='', cast=Csv()), 1):
+    host, _, port = address.partition(':')
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+# DB_ENGINE=sqlite runs on a local SQLite file instead (tests, quick local checks)
+if config('DB_ENGINE', default='postgresql') == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': config('SQLITE_PATH', default=str(BASE_DIR / 'db.sqlite3')),
+        }
+    }
+    DATABASE_REPLICAS = []
+
+# Without replica hosts, 'replica' is a second connection to the primary's
+# database: DB_REPLICAS=replica routes reads to it locally. The test runner
+# gives it a test database of its own.
+if not DATABASE_REPLICAS:
+    DATABASES['replica'] = {**DATABASES['default']}
+    if DATABASES['replica']['ENGINE'] != 'django.db.backends.sqlite3':
+        DATABASES['replica']['TEST'] = {'NAME': f"test_{DATABASES['default']['NAME']}_replica"}
+    DATABASE_REPLICAS = config('DB_REPLICAS', default='', cast=Csv())
+
+DATABASE_ROUTERS = ['farmcloud.routers.ReplicaRouter']
+REPLICA_MAX_LAG = config('REPLICA_MAX_LAG', default=5.0, cast=float)  # seconds behind before a replica is skipped
+REPLICA_LAG_CHECK_INTERVAL = config('REPLICA_LAG_CHECK_INTERVAL', default=5.0, cast=float)  # seconds
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=10, cast=int)  # primary-only reads after a write
+
+# Cache: Redis shared by every worker when REDIS_URL is set, else per-process memory
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'farmcloud',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Reference-data cache (farmcloud.refcache): version stamps go to the shared
+# cache with Redis, otherwise to the reference_versions table
+REFERENCE_CACHE_STAMPS = config('REFERENCE_CACHE_STAMPS', default='cache' if REDIS_URL else 'database')
+REFERENCE_CACHE_RECHECK = config(
+    'REFERENCE_CACHE_RECHECK', default=0.0 if REDIS_URL else 0.5, cast=float
+)  # seconds between stamp reads per worker
+
+# Response cache for read-heavy list/detail endpoints (farmcloud.respcache),
+# invalidated through per-model version stamps in the same stamp store
+RESPONSE_CACHE_ENABLED = config('RESPONSE_CACHE_ENABLED', default=True, cast=bool)
+RESPONSE_CACHE_TIMEOUT = config('RESPONSE_CACHE_TIMEOUT', default=300, cast=int)  # seconds
+RESPONSE_CACHE_ALIAS = 'default'
+
+# Daily sales rollup (reports.rollup): each refresh rescans orders updated this
+# long before the previous refresh, for transactions that committed late
+ROLLUP_OVERLAP = config('ROLLUP_OVERLAP', default=300, cast=int)  # seconds
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -111,9 +212,48 @@ STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 
+# Storefront catalog snapshots written to STATIC_ROOT/catalog/ (served by nginx)
+CATALOG_SNAPSHOT_ENABLED = config('CATALOG_SNAPSHOT_ENABLED', default=True, cast=bool)
+CATALOG_SNAPSHOT_DEBOUNCE = config('CATALOG_SNAPSHOT_DEBOUNCE', default=5.0, cast=float)  # seconds of quiet
+CATALOG_SNAPSHOT_MAX_WAIT = config('CATALOG_SNAPSHOT_MAX_WAIT', default=60.0, cast=float)  # upper bound on delay
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Low-stock alerts: crossings within this many seconds go out as one digest
+LOW_STOCK_DIGEST_WINDOW = config('LOW_STOCK_DIGEST_WINDOW', default=60.0, cast=float)
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='FarmCloud <noreply@farmcloud.ae>')
+
+# Background jobs (jobs.queue), run by `manage.py run_jobs`
+JOB_WORKERS = config('JOB_WORKERS', default=2, cast=int)  # worker processes
+JOB_POLL_INTERVAL = config('JOB_POLL_INTERVAL', default=1.0, cast=float)  # seconds between polls when idle
+JOB_BATCH_SIZE = config('JOB_BATCH_SIZE', default=5, cast=int)  # jobs claimed per poll
+JOB_MAX_ATTEMPTS = config('JOB_MAX_ATTEMPTS', default=5, cast=int)
+JOB_RETRY_BACKOFF = config('JOB_RETRY_BACKOFF', default=30.0, cast=float)  # seconds before the first retry, doubling
+JOB_RETRY_BACKOFF_MAX = config('JOB_RETRY_BACKOFF_MAX', default=3600.0, cast=float)
+JOB_TIMEOUT = config('JOB_TIMEOUT', default=900, cast=int)  # seconds RUNNING before a job counts as lost
+JOB_RETENTION_DAYS = config('JOB_RETENTION_DAYS', default=7, cast=int)  # finished jobs kept
+
+# Webhooks to external systems (webhooks.outbox), delivered by `manage.py dispatch_webhooks`
+WEBHOOK_TIMEOUT = config('WEBHOOK_TIMEOUT', default=10.0, cast=float)  # seconds per request
+WEBHOOK_BATCH_SIZE = config('WEBHOOK_BATCH_SIZE', default=20, cast=int)  # messages per endpoint per round
+WEBHOOK_MAX_ATTEMPTS = config('WEBHOOK_MAX_ATTEMPTS', default=12, cast=int)
+WEBHOOK_RETRY_BACKOFF = config('WEBHOOK_RETRY_BACKOFF', default=10.0, cast=float)  # seconds before the first retry, doubling
+WEBHOOK_RETRY_BACKOFF_MAX = config('WEBHOOK_RETRY_BACKOFF_MAX', default=3600.0, cast=float)
+WEBHOOK_POLL_INTERVAL = config('WEBHOOK_POLL_INTERVAL', default=1.0, cast=float)  # seconds between polls when idle
+WEBHOOK_RETENTION_DAYS = config('WEBHOOK_RETENTION_DAYS', default=14, cast=int)  # delivered messages kept
+
+# Image pipeline (thumbnail/WebP rendering pool per serving process)
+IMAGE_PIPELINE_WORKERS = config('IMAGE_PIPELINE_WORKERS', default=2, cast=int)
+
+# Production server (python -m farmcloud.serve)
+SERVE_BIND = config('SERVE_BIND', default='0.0.0.0:8000')
+SERVE_WORKERS = config('WEB_CONCURRENCY', default=2 * (os.cpu_count() or 1) + 1, cast=int)
+SERVE_THREADS = config('SERVE_THREADS', default=1, cast=int)  # >1 switches to threaded workers
+SERVE_TIMEOUT = config('SERVE_TIMEOUT', default=30, cast=int)  # seconds per request
+SERVE_GRACEFUL_TIMEOUT = config('SERVE_GRACEFUL_TIMEOUT', default=30, cast=int)  # seconds to drain on reload/stop
+SERVE_MAX_REQUESTS = config('SERVE_MAX_REQUESTS', default=5000, cast=int)  # recycle workers; 0 disables
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -123,7 +263,7 @@ AUTH_USER_MODEL = 'users.User'
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',  # Secure default
@@ -135,8 +275,8 @@ REST_FRAMEWORK = {
         'rest_framework.throttling.UserRateThrottle'
     ],
     'DEFAULT_THROTTLE_RATES': {
-        'anon': '100/hour',  # Anonymous users
-        'user': '1000/hour'  # Authenticated users
+        'anon': config('THROTTLE_ANON_RATE', default='100/hour'),  # Anonymous users
+        'user': config('THROTTLE_USER_RATE', default='1000/hour'),  # Authenticated users
     }
 }
 
@@ -195,8 +335,22 @@ SIMPLE_JWT = {
     'SIGNING_KEY': SECRET_KEY,
     'AUTH_HEADER_TYPES': ('Bearer',),
     'AUTH_HEADER_NAME': 'HTTP_AUTHORIZATION',
+    # Rotation and logout revoke through users.revocation
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.RevocableTokenRefreshSerializer',
+    'TOKEN_BLACKLIST_SERIALIZER': 'users.serializers.RevocableTokenBlacklistSerializer',
 }
 
+# Seconds an access token's resolved user is cached (users.cache); 0 disables
+JWT_USER_CACHE_TTL = config('JWT_USER_CACHE_TTL', default=60, cast=int)
+
+# Refresh-token revocation (users.revocation): per-worker Bloom filter over revoked_tokens
+REVOCATION_BLOOM_CAPACITY = config('REVOCATION_BLOOM_CAPACITY', default=200000, cast=int)  # minimum; grows with the table
+REVOCATION_BLOOM_ERROR_RATE = config('REVOCATION_BLOOM_ERROR_RATE', default=0.001, cast=float)
+REVOCATION_SYNC_INTERVAL = config('REVOCATION_SYNC_INTERVAL', default=1.0, cast=float)  # seconds
+REVOCATION_REBUILD_INTERVAL = config('REVOCATION_REBUILD_INTERVAL', default=3600.0, cast=float)  # seconds
+REVOCATION_PURGE_INTERVAL = config('REVOCATION_PURGE_INTERVAL', default=3600.0, cast=float)  # seconds
+REVOCATION_PURGE_BATCH = config('REVOCATION_PURGE_BATCH', default=5000, cast=int)
+
 # Logging Configuration
 LOGGING = {
     'version': 1,
@@ -206,6 +360,10 @@ LOGGING = {
             'format': '{levelname} {asctime} {module} {message}',
             'style': '{',
         },
+        'message': {
+            'format': '{message}',
+            'style': '{',
+        },
     },
     'handlers': {
         'file': {
@@ -224,6 +382,14 @@ LOGGING = {
             'backupCount': 10,
             'formatter': 'verbose',
         },
+        'query_shapes_file': {
+            'level': 'INFO',
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': BASE_DIR / 'logs' / 'query_shapes.log',
+            'maxBytes': 1024 * 1024 * 15,
+            'backupCount': 3,
+            'formatter': 'message',
+        },
         'console': {
             'level': 'INFO',
             'class': 'logging.StreamHandler',
@@ -246,9 +412,35 @@ LOGGING = {
             'level': 'ERROR',
             'propagate': False,
         },
+        'farmcloud.metrics': {
+            'handlers': ['console', 'file'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+        'farmcloud.query_shapes': {
+            'handlers': ['query_shapes_file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
 
+# Request metrics (farmcloud.metrics), scraped from /api/ops/metrics/ by admins or with METRICS_TOKEN
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')  # "Authorization: Bearer <token>" for Prometheus
+METRICS_N_PLUS_ONE_THRESHOLD = config('METRICS_N_PLUS_ONE_THRESHOLD', default=5, cast=int)  # repeats of one statement
+METRICS_N_PLUS_ONE_SAMPLE_RATE = config('METRICS_N_PLUS_ONE_SAMPLE_RATE', default=0.1, cast=float)  # requests checked
+
+# Index advisor: fraction of API list requests whose query shape is logged
+QUERY_SHAPE_SAMPLE_RATE = config('QUERY_SHAPE_SAMPLE_RATE', default=0.1, cast=float)
+
+# Test runs record no query shapes (the advisor's log is for real traffic)
+# and publish no catalog snapshots into STATIC_ROOT; tests call the publisher
+if sys.argv[1:2] == ['test']:
+    QUERY_SHAPE_SAMPLE_RATE = 0
+    LOGGING['handlers']['query_shapes_file'] = {'class': 'logging.NullHandler'}
+    CATALOG_SNAPSHOT_ENABLED = False
+
 # Django Axes Configuration (Brute Force Protection)
 AXES_ENABLED = True
 AXES_FAILURE_LIMIT = 5  # Number of failed attempts before lockout
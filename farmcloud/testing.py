@@ -0,0 +1,93 @@
+"""
+Query-count regression helpers for the per-app test suites
+
+Each endpoint and admin changelist is seeded with SMALL rows, requested,
+then seeded up to LARGE rows and requested again: the number of queries
+must not change. Serializing LARGE rows must also stay within a time
+budget. Runs on SQLite:
+
+    DB_ENGINE=sqlite python manage.py test
+"""
+import time
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.models import User
+
+
+# Measure the real query path, not response-cache hits
+@override_settings(RESPONSE_CACHE_ENABLED=False)
+class QueryCountTestCase(TestCase):
+    SMALL = 1
+    LARGE = 500
+    # Upper bound for serializing LARGE rows of one list endpoint
+    SERIALIZATION_BUDGET = 0.5  # seconds
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('qc-admin', 'qc-admin@example.com', 'pw', role='ADMIN')
+
+    def setUp(self):
+        # Throttle history and cached JWT users are kept in the default cache
+        cache.clear()
+        self.seeded = 0
+
+    def seed_to(self, seed, n):
+        """Grow the fixture to n rows; on-commit hooks (cache invalidation) run right away"""
+        with self.captureOnCommitCallbacks(execute=True):
+            seed(self.seeded, n)
+        self.seeded = n
+
+    def get(self, url, user=None):
+        if user is None:
+            return self.client.get(url, secure=True)
+        return self.client.get(url, secure=True, HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+
+    def count_queries(self, url, user=None):
+        # One unmeasured request first: per-process caches fill there
+        self.assertEqual(self.get(url, user).status_code, 200)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(url, user)
+        self.assertEqual(response.status_code, 200)
+        return queries
+
+    def assertConstantQueries(self, url, seed, user=None):
+        """
+        `seed(start, stop)` creates rows start..stop-1; the query count of GET
+        `url` must be the same at SMALL and LARGE rows.
+        """
+        self.seed_to(seed, self.SMALL)
+        small = self.count_queries(url, user)
+        self.seed_to(seed, self.LARGE)
+        large = self.count_queries(url, user)
+        self.assertEqual(
+            len(small), len(large),
+            f'GET {url}: {len(small)} queries at {self.SMALL} rows, {len(large)} at {self.LARGE}:\n'
+            + '\n'.join(query['sql'] for query in large.captured_queries[:30]),
+        )
+
+    def assertSerializesWithinBudget(self, viewset_class, seed, user=None, budget=None):
+        """Serialize every row of a list endpoint's queryset at LARGE rows, queries included"""
+        self.seed_to(seed, self.LARGE)
+        request = Request(APIRequestFactory().get('/'))
+        request.user = user or self.admin
+        view = viewset_class(request=request, format_kwarg=None, action='list', kwargs={})
+        queryset = view.filter_queryset(view.get_queryset())
+
+        started = time.perf_counter()
+        data = view.get_serializer(queryset, many=True).data
+        elapsed = time.perf_counter() - started
+        self.assertGreaterEqual(len(data), self.LARGE)
+        budget = budget or self.SERIALIZATION_BUDGET
+        self.assertLess(elapsed, budget, f'{viewset_class.__name__}: {len(data)} rows took {elapsed:.3f}s')
+
+    def assertConstantChangelistQueries(self, model, seed):
+        self.client.force_login(self.admin)
+        self.assertConstantQueries(reverse(f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist'), seed)
@@ -19,6 +19,8 @@ urlpatterns = [
     path('api/', include('inventory.urls')),
     path('api/', include('customers.urls')),
     path('api/', include('settings.urls')),
+    path('api/', include('ops.urls')),
+    path('api/', include('reports.urls')),
 ]
 
 # Configure admin site
@@ -27,10 +29,12 @@ admin.site.site_title = "FarmCloud Admin"
 admin.site.index_title = "Welcome to FarmCloud Management"
 
 # Debug toolbar
-if settings.DEBUG:
+if settings.DEBUG_TOOLBAR:
     import debug_toolbar
     urlpatterns += [
         path('__debug__/', include(debug_toolbar.urls)),
     ]
+
+if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
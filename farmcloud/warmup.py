@@ -0,0 +1,95 @@
+"""
+Warm a serving process before it accepts traffic
+
+Everything here is otherwise built lazily by the first requests each worker
+handles: compiled URL patterns and reverse lookups, model metadata and
+serializer field maps, translation catalogs, the reference-data caches and
+the refresh-token revocation filter. farmcloud.serve runs `warm()` once in
+the master process, so the forked workers inherit it all.
+"""
+import logging
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.urls import URLResolver, get_resolver
+from django.utils import translation
+
+from farmcloud import dbpool
+
+logger = logging.getLogger(__name__)
+
+
+def _patterns(resolver):
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _patterns(pattern)
+        else:
+            yield pattern
+
+
+def warm_urls():
+    resolver = get_resolver()
+    resolver.reverse_dict, resolver.namespace_dict, resolver.app_dict  # populate
+    patterns = list(_patterns(resolver))
+    for pattern in patterns:
+        pattern.pattern.regex  # compiled on first access
+    return len(patterns)
+
+
+def warm_serializers():
+    for model in apps.get_models():
+        model._meta.get_fields()
+    serializers = {
+        pattern.callback.cls.serializer_class
+        for pattern in _patterns(get_resolver())
+        if getattr(getattr(pattern.callback, 'cls', None), 'serializer_class', None)
+    }
+    for serializer_class in serializers:
+        serializer_class(context={}).fields
+    return len(serializers)
+
+
+def warm_translations():
+    with translation.override(settings.LANGUAGE_CODE):
+        translation.gettext('')
+    return 1
+
+
+def warm_caches():
+    from farmcloud import refcache
+    from users.revocation import store
+
+    names = refcache.warm()
+    store.sync(force=True)
+    return len(names) + 1
+
+
+STEPS = [
+    ('urls', warm_urls),
+    ('serializers', warm_serializers),
+    ('translations', warm_translations),
+    ('caches', warm_caches),
+]
+
+
+def warm():
+    """
+    Run every warm-up step; returns {step: (items warmed, seconds)}. A step
+    that fails is logged and skipped - a cold worker beats no worker.
+    Database connections and pools opened on the way are closed, so none is
+    shared with forked children.
+    """
+    report = {}
+    try:
+        for name, step in STEPS:
+            started = time.perf_counter()
+            try:
+                count = step()
+            except Exception:
+                logger.exception('Warm-up step %r failed', name)
+                count = None
+            report[name] = (count, time.perf_counter() - started)
+    finally:
+        dbpool.close_pools()
+    return report
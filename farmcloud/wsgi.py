@@ -2,9 +2,16 @@
 WSGI config for farmcloud project.
 """
 
+import atexit
 import os
 from django.core.wsgi import get_wsgi_application
 
+from farmcloud import dbpool
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'farmcloud.settings')
 
 application = get_wsgi_application()
+
+# Database pools (farmcloud.dbpool) open with each worker's first query;
+# close them when it exits so the server sees clean disconnects
+atexit.register(dbpool.close_pools)
@@ -1,6 +1,11 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.db.models import Count, Q, Sum
 from django.utils.html import format_html
-from .models import Breed, Animal, Offer
+from . import occupancy
+from .models import (
+    Breed, Animal, AnimalEvent, HerdSnapshot, Location, LocationOccupancy, Offer, StockThreshold, StockAlert,
+)
+from .snapshots import schedule_publish
 
 
 @admin.register(Breed)
@@ -13,15 +18,50 @@ class BreedAdmin(admin.ModelAdmin):
         return f"{obj.typical_weight_min} - {obj.typical_weight_max} kg"
     typical_weight_range.short_description = 'Weight Range'
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(animals_count=Count('animals'))
+    
     def animal_count(self, obj):
-        return obj.animals.count()
+        return obj.animals_count
     animal_count.short_description = 'Animals'
+    animal_count.admin_order_field = 'animals_count'
+
+
+class LocationOccupancyInline(admin.TabularInline):
+    model = LocationOccupancy
+    extra = 0
+    fields = ['status', 'animal_type', 'count']
+    readonly_fields = ['status', 'animal_type', 'count']
+    can_delete = False
+    
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Location)
+class LocationAdmin(admin.ModelAdmin):
+    list_display = ['name', 'capacity', 'occupied', 'is_active']
+    list_filter = ['is_active']
+    search_fields = ['name']
+    readonly_fields = ['created_at', 'updated_at']
+    inlines = [LocationOccupancyInline]
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            occupied_count=Sum('occupancy__count', filter=Q(occupancy__status__in=occupancy.PRESENT_STATUSES))
+        )
+    
+    def occupied(self, obj):
+        return obj.occupied_count or 0
+    occupied.short_description = 'Occupied'
+    occupied.admin_order_field = 'occupied_count'
 
 
 @admin.register(Animal)
 class AnimalAdmin(admin.ModelAdmin):
     list_display = ['tag_number', 'breed', 'animal_type', 'weight', 'age_months', 'gender', 'status_badge', 'price', 'location']
     list_filter = ['status', 'animal_type', 'gender', 'breed', 'location']
+    list_select_related = ['breed', 'location']
     search_fields = ['tag_number', 'breed__name']
     readonly_fields = ['created_at', 'updated_at']
     
@@ -61,11 +101,17 @@ class AnimalAdmin(admin.ModelAdmin):
     actions = ['mark_as_available', 'mark_as_sold']
     
     def mark_as_available(self, request, queryset):
-        queryset.update(status='AVAILABLE')
+        try:
+            occupancy.update_animals(queryset, status='AVAILABLE')
+        except occupancy.CapacityExceeded as exc:
+            self.message_user(request, str(exc), messages.ERROR)
+            return
+        schedule_publish()
     mark_as_available.short_description = "Mark selected as Available"
     
     def mark_as_sold(self, request, queryset):
-        queryset.update(status='SOLD')
+        occupancy.update_animals(queryset, status='SOLD')
+        schedule_publish()
     mark_as_sold.short_description = "Mark selected as Sold"
 
 
@@ -104,3 +150,47 @@ class OfferAdmin(admin.ModelAdmin):
             )
         return f"AED {obj.price}"
     price_display.short_description = 'Price'
+
+
+@admin.register(StockThreshold)
+class StockThresholdAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'offer', 'breed', 'threshold', 'is_active', 'is_below', 'last_triggered_at']
+    list_filter = ['is_active', 'is_below']
+    list_select_related = ['offer', 'breed']
+    readonly_fields = ['is_below', 'last_triggered_at', 'created_at', 'updated_at']
+
+
+@admin.register(StockAlert)
+class StockAlertAdmin(admin.ModelAdmin):
+    list_display = ['threshold', 'level', 'created_at', 'notified_at']
+    list_filter = ['notified_at']
+    list_select_related = ['threshold__offer', 'threshold__breed']
+    readonly_fields = ['threshold', 'level', 'created_at', 'notified_at']
+
+
+@admin.register(AnimalEvent)
+class AnimalEventAdmin(admin.ModelAdmin):
+    """Read-only: the lifecycle log is append-only"""
+    list_display = ['occurred_at', 'animal_id', 'event_type', 'data']
+    list_filter = ['event_type']
+    search_fields = ['=animal__tag_number']
+    date_hierarchy = 'occurred_at'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(HerdSnapshot)
+class HerdSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['taken_at', 'animal_count']
+    exclude = ['state']
+    readonly_fields = ['taken_at', 'animal_count']
+    
+    def has_add_permission(self, request):
+        return False
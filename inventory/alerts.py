@@ -0,0 +1,101 @@
+"""
+Event-driven low-stock alerting
+
+Thresholds are evaluated only for the key that changed (one offer, or one
+breed's available-animal count) when a save touches stock. Crossings are
+recorded as StockAlert rows inside the caller's transaction, together with
+a job (jobs.queue) that sends the email/SMS digest once the digest window
+closes - so the request never waits on notification latency, and a digest
+is never lost with the process that fired it.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db import transaction
+from django.utils import timezone
+from jobs.models import Job, JobStatus
+from jobs.queue import enqueue
+from .models import Animal, AnimalStatus, StockAlert, StockThreshold
+
+logger = logging.getLogger(__name__)
+
+
+def offer_stock_changed(offer):
+    """Re-check the thresholds of one offer after its stock_quantity changed"""
+    _evaluate(StockThreshold.objects.filter(offer_id=offer.pk, is_active=True), offer.stock_quantity)
+
+
+def breed_stock_changed(breed_id):
+    """Re-check the thresholds of one breed after its available animals changed"""
+    thresholds = list(StockThreshold.objects.filter(breed_id=breed_id, is_active=True))
+    if not thresholds:
+        return
+    level = Animal.objects.filter(breed_id=breed_id, status=AnimalStatus.AVAILABLE).count()
+    _evaluate(thresholds, level)
+
+
+def _evaluate(thresholds, level):
+    fired = False
+    for threshold in thresholds:
+        if level <= threshold.threshold and not threshold.is_below:
+            # Conditional update: concurrent saves fire the alert only once
+            crossed = StockThreshold.objects.filter(pk=threshold.pk, is_below=False).update(
+                is_below=True, last_triggered_at=timezone.now()
+            )
+            if crossed:
+                StockAlert.objects.create(threshold=threshold, level=level)
+                fired = True
+        elif level > threshold.threshold and threshold.is_below:
+            # Stock recovered: re-arm for the next crossing
+            StockThreshold.objects.filter(pk=threshold.pk).update(is_below=False)
+
+    if fired:
+        schedule_digest()
+
+
+def send_digest():
+    """Send every pending alert as one digest and mark them notified"""
+    from settings.models import Settings
+
+    with transaction.atomic():
+        pending = list(
+            # Only the alerts: FOR UPDATE can't reach the nullable side of the outer joins (nor should it lock them)
+            StockAlert.objects.select_for_update(skip_locked=True, of=('self',))
+            .filter(notified_at__isnull=True)
+            .select_related('threshold__offer', 'threshold__breed')
+            .order_by('created_at')
+        )
+        if not pending:
+            return
+
+        app_settings = Settings.load()
+        if app_settings.low_stock_alerts:
+            _deliver(app_settings, pending)
+        StockAlert.objects.filter(pk__in=[alert.pk for alert in pending]).update(notified_at=timezone.now())
+
+
+def _deliver(app_settings, alerts):
+    lines = [
+        f"- {alert.threshold.offer or alert.threshold.breed}: {alert.level} left "
+        f"(threshold {alert.threshold.threshold})"
+        for alert in alerts
+    ]
+    subject = f"[{app_settings.business_name}] Low stock: {len(alerts)} item{'s' if len(alerts) != 1 else ''}"
+    body = "The following items fell to or below their stock threshold:\n\n" + "\n".join(lines)
+
+    if app_settings.email_notifications:
+        send_mail(subject, body, settings.DEFAULT_FROM_EMAIL, [app_settings.email])
+    if app_settings.sms_notifications:
+        # No SMS gateway is integrated yet; keep the digest in the log
+        logger.warning('%s\n%s', subject, body)
+
+
+DIGEST_TASK = 'inventory.send_stock_digest'
+
+
+def schedule_digest():
+    """Queue the low-stock digest for when the digest window closes, unless one is already waiting"""
+    if not Job.objects.filter(task=DIGEST_TASK, status=JobStatus.QUEUED).exists():
+        enqueue(DIGEST_TASK, run_at=timezone.now() + timedelta(seconds=settings.LOW_STOCK_DIGEST_WINDOW))
@@ -0,0 +1,175 @@
+"""
+Image pipeline for uploaded photos
+
+Uploads are stored content-addressed (sha256 of the bytes) so identical files
+are written once. Thumbnail and WebP variants are rendered in a process pool
+after the upload's transaction commits, keeping Pillow off the request path.
+"""
+import hashlib
+import logging
+import multiprocessing
+import os
+import posixpath
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Variant label -> longest edge in pixels (None keeps the original size)
+VARIANT_SIZES = {
+    'thumb': 320,
+    'medium': 960,
+    'full': None,
+}
+WEBP_QUALITY = 80
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Filesystem storage that names files by the sha256 of their content"""
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        hexdigest = digest.hexdigest()
+
+        directory, filename = posixpath.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        name = posixpath.join(directory, hexdigest[:2], hexdigest[2:4], f'{hexdigest}{extension}')
+
+        # Identical upload already stored: reuse it instead of writing a copy
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+
+_storage = ContentAddressedStorage()
+
+
+def image_storage():
+    """Storage callable for ImageFields (keeps migrations free of instances)"""
+    return _storage
+
+
+def variant_name(name, label):
+    """Storage name of a rendered variant, next to its source file"""
+    stem = os.path.splitext(name)[0]
+    return f'{stem}.{label}.webp'
+
+
+def is_variant(name):
+    return any(name.endswith(f'.{label}.webp') for label in VARIANT_SIZES)
+
+
+def render_variants(root, name):
+    """
+    Render every variant of one image. Runs inside a pool process, so it only
+    touches the filesystem and Pillow - never the ORM.
+    """
+    from PIL import Image, ImageOps
+
+    variants = {'source': name}
+
+    with Image.open(os.path.join(root, name)) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+        for label, size in VARIANT_SIZES.items():
+            target_name = variant_name(name, label)
+            target_path = os.path.join(root, target_name)
+            variants[label] = target_name
+
+            # Content-addressed sources share their variants too
+            if os.path.exists(target_path):
+                continue
+
+            rendered = image.copy()
+            if size:
+                rendered.thumbnail((size, size), Image.Resampling.LANCZOS)
+            tmp_path = f'{target_path}.{os.getpid()}.tmp'
+            rendered.save(tmp_path, 'WEBP', quality=WEBP_QUALITY, method=4)
+            os.replace(tmp_path, target_path)
+
+    return variants
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Lazily start the worker pool (one per serving process)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.IMAGE_PIPELINE_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _pool
+
+
+def _store_variants(model, pk, field_name, variants_field, name, future):
+    try:
+        variants = future.result()
+    except Exception:
+        logger.exception('Rendering variants for %s failed', name)
+        return
+
+    close_old_connections()
+    try:
+        updates = {variants_field: variants}
+        if any(field.name == 'updated_at' for field in model._meta.concrete_fields):
+            # update() skips auto_now; conditional GETs must see the new variants
+            updates['updated_at'] = timezone.now()
+        # Only apply if the row still points at the same file
+        model.objects.filter(pk=pk, **{field_name: name}).update(**updates)
+    finally:
+        close_old_connections()
+
+
+def schedule_variants(instance, field_name, variants_field):
+    """Queue variant rendering for a saved instance if its image changed"""
+    field_file = getattr(instance, field_name)
+    variants = getattr(instance, variants_field) or {}
+    if not field_file or variants.get('source') == field_file.name:
+        return
+
+    model = type(instance)
+    pk = instance.pk
+    name = field_file.name
+    root = str(field_file.storage.location)
+
+    def submit():
+        future = get_pool().submit(render_variants, root, name)
+        future.add_done_callback(
+            lambda f: _store_variants(model, pk, field_name, variants_field, name, f)
+        )
+
+    transaction.on_commit(submit)
+
+
+def variant_urls(field_file, variants, request=None):
+    """Absolute URLs of the rendered variants, or {} while still pending"""
+    if not field_file or not variants or variants.get('source') != field_file.name:
+        return {}
+
+    urls = {}
+    for label in VARIANT_SIZES:
+        if label in variants:
+            url = field_file.storage.url(variants[label])
+            urls[label] = request.build_absolute_uri(url) if request else url
+    return urls
@@ -0,0 +1,190 @@
+"""
+Append-only animal lifecycle log and point-in-time herd reconstruction
+
+Every acquisition, move, weighing, health note, status change (reservation,
+sale, ...), tag/type/breed correction and removal is appended to
+AnimalEvent, so the events change every field of STATE_FIELDS. Bulk paths write their
+events with one INSERT per EVENT_BATCH_SIZE rows.
+
+HerdSnapshot rows hold the full herd state at a moment in time (taken
+periodically by `manage.py snapshot_herd`). "What did the herd look like on
+date X" loads the nearest snapshot at or before X and replays only the
+events between the two, using the (occurred_at) index - the cost depends on
+the snapshot interval, not on years of history.
+"""
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+from .models import Animal, AnimalEvent, AnimalEventType, HerdSnapshot
+
+EVENT_BATCH_SIZE = 1000
+
+# Snapshots are cut this far in the past so that no transaction still in
+# flight can commit an event older than the snapshot
+SNAPSHOT_SETTLE = timedelta(minutes=5)
+
+STATE_FIELDS = ['tag_number', 'animal_type', 'breed_id', 'status', 'location_id', 'weight']
+
+# Corrected in place; one RELABELED event carries whichever of them changed
+LABEL_FIELDS = ['tag_number', 'animal_type', 'breed_id']
+
+
+def record(events):
+    if events:
+        AnimalEvent.objects.bulk_create(events, batch_size=EVENT_BATCH_SIZE)
+
+
+def _weight(value):
+    return None if value is None else f'{Decimal(str(value)):.2f}'
+
+
+def animal_state(animal):
+    """Snapshot/event representation of one animal"""
+    return {
+        'tag_number': animal.tag_number,
+        'animal_type': animal.animal_type,
+        'breed_id': animal.breed_id,
+        'status': animal.status,
+        'location_id': animal.location_id,
+        'weight': _weight(animal.weight),
+    }
+
+
+def animal_saved(animal, created):
+    """Append the events implied by one save (compares against what was loaded)"""
+    now = timezone.now()
+    if created:
+        record([AnimalEvent(animal_id=animal.pk, event_type=AnimalEventType.ACQUIRED, occurred_at=now,
+                            data={**animal_state(animal), 'date_acquired': str(animal.date_acquired)})])
+        return
+
+    events = []
+    previous_status = getattr(animal, '_loaded_status', None)
+    if previous_status != animal.status:
+        events.append(AnimalEvent(animal_id=animal.pk, event_type=AnimalEventType.STATUS_CHANGED, occurred_at=now,
+                                  data={'status': animal.status, 'from': previous_status}))
+    previous_location = getattr(animal, '_loaded_location_id', None)
+    if previous_location != animal.location_id:
+        events.append(AnimalEvent(animal_id=animal.pk, event_type=AnimalEventType.MOVED, occurred_at=now,
+                                  data={'location_id': animal.location_id, 'from': previous_location}))
+    if _weight(getattr(animal, '_loaded_weight', None)) != _weight(animal.weight):
+        events.append(AnimalEvent(animal_id=animal.pk, event_type=AnimalEventType.WEIGHED, occurred_at=now,
+                                  data={'weight': _weight(animal.weight)}))
+    labels = {field: getattr(animal, field) for field in LABEL_FIELDS
+              if getattr(animal, f'_loaded_{field}', None) != getattr(animal, field)}
+    if labels:
+        events.append(AnimalEvent(animal_id=animal.pk, event_type=AnimalEventType.RELABELED, occurred_at=now,
+                                  data={**labels, 'from': {field: getattr(animal, f'_loaded_{field}', None)
+                                                           for field in labels}}))
+    if getattr(animal, '_loaded_health_notes', None) != animal.health_notes and animal.health_notes:
+        events.append(AnimalEvent(animal_id=animal.pk, event_type=AnimalEventType.HEALTH_NOTE, occurred_at=now,
+                                  data={'notes': animal.health_notes}))
+    record(events)
+
+
+def animal_deleted(animal):
+    record([AnimalEvent(animal_id=animal.pk, event_type=AnimalEventType.REMOVED, data={})])
+
+
+def animals_updated(rows, changes, occurred_at):
+    """
+    Events for a bulk update(): `rows` are (pk, location_id, status) as they
+    were before the update, `changes` the values written.
+    """
+    events = []
+    for pk, location_id, status in rows:
+        if 'status' in changes and changes['status'] != status:
+            events.append(AnimalEvent(animal_id=pk, event_type=AnimalEventType.STATUS_CHANGED, occurred_at=occurred_at,
+                                      data={'status': changes['status'], 'from': status}))
+        if 'location_id' in changes and changes['location_id'] != location_id:
+            events.append(AnimalEvent(animal_id=pk, event_type=AnimalEventType.MOVED, occurred_at=occurred_at,
+                                      data={'location_id': changes['location_id'], 'from': location_id}))
+    record(events)
+
+
+def _apply(state, animal_id, event_type, data):
+    key = str(animal_id)
+    if event_type == AnimalEventType.ACQUIRED:
+        state[key] = {field: data.get(field) for field in STATE_FIELDS}
+    elif event_type == AnimalEventType.REMOVED:
+        state.pop(key, None)
+    elif key in state:
+        if event_type == AnimalEventType.STATUS_CHANGED:
+            state[key]['status'] = data['status']
+        elif event_type == AnimalEventType.MOVED:
+            state[key]['location_id'] = data['location_id']
+        elif event_type == AnimalEventType.WEIGHED:
+            state[key]['weight'] = data['weight']
+        elif event_type == AnimalEventType.RELABELED:
+            state[key].update((field, data[field]) for field in LABEL_FIELDS if field in data)
+
+
+def herd_at(when):
+    """
+    Herd state at `when` as (state, snapshot, events_replayed), where state
+    is {animal_id (str): {tag_number, animal_type, breed_id, status,
+    location_id, weight}}. Animals acquired before the first snapshot are
+    unknown before it.
+    """
+    snapshot = HerdSnapshot.objects.filter(taken_at__lte=when).order_by('-taken_at').first()
+    state = {key: dict(value) for key, value in snapshot.state.items()} if snapshot else {}
+
+    events = AnimalEvent.objects.filter(occurred_at__lte=when)
+    if snapshot:
+        events = events.filter(occurred_at__gt=snapshot.taken_at)
+    replayed = 0
+    for animal_id, event_type, data in (
+        events.order_by('occurred_at', 'id').values_list('animal_id', 'event_type', 'data').iterator(chunk_size=2000)
+    ):
+        _apply(state, animal_id, event_type, data)
+        replayed += 1
+    return state, snapshot, replayed
+
+
+@transaction.atomic
+def take_snapshot():
+    """
+    Record a new HerdSnapshot. The first one is read from the animals table;
+    later ones roll the previous snapshot forward through the event log, so
+    they stay consistent with the events they summarise.
+    """
+    if not HerdSnapshot.objects.exists():
+        taken_at = timezone.now()
+        state = {
+            str(row['pk']): {field: row[field] for field in STATE_FIELDS}
+            for row in Animal.objects.order_by().values('pk', *STATE_FIELDS).iterator(chunk_size=2000)
+        }
+        for value in state.values():
+            value['weight'] = _weight(value['weight'])
+    else:
+        taken_at = timezone.now() - SNAPSHOT_SETTLE
+        latest = HerdSnapshot.objects.order_by('-taken_at').first()
+        if latest.taken_at >= taken_at:
+            return latest
+        state, _, _ = herd_at(taken_at)
+    return HerdSnapshot.objects.create(taken_at=taken_at, animal_count=len(state), state=state)
+
+
+@transaction.atomic
+def start_history():
+    """
+    Begin the log of animals loaded in bulk, which skipped the events
+    (generate_dataset): an ACQUIRED event per animal on its date_acquired
+    with its current state, then a baseline snapshot. History before the
+    load is approximated by that state.
+    """
+    rows = Animal.objects.order_by('pk').values('pk', 'date_acquired', *STATE_FIELDS)
+    events = []
+    for row in rows.iterator(chunk_size=2000):
+        occurred_at = timezone.make_aware(datetime.combine(row['date_acquired'], time()))
+        state = {field: row[field] for field in STATE_FIELDS}
+        state['weight'] = _weight(state['weight'])
+        events.append(AnimalEvent(animal_id=row['pk'], event_type=AnimalEventType.ACQUIRED, occurred_at=occurred_at,
+                                  data={**state, 'date_acquired': str(row['date_acquired'])}))
+        if len(events) >= EVENT_BATCH_SIZE:
+            record(events)
+            events = []
+    record(events)
+    return take_snapshot()
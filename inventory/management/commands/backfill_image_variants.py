@@ -0,0 +1,76 @@
+"""
+Render thumbnail/WebP variants for photos uploaded before the image pipeline
+Run: docker-compose exec web python manage.py backfill_image_variants
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.images import is_variant, render_variants
+from inventory.models import Animal, Offer
+from orders.models import Delivery
+
+# Media directory -> (model, image field, variants field)
+TARGETS = {
+    'animals': (Animal, 'image', 'image_variants'),
+    'offers': (Offer, 'image', 'image_variants'),
+    'signatures': (Delivery, 'customer_signature', 'signature_variants'),
+}
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp', '.tif', '.tiff'}
+
+
+class Command(BaseCommand):
+    help = 'Render image variants for existing media files in parallel'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'directories', nargs='*', default=['animals', 'offers'],
+            help=f'Media subdirectories to process: {", ".join(sorted(TARGETS))} (default: animals offers)',
+        )
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='Worker processes')
+
+    def handle(self, *args, **options):
+        unknown = set(options['directories']) - set(TARGETS)
+        if unknown:
+            raise CommandError(f'Unknown media directories: {", ".join(sorted(unknown))}')
+
+        root = str(settings.MEDIA_ROOT)
+        jobs = []
+        for directory in options['directories']:
+            for name in self.walk(root, directory):
+                jobs.append((directory, name))
+
+        if not jobs:
+            self.stdout.write('No images found.')
+            return
+
+        self.stdout.write(f'Rendering variants for {len(jobs)} images with {options["workers"]} workers...')
+        rendered = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            futures = {pool.submit(render_variants, root, name): (directory, name) for directory, name in jobs}
+            for future in as_completed(futures):
+                directory, name = futures[future]
+                try:
+                    variants = future.result()
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f'✗ {name}: {exc}')
+                    continue
+
+                model, field_name, variants_field = TARGETS[directory]
+                model.objects.filter(**{field_name: name}).update(**{variants_field: variants})
+                rendered += 1
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Rendered {rendered} images ({failed} failed)'))
+
+    def walk(self, root, directory):
+        """Storage names of every source image below MEDIA_ROOT/<directory>"""
+        for dirpath, _, filenames in os.walk(os.path.join(root, directory)):
+            for filename in filenames:
+                if os.path.splitext(filename)[1].lower() not in IMAGE_EXTENSIONS:
+                    continue
+                name = os.path.relpath(os.path.join(dirpath, filename), root).replace(os.sep, '/')
+                if not is_variant(name):
+                    yield name
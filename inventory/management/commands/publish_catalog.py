@@ -0,0 +1,17 @@
+"""
+Regenerate the static storefront catalog snapshots
+Run: docker-compose exec web python manage.py publish_catalog
+"""
+from django.core.management.base import BaseCommand
+
+from inventory.snapshots import publish_catalog, snapshot_dir
+
+
+class Command(BaseCommand):
+    help = 'Write versioned, precompressed JSON snapshots of the storefront catalog'
+
+    def handle(self, *args, **options):
+        manifest = publish_catalog()
+        for document, info in manifest['documents'].items():
+            self.stdout.write(f'  {document}: {info["count"]} rows -> {info["url"]}')
+        self.stdout.write(self.style.SUCCESS(f'✓ Catalog published to {snapshot_dir()}'))
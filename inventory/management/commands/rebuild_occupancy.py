@@ -0,0 +1,16 @@
+"""
+Recount location occupancy counters from the animals table
+Run: docker-compose exec web python manage.py rebuild_occupancy
+"""
+from django.core.management.base import BaseCommand
+
+from inventory import occupancy
+from inventory.models import LocationOccupancy
+
+
+class Command(BaseCommand):
+    help = 'Rebuild LocationOccupancy counters (repair after raw SQL edits)'
+
+    def handle(self, *args, **options):
+        occupancy.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt {LocationOccupancy.objects.count()} occupancy counters'))
@@ -0,0 +1,17 @@
+"""
+Record a herd snapshot for point-in-time queries (schedule nightly)
+Run: docker-compose exec web python manage.py snapshot_herd
+"""
+from django.core.management.base import BaseCommand
+
+from inventory import lifecycle
+
+
+class Command(BaseCommand):
+    help = 'Roll the latest HerdSnapshot forward through the lifecycle log'
+
+    def handle(self, *args, **options):
+        snapshot = lifecycle.take_snapshot()
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Snapshot at {snapshot.taken_at:%Y-%m-%d %H:%M} ({snapshot.animal_count} animals)'
+        ))
@@ -0,0 +1,68 @@
+# Generated by Django 5.1.5 on 2026-10-19 14:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_animal_image_variants_offer_image_variants_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.IntegerField(help_text='Stock level when the threshold was crossed')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('notified_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockThreshold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('threshold', models.PositiveIntegerField(help_text='Alert when stock falls to or below this level')),
+                ('is_active', models.BooleanField(default=True)),
+                ('is_below', models.BooleanField(default=False, editable=False)),
+                ('last_triggered_at', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['threshold'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='animal',
+            index=models.Index(fields=['breed', 'status'], name='inventory_a_breed_i_f9a103_idx'),
+        ),
+        migrations.AddField(
+            model_name='stockthreshold',
+            name='breed',
+            field=models.ForeignKey(blank=True, help_text='Counts available animals of this breed', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stock_thresholds', to='inventory.breed'),
+        ),
+        migrations.AddField(
+            model_name='stockthreshold',
+            name='offer',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stock_thresholds', to='inventory.offer'),
+        ),
+        migrations.AddField(
+            model_name='stockalert',
+            name='threshold',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alerts', to='inventory.stockthreshold'),
+        ),
+        migrations.AddConstraint(
+            model_name='stockthreshold',
+            constraint=models.CheckConstraint(condition=models.Q(models.Q(('breed__isnull', True), ('offer__isnull', False)), models.Q(('breed__isnull', False), ('offer__isnull', True)), _connector='OR'), name='stock_threshold_single_target'),
+        ),
+        migrations.AddIndex(
+            model_name='stockalert',
+            index=models.Index(fields=['notified_at', 'created_at'], name='inventory_s_notifie_50429d_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.5 on 2026-10-19 15:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_stockalert_stockthreshold_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Location',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('capacity', models.PositiveIntegerField(blank=True, help_text='Maximum animals on site (blank = unlimited)', null=True)),
+                ('description', models.TextField(blank=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LocationOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('AVAILABLE', 'Available'), ('RESERVED', 'Reserved'), ('SOLD', 'Sold'), ('PROCESSING', 'Processing')], max_length=20)),
+                ('animal_type', models.CharField(choices=[('GOAT', 'Goat'), ('SHEEP', 'Sheep')], max_length=10)),
+                ('count', models.IntegerField(default=0)),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupancy', to='inventory.location')),
+            ],
+            options={
+                'verbose_name_plural': 'Location occupancy',
+                'constraints': [models.UniqueConstraint(fields=('location', 'status', 'animal_type'), name='location_occupancy_key')],
+            },
+        ),
+        migrations.AddField(
+            model_name='animal',
+            name='location_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='inventory.location'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.5 on 2026-10-19 15:05
+
+from django.db import migrations, models
+
+
+def forwards(apps, schema_editor):
+    """Turn free-text locations into Location rows and seed the counters"""
+    Animal = apps.get_model('inventory', 'Animal')
+    Location = apps.get_model('inventory', 'Location')
+    LocationOccupancy = apps.get_model('inventory', 'LocationOccupancy')
+    db_alias = schema_editor.connection.alias
+
+    main_farm = Location.objects.using(db_alias).get_or_create(name='Main Farm')[0]
+    raw_names = Animal.objects.using(db_alias).exclude(location__isnull=True).values_list('location', flat=True)
+    for raw_name in sorted(set(raw_names)):
+        # ' Pen 1' and 'Pen 1' become one location; animals are matched on what they actually hold
+        name = raw_name.strip() or 'Main Farm'
+        location = Location.objects.using(db_alias).get_or_create(name=name)[0]
+        Animal.objects.using(db_alias).filter(location=raw_name).update(location_ref=location)
+    Animal.objects.using(db_alias).filter(location_ref__isnull=True).update(location_ref=main_farm)
+
+    LocationOccupancy.objects.using(db_alias).bulk_create([
+        LocationOccupancy(
+            location_id=row['location_ref'], status=row['status'],
+            animal_type=row['animal_type'], count=row['n'],
+        )
+        for row in Animal.objects.using(db_alias).order_by()
+        .values('location_ref', 'status', 'animal_type').annotate(n=models.Count('pk'))
+    ])
+
+
+def backwards(apps, schema_editor):
+    Animal = apps.get_model('inventory', 'Animal')
+    db_alias = schema_editor.connection.alias
+    for animal in Animal.objects.using(db_alias).select_related('location_ref').iterator():
+        Animal.objects.using(db_alias).filter(pk=animal.pk).update(location=animal.location_ref.name)
+
+
+class Migration(migrations.Migration):
+    # Data only: PostgreSQL can't alter inventory_animal in the transaction that updated its rows
+
+    dependencies = [
+        ('inventory', '0004_location_animal_location_ref'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.5 on 2026-10-19 15:05
+
+import django.db.models.deletion
+import inventory.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_animal_location_data'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='animal',
+            name='location',
+        ),
+        migrations.RenameField(
+            model_name='animal',
+            old_name='location_ref',
+            new_name='location',
+        ),
+        migrations.AlterField(
+            model_name='animal',
+            name='location',
+            field=models.ForeignKey(default=inventory.models.default_location, on_delete=django.db.models.deletion.PROTECT, related_name='animals', to='inventory.location'),
+        ),
+    ]
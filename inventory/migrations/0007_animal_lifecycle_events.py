@@ -0,0 +1,60 @@
+# Generated by Django 5.1.5 on 2026-10-19 14:23
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def baseline_snapshot(apps, schema_editor):
+    """Existing animals have no ACQUIRED event: record them in a first snapshot"""
+    Animal = apps.get_model('inventory', 'Animal')
+    HerdSnapshot = apps.get_model('inventory', 'HerdSnapshot')
+    db_alias = schema_editor.connection.alias
+
+    state = {}
+    for row in Animal.objects.using(db_alias).order_by().values(
+        'pk', 'tag_number', 'animal_type', 'breed_id', 'status', 'location_id', 'weight'
+    ).iterator(chunk_size=2000):
+        animal_id = str(row.pop('pk'))
+        row['weight'] = None if row['weight'] is None else f"{row['weight']:.2f}"
+        state[animal_id] = row
+    if state:
+        HerdSnapshot.objects.using(db_alias).create(taken_at=timezone.now(), animal_count=len(state), state=state)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_animal_location_fk'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HerdSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('taken_at', models.DateTimeField(unique=True)),
+                ('animal_count', models.PositiveIntegerField(default=0)),
+                ('state', models.JSONField(default=dict, help_text='{animal_id: {tag_number, status, location_id, ...}}')),
+            ],
+            options={
+                'ordering': ['-taken_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AnimalEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('ACQUIRED', 'Acquired'), ('MOVED', 'Moved'), ('WEIGHED', 'Weighed'), ('HEALTH_NOTE', 'Health Note'), ('STATUS_CHANGED', 'Status Changed'), ('REMOVED', 'Removed')], max_length=20)),
+                ('occurred_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('animal', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='events', to='inventory.animal')),
+            ],
+            options={
+                'ordering': ['occurred_at', 'id'],
+                'indexes': [models.Index(fields=['animal', 'occurred_at'], name='inventory_a_animal__b9b7dc_idx'), models.Index(fields=['occurred_at'], name='inventory_a_occurre_86c9b8_idx')],
+            },
+        ),
+        migrations.RunPython(baseline_snapshot, migrations.RunPython.noop),
+    ]
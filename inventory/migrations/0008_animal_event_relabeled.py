@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-19 15:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_animal_lifecycle_events'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='animalevent',
+            name='event_type',
+            field=models.CharField(choices=[('ACQUIRED', 'Acquired'), ('MOVED', 'Moved'), ('WEIGHED', 'Weighed'), ('HEALTH_NOTE', 'Health Note'), ('STATUS_CHANGED', 'Status Changed'), ('RELABELED', 'Tag, Type or Breed Changed'), ('REMOVED', 'Removed')], max_length=20),
+        ),
+    ]
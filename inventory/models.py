@@ -1,5 +1,9 @@
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
 from django.core.validators import MinValueValidator
+from django.utils import timezone
+from farmcloud.respcache import VersionedQuerySet
+from .images import image_storage
 
 
 class AnimalType(models.TextChoices):
@@ -22,6 +26,8 @@ class Breed(models.Model):
     typical_weight_min = models.DecimalField(max_digits=5, decimal_places=2, help_text="Minimum weight in kg")
     typical_weight_max = models.DecimalField(max_digits=5, decimal_places=2, help_text="Maximum weight in kg")
     
+    objects = VersionedQuerySet.as_manager()
+    
     class Meta:
         ordering = ['animal_type', 'name']
         
@@ -29,6 +35,33 @@ class Breed(models.Model):
         return f"{self.name} ({self.get_animal_type_display()})"
 
 
+class Location(models.Model):
+    """Farm site or pen that animals are kept in"""
+    name = models.CharField(max_length=100, unique=True)
+    capacity = models.PositiveIntegerField(null=True, blank=True, help_text="Maximum animals on site (blank = unlimited)")
+    description = models.TextField(blank=True)
+    is_active = models.BooleanField(default=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    objects = VersionedQuerySet.as_manager()
+    
+    class Meta:
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+
+
+DEFAULT_LOCATION = 'Main Farm'
+
+
+def default_location():
+    """Primary key of the default location, if it exists yet (Animal.save() creates it)"""
+    return Location.objects.filter(name=DEFAULT_LOCATION).values_list('pk', flat=True).first()
+
+
 class Animal(models.Model):
     """Individual animal in inventory"""
     tag_number = models.CharField(max_length=50, unique=True, help_text="Unique identification tag")
@@ -47,23 +80,132 @@ class Animal(models.Model):
     
     # Metadata
     date_acquired = models.DateField()
-    location = models.CharField(max_length=100, default='Main Farm')
+    location = models.ForeignKey(Location, on_delete=models.PROTECT, default=default_location, related_name='animals')
     health_notes = models.TextField(blank=True)
-    image = models.ImageField(upload_to='animals/', blank=True, null=True)
+    image = models.ImageField(upload_to='animals/', storage=image_storage, blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False, help_text="Rendered thumbnail/WebP variants")
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = VersionedQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['status', 'animal_type']),
             models.Index(fields=['tag_number']),
+            models.Index(fields=['breed', 'status']),
         ]
     
     def __str__(self):
         return f"{self.tag_number} - {self.breed.name} ({self.weight}kg)"
+    
+    def clean(self):
+        from .occupancy import CapacityExceeded, check_room
+        try:
+            check_room(self)
+        except CapacityExceeded as exc:
+            raise ValidationError({'location': str(exc)})
+    
+    def save(self, *args, **kwargs):
+        if self.location_id is None:
+            self.location = Location.objects.get_or_create(name=DEFAULT_LOCATION)[0]
+        # The capacity check (pre_save) and the occupancy counters (post_save) commit together
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what was loaded so saves can tell what changed
+        instance._loaded_status = instance.__dict__.get('status')
+        instance._loaded_tag_number = instance.__dict__.get('tag_number')
+        instance._loaded_breed_id = instance.__dict__.get('breed_id')
+        instance._loaded_location_id = instance.__dict__.get('location_id')
+        instance._loaded_animal_type = instance.__dict__.get('animal_type')
+        instance._loaded_weight = instance.__dict__.get('weight')
+        instance._loaded_health_notes = instance.__dict__.get('health_notes')
+        return instance
+
+
+class AnimalEventType(models.TextChoices):
+    ACQUIRED = 'ACQUIRED', 'Acquired'
+    MOVED = 'MOVED', 'Moved'
+    WEIGHED = 'WEIGHED', 'Weighed'
+    HEALTH_NOTE = 'HEALTH_NOTE', 'Health Note'
+    STATUS_CHANGED = 'STATUS_CHANGED', 'Status Changed'
+    RELABELED = 'RELABELED', 'Tag, Type or Breed Changed'
+    REMOVED = 'REMOVED', 'Removed'
+
+
+class AnimalEvent(models.Model):
+    """
+    Append-only lifecycle history of an animal.
+    Written by inventory.lifecycle; rows are never updated or deleted, and
+    outlive the animal itself (no FK constraint).
+    """
+    animal = models.ForeignKey(
+        Animal, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='events'
+    )
+    event_type = models.CharField(max_length=20, choices=AnimalEventType.choices)
+    occurred_at = models.DateTimeField(default=timezone.now)
+    data = models.JSONField(default=dict, blank=True)
+    
+    class Meta:
+        ordering = ['occurred_at', 'id']
+        indexes = [
+            models.Index(fields=['animal', 'occurred_at']),
+            models.Index(fields=['occurred_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.animal_id} {self.event_type} @ {self.occurred_at:%Y-%m-%d %H:%M}"
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Animal events are append-only.")
+        super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        raise ValueError("Animal events are append-only.")
+
+
+class HerdSnapshot(models.Model):
+    """
+    Full herd state at a point in time; point-in-time queries replay events
+    forward from the nearest earlier snapshot.
+    """
+    taken_at = models.DateTimeField(unique=True)
+    animal_count = models.PositiveIntegerField(default=0)
+    state = models.JSONField(default=dict, help_text="{animal_id: {tag_number, status, location_id, ...}}")
+    
+    class Meta:
+        ordering = ['-taken_at']
+    
+    def __str__(self):
+        return f"Herd @ {self.taken_at:%Y-%m-%d %H:%M} ({self.animal_count} animals)"
+
+
+class LocationOccupancy(models.Model):
+    """
+    Live animal count per (location, status, animal type).
+    Maintained incrementally by inventory.occupancy - never recount on read.
+    """
+    location = models.ForeignKey(Location, on_delete=models.CASCADE, related_name='occupancy')
+    status = models.CharField(max_length=20, choices=AnimalStatus.choices)
+    animal_type = models.CharField(max_length=10, choices=AnimalType.choices)
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        verbose_name_plural = 'Location occupancy'
+        constraints = [
+            models.UniqueConstraint(fields=['location', 'status', 'animal_type'], name='location_occupancy_key'),
+        ]
+    
+    def __str__(self):
+        return f"{self.location}: {self.count} {self.animal_type} {self.status}"
 
 
 class Offer(models.Model):
@@ -95,19 +237,29 @@ class Offer(models.Model):
     stock_quantity = models.PositiveIntegerField(default=0, help_text="Available quantity")
     
     # Media
-    image = models.ImageField(upload_to='offers/', blank=True, null=True)
+    image = models.ImageField(upload_to='offers/', storage=image_storage, blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False, help_text="Rendered thumbnail/WebP variants")
     
     # Metadata
     display_order = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = VersionedQuerySet.as_manager()
+    
     class Meta:
         ordering = ['display_order', '-created_at']
     
     def __str__(self):
         return self.name
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what was loaded so saves can tell what changed
+        instance._loaded_stock_quantity = instance.__dict__.get('stock_quantity')
+        return instance
+    
     @property
     def is_on_sale(self):
         return self.original_price and self.original_price > self.price
@@ -117,3 +269,51 @@ class Offer(models.Model):
         if self.is_on_sale:
             return round(((self.original_price - self.price) / self.original_price) * 100)
         return 0
+
+
+class StockThreshold(models.Model):
+    """Low-stock alert level for a single offer or breed"""
+    offer = models.ForeignKey(Offer, on_delete=models.CASCADE, null=True, blank=True, related_name='stock_thresholds')
+    breed = models.ForeignKey(Breed, on_delete=models.CASCADE, null=True, blank=True, related_name='stock_thresholds',
+                              help_text="Counts available animals of this breed")
+    threshold = models.PositiveIntegerField(help_text="Alert when stock falls to or below this level")
+    is_active = models.BooleanField(default=True)
+    
+    # Set when the alert fires, cleared once stock recovers above the threshold
+    is_below = models.BooleanField(default=False, editable=False)
+    last_triggered_at = models.DateTimeField(null=True, blank=True, editable=False)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['threshold']
+        constraints = [
+            models.CheckConstraint(
+                condition=(
+                    models.Q(offer__isnull=False, breed__isnull=True) |
+                    models.Q(offer__isnull=True, breed__isnull=False)
+                ),
+                name='stock_threshold_single_target',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.offer or self.breed} <= {self.threshold}"
+
+
+class StockAlert(models.Model):
+    """A threshold crossing, pending until it goes out in a digest"""
+    threshold = models.ForeignKey(StockThreshold, on_delete=models.CASCADE, related_name='alerts')
+    level = models.IntegerField(help_text="Stock level when the threshold was crossed")
+    created_at = models.DateTimeField(auto_now_add=True)
+    notified_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['notified_at', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.threshold} (level {self.level})"
@@ -0,0 +1,166 @@
+"""
+Incremental location occupancy counters
+
+Every change to an animal's (location, status, animal_type) key moves one
+unit between LocationOccupancy rows; bulk operations read the affected
+animals once and group them, so moving a whole herd costs one UPDATE on the
+animals plus one per distinct key, and its lifecycle events go out as
+batched inserts.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+from . import alerts, lifecycle
+from .models import Animal, AnimalStatus, Location, LocationOccupancy
+
+# Statuses that still take up room at a location
+PRESENT_STATUSES = [AnimalStatus.AVAILABLE, AnimalStatus.RESERVED, AnimalStatus.PROCESSING]
+
+
+class CapacityExceeded(Exception):
+    pass
+
+
+def apply_deltas(deltas):
+    """Add {(location_id, status, animal_type): delta} onto the counters"""
+    deltas = {key: delta for key, delta in deltas.items() if delta and key[0] is not None}
+    if not deltas:
+        return
+    LocationOccupancy.objects.bulk_create(
+        [LocationOccupancy(location_id=loc, status=status, animal_type=kind, count=0)
+         for loc, status, kind in deltas],
+        ignore_conflicts=True,
+    )
+    for (location_id, status, animal_type), delta in deltas.items():
+        LocationOccupancy.objects.filter(
+            location_id=location_id, status=status, animal_type=animal_type
+        ).update(count=F('count') + delta)
+
+
+def animal_saved(animal, created):
+    """Move one unit from the animal's previous key to its current one"""
+    new_key = (animal.location_id, animal.status, animal.animal_type)
+    deltas = Counter({new_key: 1})
+    if not created:
+        old_key = (
+            getattr(animal, '_loaded_location_id', None),
+            getattr(animal, '_loaded_status', None),
+            getattr(animal, '_loaded_animal_type', None),
+        )
+        if old_key == new_key:
+            return
+        deltas[old_key] -= 1
+    apply_deltas(deltas)
+
+
+def animal_deleted(animal):
+    apply_deltas({(animal.location_id, animal.status, animal.animal_type): -1})
+
+
+def check_room(animal):
+    """
+    Raise CapacityExceeded if saving `animal` would put one animal more at a
+    full location. Locks the location inside a transaction, so concurrent
+    saves queue up behind the check.
+    """
+    if animal.location_id is None or animal.status not in PRESENT_STATUSES:
+        return
+    if (getattr(animal, '_loaded_location_id', None) == animal.location_id
+            and getattr(animal, '_loaded_status', None) in PRESENT_STATUSES):
+        return  # already counted there
+    locations = Location.objects.filter(pk=animal.location_id)
+    if transaction.get_connection().in_atomic_block:
+        locations = locations.select_for_update()
+    location = locations.first()
+    if location is not None and location.capacity is not None and occupied(location.pk) >= location.capacity:
+        raise CapacityExceeded(f"{location.name} has room for {location.capacity} animals and is full.")
+
+
+def occupied(location_id):
+    """Animals currently present at a location, from the counters"""
+    return LocationOccupancy.objects.filter(
+        location_id=location_id, status__in=PRESENT_STATUSES
+    ).aggregate(total=Sum('count'))['total'] or 0
+
+
+@transaction.atomic
+def update_animals(queryset, **changes):
+    """
+    Bulk-update `location` and/or `status` on a queryset of animals with a
+    single UPDATE, keeping the occupancy counters, lifecycle log and low-stock
+    alerts consistent. Returns the number of animals updated.
+
+    Raises CapacityExceeded, before writing anything, if the animals arriving
+    at any location (moved there or returned to a present status) don't fit;
+    the affected locations stay locked until the transaction ends.
+    """
+    if 'location' in changes:
+        location = changes.pop('location')
+        changes['location_id'] = location.pk if isinstance(location, Location) else location
+
+    rows = list(queryset.order_by().values_list('pk', 'location_id', 'status', 'animal_type', 'breed_id'))
+    if not rows:
+        return 0
+    groups = Counter((location_id, status, animal_type) for _, location_id, status, animal_type, _ in rows)
+
+    # Animals arriving at a location: moved there, or back to a present
+    # status where they stand (e.g. SOLD -> AVAILABLE)
+    arriving = Counter()
+    for (location_id, status, _), n in groups.items():
+        new_location = changes.get('location_id', location_id)
+        if new_location is None or changes.get('status', status) not in PRESENT_STATUSES:
+            continue
+        if new_location == location_id and status in PRESENT_STATUSES:
+            continue  # already counted there
+        arriving[new_location] += n
+    for location in Location.objects.select_for_update().filter(pk__in=arriving).order_by('pk'):
+        if location.capacity is not None and occupied(location.pk) + arriving[location.pk] > location.capacity:
+            raise CapacityExceeded(
+                f"{location.name} has room for {location.capacity} animals; "
+                f"{arriving[location.pk]} more would exceed it."
+            )
+
+    changes.setdefault('updated_at', timezone.now())
+    updated = queryset.order_by().update(**changes)
+
+    deltas = Counter()
+    for old_key, n in groups.items():
+        location_id, status, animal_type = old_key
+        new_key = (
+            changes.get('location_id', location_id),
+            changes.get('status', status),
+            animal_type,
+        )
+        if old_key != new_key:
+            deltas[old_key] -= n
+            deltas[new_key] += n
+    apply_deltas(deltas)
+    lifecycle.animals_updated([row[:3] for row in rows], changes, changes['updated_at'])
+
+    # update() skips the save signals that re-check the breeds' stock thresholds
+    new_status = changes.get('status')
+    if new_status is not None:
+        for breed_id in {breed_id for _, _, status, _, breed_id in rows
+                         if status != new_status and AnimalStatus.AVAILABLE in (status, new_status)}:
+            alerts.breed_stock_changed(breed_id)
+    return updated
+
+
+def move_herd(queryset, location):
+    """Relocate every animal in `queryset` to `location` in one update"""
+    return update_animals(queryset, location=location)
+
+
+@transaction.atomic
+def rebuild():
+    """Recount every counter from the animals table (repair only)"""
+    LocationOccupancy.objects.all().delete()
+    LocationOccupancy.objects.bulk_create([
+        LocationOccupancy(
+            location_id=row['location_id'], status=row['status'],
+            animal_type=row['animal_type'], count=row['n'],
+        )
+        for row in Animal.objects.order_by().values('location_id', 'status', 'animal_type').annotate(n=Count('pk'))
+    ])
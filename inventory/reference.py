@@ -0,0 +1,12 @@
+"""
+Cached reference data: breeds and offers change rarely but are read on hot
+paths (serializer rows, order pricing). See farmcloud.refcache.
+"""
+from farmcloud.refcache import ReferenceCache
+from .models import Breed, Offer
+
+# {pk: Breed}
+BREEDS = ReferenceCache('breeds', lambda: {breed.pk: breed for breed in Breed.objects.all()})
+
+# {pk: Offer}
+OFFERS = ReferenceCache('offers', lambda: {offer.pk: offer for offer in Offer.objects.all()})
@@ -1,5 +1,12 @@
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from rest_framework import serializers
-from .models import Breed, Animal, Offer
+from .images import variant_urls
+from .models import Breed, Animal, AnimalEvent, AnimalStatus, Location, Offer, StockThreshold
+from .occupancy import PRESENT_STATUSES
+from .reference import BREEDS
 
 
 class BreedSerializer(serializers.ModelSerializer):
@@ -8,20 +15,130 @@ class BreedSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class LocationSerializer(serializers.ModelSerializer):
+    occupied = serializers.SerializerMethodField()
+    occupancy = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Location
+        fields = '__all__'
+        read_only_fields = ['created_at', 'updated_at']
+    
+    def get_occupied(self, obj):
+        return sum(row.count for row in obj.occupancy.all() if row.status in PRESENT_STATUSES)
+    
+    def get_occupancy(self, obj):
+        """{status: {animal_type: count}} from the live counters"""
+        breakdown = {}
+        for row in obj.occupancy.all():
+            if row.count:
+                breakdown.setdefault(row.status, {})[row.animal_type] = row.count
+        return breakdown
+
+
+class HerdMoveSerializer(serializers.Serializer):
+    """Animals to relocate: explicit ids, or everything matching a source filter"""
+    animal_ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    from_location = serializers.PrimaryKeyRelatedField(queryset=Location.objects.all(), required=False)
+    status = serializers.ChoiceField(choices=AnimalStatus.choices, required=False)
+    animal_type = serializers.ChoiceField(choices=Animal._meta.get_field('animal_type').choices, required=False)
+    
+    def validate(self, attrs):
+        if not attrs.get('animal_ids') and not attrs.get('from_location'):
+            raise serializers.ValidationError("Provide animal_ids or from_location.")
+        return attrs
+    
+    def get_queryset(self):
+        data = self.validated_data
+        queryset = Animal.objects.all()
+        if data.get('animal_ids'):
+            queryset = queryset.filter(pk__in=data['animal_ids'])
+        if data.get('from_location'):
+            queryset = queryset.filter(location=data['from_location'])
+        if data.get('status'):
+            queryset = queryset.filter(status=data['status'])
+        if data.get('animal_type'):
+            queryset = queryset.filter(animal_type=data['animal_type'])
+        return queryset
+
+
 class AnimalSerializer(serializers.ModelSerializer):
-    breed_name = serializers.CharField(source='breed.name', read_only=True)
+    breed_name = serializers.SerializerMethodField()
+    location = serializers.SlugRelatedField(slug_field='name', queryset=Location.objects.all(), required=False)
+    image_variants = serializers.SerializerMethodField()
     
     class Meta:
         model = Animal
         fields = '__all__'
         read_only_fields = ['created_at', 'updated_at']
+    
+    def get_breed_name(self, obj):
+        breed = BREEDS.get().get(obj.breed_id)
+        return breed.name if breed else None
+    
+    def get_image_variants(self, obj):
+        return variant_urls(obj.image, obj.image_variants, self.context.get('request'))
+
+
+class AnimalEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AnimalEvent
+        fields = ['id', 'animal', 'event_type', 'occurred_at', 'data']
+
+
+class HerdAtSerializer(serializers.Serializer):
+    """Point in time for herd reconstruction; a bare date means the end of that day"""
+    at = serializers.CharField()
+    status = serializers.ChoiceField(choices=AnimalStatus.choices, required=False)
+    animal_type = serializers.ChoiceField(choices=Animal._meta.get_field('animal_type').choices, required=False)
+    location = serializers.IntegerField(required=False)
+    
+    def validate_at(self, value):
+        day = parse_date(value)
+        moment = datetime.combine(day, time.max) if day else parse_datetime(value)
+        if moment is None:
+            raise serializers.ValidationError("Use an ISO date (YYYY-MM-DD) or datetime.")
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment
+
+
+class TagBatchSerializer(serializers.Serializer):
+    """Batch of scanned ear tags, with an optional status to apply to all of them"""
+    tags = serializers.ListField(
+        child=serializers.CharField(max_length=50, trim_whitespace=True),
+        allow_empty=False, max_length=1000,
+    )
+    status = serializers.ChoiceField(choices=AnimalStatus.choices, required=False)
+    
+    def validate_tags(self, value):
+        # Drop duplicate scans, keep scan order
+        return list(dict.fromkeys(tag for tag in value if tag))
 
 
 class OfferSerializer(serializers.ModelSerializer):
     is_on_sale = serializers.ReadOnlyField()
     discount_percentage = serializers.ReadOnlyField()
+    image_variants = serializers.SerializerMethodField()
     
     class Meta:
         model = Offer
         fields = '__all__'
         read_only_fields = ['created_at', 'updated_at']
+    
+    def get_image_variants(self, obj):
+        return variant_urls(obj.image, obj.image_variants, self.context.get('request'))
+
+
+class StockThresholdSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = StockThreshold
+        fields = '__all__'
+        read_only_fields = ['is_below', 'last_triggered_at', 'created_at', 'updated_at']
+    
+    def validate(self, attrs):
+        offer = attrs.get('offer', getattr(self.instance, 'offer', None))
+        breed = attrs.get('breed', getattr(self.instance, 'breed', None))
+        if bool(offer) == bool(breed):
+            raise serializers.ValidationError("Set exactly one of offer or breed.")
+        return attrs
@@ -0,0 +1,91 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from . import lifecycle, occupancy
+from .alerts import breed_stock_changed, offer_stock_changed
+from .images import schedule_variants
+from .reference import BREEDS, OFFERS
+from .snapshots import schedule_publish
+from .models import Animal, AnimalStatus, Breed, Offer
+
+
+@receiver(post_save, sender=Animal)
+@receiver(post_save, sender=Offer)
+def render_image_variants(sender, instance, **kwargs):
+    """Render thumbnails/WebP for new or replaced photos after commit"""
+    schedule_variants(instance, 'image', 'image_variants')
+
+
+@receiver(post_save, sender=Animal)
+@receiver(post_save, sender=Offer)
+@receiver(post_delete, sender=Animal)
+@receiver(post_delete, sender=Offer)
+def publish_catalog_snapshot(sender, **kwargs):
+    """Refresh the static storefront catalog (debounced)"""
+    schedule_publish()
+
+
+@receiver(post_save, sender=Offer)
+def evaluate_offer_stock(sender, instance, created, **kwargs):
+    """Check this offer's low-stock thresholds when its stock changed"""
+    previous = getattr(instance, '_loaded_stock_quantity', None)
+    if not created and previous != instance.stock_quantity:
+        offer_stock_changed(instance)
+    instance._loaded_stock_quantity = instance.stock_quantity
+
+
+@receiver(pre_save, sender=Animal)
+def check_location_room(sender, instance, raw=False, **kwargs):
+    """Refuse to put an animal at a full location (bulk moves check in occupancy.update_animals)"""
+    if not raw:
+        occupancy.check_room(instance)
+
+
+@receiver(post_save, sender=Animal)
+def animal_changed(sender, instance, created, **kwargs):
+    """Keep occupancy counters, breed thresholds and the lifecycle log in step with the animal"""
+    occupancy.animal_saved(instance, created)
+    lifecycle.animal_saved(instance, created)
+
+    previous_status = getattr(instance, '_loaded_status', None)
+    previous_breed_id = getattr(instance, '_loaded_breed_id', None)
+
+    affected = set()
+    if created:
+        if instance.status == AnimalStatus.AVAILABLE:
+            affected.add(instance.breed_id)
+    elif previous_status != instance.status or previous_breed_id != instance.breed_id:
+        if previous_status == AnimalStatus.AVAILABLE:
+            affected.add(previous_breed_id)
+        if instance.status == AnimalStatus.AVAILABLE:
+            affected.add(instance.breed_id)
+
+    for breed_id in affected:
+        breed_stock_changed(breed_id)
+
+    instance._loaded_status = instance.status
+    instance._loaded_tag_number = instance.tag_number
+    instance._loaded_breed_id = instance.breed_id
+    instance._loaded_location_id = instance.location_id
+    instance._loaded_animal_type = instance.animal_type
+    instance._loaded_weight = instance.weight
+    instance._loaded_health_notes = instance.health_notes
+
+
+@receiver(post_delete, sender=Animal)
+def animal_deleted(sender, instance, **kwargs):
+    occupancy.animal_deleted(instance)
+    lifecycle.animal_deleted(instance)
+    if instance.status == AnimalStatus.AVAILABLE:
+        breed_stock_changed(instance.breed_id)
+
+
+@receiver(post_save, sender=Breed)
+@receiver(post_delete, sender=Breed)
+def invalidate_breeds(sender, **kwargs):
+    BREEDS.invalidate()
+
+
+@receiver(post_save, sender=Offer)
+@receiver(post_delete, sender=Offer)
+def invalidate_offers(sender, **kwargs):
+    OFFERS.invalidate()
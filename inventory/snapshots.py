@@ -0,0 +1,119 @@
+"""
+Static catalog snapshots for the storefront
+
+Active offers and available animals are written as versioned, precompressed
+JSON files under STATIC_ROOT/catalog/ so nginx can serve them straight from
+the /static/ location. Every file is written to a temp name and renamed into
+place, so readers never see a partial snapshot.
+
+Layout:
+    catalog/offers.<version>.json(.gz)   immutable, cache forever
+    catalog/offers.json(.gz)             latest copy, short cache
+    catalog/manifest.json                document -> current versioned file
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+from farmcloud.debounce import Debouncer
+
+# Versioned files kept per document (older ones are pruned)
+KEEP_VERSIONS = 5
+
+
+def _documents():
+    from .models import Animal, AnimalStatus, Offer
+    from .serializers import AnimalSerializer, OfferSerializer
+
+    active_offers = Offer.objects.filter(is_active=True).order_by('display_order', '-created_at')
+    return {
+        'offers': lambda: OfferSerializer(active_offers, many=True).data,
+        'featured-offers': lambda: OfferSerializer(active_offers.filter(is_featured=True), many=True).data,
+        'animals': lambda: AnimalSerializer(
+            Animal.objects.filter(status=AnimalStatus.AVAILABLE).select_related('breed', 'location').order_by('-created_at'),
+            many=True,
+        ).data,
+    }
+
+
+def snapshot_dir():
+    return os.path.join(settings.STATIC_ROOT, 'catalog')
+
+
+def _write_atomic(path, payload):
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'wb') as fh:
+        fh.write(payload)
+    os.replace(tmp_path, path)
+
+
+def _prune(directory, document):
+    prefix = f'{document}.'
+    versioned = [
+        name for name in os.listdir(directory)
+        if name.startswith(prefix) and name.endswith('.json') and name != f'{document}.json'
+    ]
+    versioned.sort(key=lambda name: os.path.getmtime(os.path.join(directory, name)), reverse=True)
+    for name in versioned[KEEP_VERSIONS:]:
+        for stale in (name, f'{name}.gz'):
+            try:
+                os.remove(os.path.join(directory, stale))
+            except FileNotFoundError:
+                pass
+
+
+def publish_catalog():
+    """Regenerate every catalog snapshot; returns the new manifest"""
+    directory = snapshot_dir()
+    os.makedirs(directory, exist_ok=True)
+
+    manifest = {'generated_at': timezone.now().isoformat(), 'documents': {}}
+    for document, build in _documents().items():
+        data = build()
+        payload = json.dumps(
+            {'count': len(data), 'results': data}, cls=JSONEncoder, separators=(',', ':')
+        ).encode()
+        compressed = gzip.compress(payload, compresslevel=9, mtime=0)
+        version = hashlib.sha256(payload).hexdigest()[:12]
+        versioned = f'{document}.{version}.json'
+
+        # Unchanged content keeps its existing versioned file
+        if not os.path.exists(os.path.join(directory, versioned)):
+            _write_atomic(os.path.join(directory, f'{versioned}.gz'), compressed)
+            _write_atomic(os.path.join(directory, versioned), payload)
+        _write_atomic(os.path.join(directory, f'{document}.json.gz'), compressed)
+        _write_atomic(os.path.join(directory, f'{document}.json'), payload)
+        _prune(directory, document)
+
+        manifest['documents'][document] = {
+            'url': f'{settings.STATIC_URL}catalog/{versioned}',
+            'version': version,
+            'count': len(data),
+        }
+
+    # The manifest goes last so it only ever points at complete files
+    _write_atomic(os.path.join(directory, 'manifest.json'), json.dumps(manifest, indent=2).encode())
+    return manifest
+
+
+_publisher = None
+
+
+def schedule_publish():
+    """Regenerate the snapshots shortly after the current transaction commits"""
+    global _publisher
+    if not settings.CATALOG_SNAPSHOT_ENABLED:
+        return
+    if _publisher is None:
+        _publisher = Debouncer(
+            publish_catalog,
+            delay=settings.CATALOG_SNAPSHOT_DEBOUNCE,
+            max_wait=settings.CATALOG_SNAPSHOT_MAX_WAIT,
+        )
+    transaction.on_commit(_publisher.trigger)
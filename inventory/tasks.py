@@ -0,0 +1,12 @@
+from jobs.queue import task
+from . import alerts, lifecycle
+
+
+@task('inventory.snapshot_herd')
+def snapshot_herd():
+    lifecycle.take_snapshot()
+
+
+@task(alerts.DIGEST_TASK)
+def send_stock_digest():
+    alerts.send_digest()
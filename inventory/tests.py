@@ -0,0 +1,415 @@
+import json
+import os
+import tempfile
+import threading
+from datetime import date, datetime, timedelta
+from unittest import mock
+
+from django.core import mail
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from farmcloud import refcache, routers
+from farmcloud.testing import QueryCountTestCase
+from jobs import queue
+from jobs.models import Job, ScheduledJob
+from settings.models import Settings
+from users.models import User
+from . import lifecycle, occupancy, snapshots
+from .reference import BREEDS
+from .models import (
+    Animal, AnimalEvent, AnimalEventType, AnimalType, Breed, HerdSnapshot, Location, LocationOccupancy, Offer,
+    StockAlert, StockThreshold,
+)
+from .views import AnimalViewSet, BreedViewSet, LocationViewSet, OfferViewSet, StockThresholdViewSet
+
+
+def seed_breeds(start, stop):
+    Breed.objects.bulk_create([
+        Breed(name=f'Breed {i}', animal_type=AnimalType.GOAT, typical_weight_min=20, typical_weight_max=40)
+        for i in range(start, stop)
+    ])
+
+
+def seed_animals(start, stop):
+    # A breed and a location per animal, so related lookups can't hide in a cache of one row
+    seed_breeds(start, stop)
+    seed_locations(start, stop)
+    breeds = Breed.objects.order_by('id')[start:stop]
+    locations = Location.objects.order_by('id')[start:stop]
+    Animal.objects.bulk_create([
+        Animal(
+            tag_number=f'T-{i:05d}', animal_type=AnimalType.GOAT, breed=breed, location=location,
+            weight=30, age_months=12, gender='MALE', price=900, date_acquired=date(2024, 1, 1),
+        )
+        for i, breed, location in zip(range(start, stop), breeds, locations)
+    ])
+
+
+def seed_locations(start, stop):
+    Location.objects.bulk_create([Location(name=f'Pen {i}', capacity=50) for i in range(start, stop)])
+    LocationOccupancy.objects.bulk_create([
+        LocationOccupancy(location=location, status='AVAILABLE', animal_type=AnimalType.GOAT, count=3)
+        for location in Location.objects.filter(name__in=[f'Pen {i}' for i in range(start, stop)])
+    ])
+
+
+def seed_offers(start, stop):
+    Offer.objects.bulk_create([
+        Offer(name=f'Offer {i}', slug=f'offer-{i}', offer_type='WHOLE', description='-', price=1000,
+              original_price=1200, stock_quantity=5)
+        for i in range(start, stop)
+    ])
+
+
+def seed_thresholds(start, stop):
+    seed_offers(start, stop)
+    seed_breeds(start, stop)
+    offers = Offer.objects.order_by('id')[start:stop]
+    breeds = Breed.objects.order_by('id')[start:stop]
+    StockThreshold.objects.bulk_create(
+        [StockThreshold(offer=offer, threshold=3) for offer in offers]
+        + [StockThreshold(breed=breed, threshold=3) for breed in breeds]
+    )
+
+
+def seed_alerts(start, stop):
+    seed_thresholds(start, stop)
+    StockAlert.objects.bulk_create([
+        StockAlert(threshold=threshold, level=1)
+        for threshold in StockThreshold.objects.order_by('id')[2 * start:2 * stop]
+    ])
+
+
+def seed_events(start, stop):
+    AnimalEvent.objects.bulk_create([
+        AnimalEvent(animal_id=i + 1, event_type=AnimalEventType.WEIGHED, data={'weight': '30.00'})
+        for i in range(start, stop)
+    ])
+
+
+def seed_snapshots(start, stop):
+    now = timezone.now()
+    HerdSnapshot.objects.bulk_create([
+        HerdSnapshot(taken_at=now - timedelta(days=i), animal_count=0, state={}) for i in range(start, stop)
+    ])
+
+
+class InventoryQueryCountTests(QueryCountTestCase):
+    def test_breed_list(self):
+        self.assertConstantQueries('/api/breeds/', seed_breeds)
+    
+    def test_animal_list(self):
+        self.assertConstantQueries('/api/animals/', seed_animals)
+    
+    def test_location_list(self):
+        self.assertConstantQueries('/api/locations/', seed_locations)
+    
+    def test_offer_list(self):
+        self.assertConstantQueries('/api/offers/', seed_offers)
+    
+    def test_stock_threshold_list(self):
+        self.assertConstantQueries('/api/stock-thresholds/', seed_thresholds)
+
+
+class InventorySerializationTimeTests(QueryCountTestCase):
+    def test_breeds(self):
+        self.assertSerializesWithinBudget(BreedViewSet, seed_breeds)
+    
+    def test_animals(self):
+        self.assertSerializesWithinBudget(AnimalViewSet, seed_animals)
+    
+    def test_locations(self):
+        self.assertSerializesWithinBudget(LocationViewSet, seed_locations)
+    
+    def test_offers(self):
+        self.assertSerializesWithinBudget(OfferViewSet, seed_offers)
+    
+    def test_stock_thresholds(self):
+        self.assertSerializesWithinBudget(StockThresholdViewSet, seed_thresholds)
+
+
+class InventoryAdminQueryCountTests(QueryCountTestCase):
+    def test_breed_changelist(self):
+        self.assertConstantChangelistQueries(Breed, seed_breeds)
+    
+    def test_animal_changelist(self):
+        self.assertConstantChangelistQueries(Animal, seed_animals)
+    
+    def test_location_changelist(self):
+        self.assertConstantChangelistQueries(Location, seed_locations)
+    
+    def test_offer_changelist(self):
+        self.assertConstantChangelistQueries(Offer, seed_offers)
+    
+    def test_stock_threshold_changelist(self):
+        self.assertConstantChangelistQueries(StockThreshold, seed_thresholds)
+    
+    def test_stock_alert_changelist(self):
+        self.assertConstantChangelistQueries(StockAlert, seed_alerts)
+    
+    def test_animal_event_changelist(self):
+        self.assertConstantChangelistQueries(AnimalEvent, seed_events)
+    
+    def test_herd_snapshot_changelist(self):
+        self.assertConstantChangelistQueries(HerdSnapshot, seed_snapshots)
+
+
+class ResponseCacheTests(TestCase):
+    url = '/api/animals/?status=AVAILABLE&animal_type=GOAT'
+    
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            seed_animals(0, 3)
+    
+    def get(self, url=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url or self.url, secure=True)
+        self.assertEqual(response.status_code, 200)
+        return response['X-Cache'], len(queries)
+    
+    def test_hit_skips_the_queryset(self):
+        self.assertEqual(self.get()[0], 'MISS')
+        state, queries = self.get('/api/animals/?animal_type=GOAT&status=AVAILABLE')
+        self.assertEqual(state, 'HIT')
+        self.assertLessEqual(queries, 1)  # the version stamps
+    
+    def test_related_save_invalidates(self):
+        self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            breed = Breed.objects.first()
+            breed.name = 'Renamed'
+            breed.save()
+        self.assertEqual(self.get()[0], 'MISS')
+    
+    def test_queryset_update_invalidates(self):
+        self.get()
+        self.get('/api/offers/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Animal.objects.filter(tag_number='T-00000').update(weight=35)
+        self.assertEqual(self.get()[0], 'MISS')
+        self.assertEqual(self.get('/api/offers/')[0], 'HIT')
+
+
+@override_settings(REFERENCE_CACHE_RECHECK=0, RESPONSE_CACHE_ENABLED=False)
+class ReferenceStampTests(TestCase):
+    def test_stamps_are_read_once_per_request(self):
+        seed_animals(0, 5)  # the serializer looks each row's breed up in BREEDS
+        read = mock.Mock(wraps=refcache.stamps.store.read)
+        
+        def breed_reads():  # the ETag's model stamps are read separately
+            return sum(BREEDS.name in call.args[0] for call in read.call_args_list)
+        
+        with mock.patch.object(refcache.stamps.store, 'read', read):
+            for requests in (1, 2):
+                self.assertEqual(self.client.get('/api/animals/', secure=True).status_code, 200)
+                self.assertEqual(breed_reads(), requests)
+            
+            # Outside a request the recheck interval applies
+            BREEDS.get()
+            BREEDS.get()
+            self.assertEqual(breed_reads(), 4)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], RESPONSE_CACHE_ENABLED=False)
+class ReplicaRoutingTests(TestCase):
+    databases = {'default', 'replica'}
+    
+    def setUp(self):
+        cache.clear()
+        routers.health.reset()
+        # The test replica is a separate database: its rows show who answered
+        Breed.objects.create(name='Primary', animal_type=AnimalType.GOAT, typical_weight_min=20, typical_weight_max=40)
+        Breed.objects.using('replica').create(name='Replica', animal_type=AnimalType.GOAT, typical_weight_min=20,
+                                              typical_weight_max=40)
+    
+    def names(self):
+        response = self.client.get('/api/breeds/', secure=True)
+        self.assertEqual(response.status_code, 200)
+        return [breed['name'] for breed in response.json()['results']]
+    
+    def test_catalog_reads_use_the_replica(self):
+        self.assertEqual(self.names(), ['Replica'])
+        breed = Breed.objects.using('replica').get()
+        self.assertEqual(self.client.get(f'/api/breeds/{breed.pk}/', secure=True).json()['name'], 'Replica')
+    
+    def test_writers_stick_to_the_primary(self):
+        response = self.client.post('/api/breeds/', {
+            'name': 'Added', 'animal_type': 'GOAT', 'typical_weight_min': 20, 'typical_weight_max': 40,
+        }, secure=True)
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Breed.objects.filter(name='Added').exists())
+        self.assertEqual(sorted(self.names()), ['Added', 'Primary'])
+        with override_settings(REPLICA_STICKY_SECONDS=0):
+            cache.clear()
+            self.assertEqual(self.names(), ['Replica'])
+    
+    @override_settings(REPLICA_MAX_LAG=-1)
+    def test_lagging_replica_is_skipped(self):
+        self.assertEqual(self.names(), ['Primary'])
+    
+    def test_rows_read_from_a_replica_save_to_the_primary(self):
+        breed = Breed.objects.using('replica').get()
+        breed.name = 'Edited'
+        breed.save()
+        self.assertTrue(Breed.objects.filter(name='Edited').exists())
+        self.assertEqual(Breed.objects.using('replica').get().name, 'Replica')
+    
+    def test_reference_data_is_read_from_the_primary(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            BREEDS.invalidate()  # loaded by earlier tests
+        token = routers.use_replica('replica')
+        try:
+            self.assertEqual([breed.name for breed in BREEDS.get().values()], ['Primary'])
+        finally:
+            routers.reset(token)
+    
+    @override_settings(RESPONSE_CACHE_ENABLED=True)
+    def test_replica_responses_are_not_cached(self):
+        self.assertEqual(self.names(), ['Replica'])
+        with override_settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(self.names(), ['Primary'])
+
+
+class HerdHistoryTests(TestCase):
+    def test_relabeling_is_replayed_onto_snapshots(self):
+        seed_animals(0, 2)
+        lifecycle.start_history()
+        animal = Animal.objects.get(tag_number='T-00000')
+        breed, other_breed = animal.breed_id, Breed.objects.exclude(pk=animal.breed_id).get()
+        animal.tag_number, animal.breed = 'T-99999', other_breed
+        animal.save()
+        event = AnimalEvent.objects.get(event_type=AnimalEventType.RELABELED)
+        self.assertEqual(event.data['from'], {'tag_number': 'T-00000', 'breed_id': breed})
+        
+        state, snapshot, replayed = lifecycle.herd_at(timezone.now())
+        self.assertEqual((replayed, state[str(animal.pk)]['tag_number']), (1, 'T-99999'))
+        self.assertEqual(state[str(animal.pk)]['breed_id'], other_breed.pk)
+    
+    def test_bulk_loaded_animals_get_a_history(self):
+        seed_animals(0, 3)  # bulk_create: no events
+        snapshot = lifecycle.start_history()
+        self.assertEqual(snapshot.animal_count, 3)
+        self.assertEqual(AnimalEvent.objects.filter(event_type=AnimalEventType.ACQUIRED).count(), 3)
+        before = timezone.make_aware(datetime(2023, 12, 31))
+        after = timezone.make_aware(datetime(2024, 6, 1))
+        self.assertEqual(len(lifecycle.herd_at(before)[0]), 0)
+        self.assertEqual(len(lifecycle.herd_at(after)[0]), 3)
+
+
+class LowStockAlertTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        ScheduledJob.objects.all().delete()  # only the digest should be queued
+        cls.admin = User.objects.create_superuser('alerts-admin', 'alerts-admin@example.com', 'pw', role='ADMIN')
+        seed_animals(0, 2)
+        cls.breed = Breed.objects.order_by('id').first()
+        Animal.objects.update(breed=cls.breed)
+        StockThreshold.objects.create(breed=cls.breed, threshold=0)
+        app_settings = Settings.load()
+        app_settings.low_stock_alerts = app_settings.email_notifications = True
+        app_settings.save()
+    
+    def test_admin_actions_alert_through_the_job_queue(self):
+        self.client.force_login(self.admin)
+        response = self.client.post(reverse('admin:inventory_animal_changelist'), {
+            'action': 'mark_as_sold', '_selected_action': list(Animal.objects.values_list('pk', flat=True)),
+        }, secure=True)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(StockAlert.objects.get().level, 0)
+        digest = Job.objects.get(task='inventory.send_stock_digest')
+        self.assertGreater(digest.run_at, timezone.now())  # after the digest window
+        
+        Job.objects.update(run_at=timezone.now())
+        self.assertEqual(queue.work(threading.Event(), once=True), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn(self.breed.name, mail.outbox[0].body)
+        self.assertIsNotNone(StockAlert.objects.get().notified_at)
+
+
+class LocationCapacityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_breeds(0, 1)
+        cls.breed = Breed.objects.get()
+        cls.pen = Location.objects.create(name='Small pen', capacity=1)
+        cls.new_animal(tag_number='T-first', location=cls.pen).save()
+    
+    @classmethod
+    def new_animal(cls, tag_number='T-new', **fields):
+        return Animal(tag_number=tag_number, animal_type=AnimalType.GOAT, breed=cls.breed, weight=30,
+                      age_months=12, gender='MALE', price=900, date_acquired=date(2024, 1, 1), **fields)
+    
+    def test_single_saves_respect_capacity(self):
+        with self.assertRaises(occupancy.CapacityExceeded):
+            self.new_animal(location=self.pen).save()
+        self.new_animal(location=self.pen, status='SOLD').save()  # not on site
+        self.assertEqual(occupancy.occupied(self.pen.pk), 1)
+    
+    def test_api_refuses_full_locations(self):
+        response = self.client.post('/api/animals/', {
+            'tag_number': 'T-new', 'animal_type': 'GOAT', 'breed': self.breed.pk, 'weight': 30,
+            'age_months': 12, 'gender': 'MALE', 'price': 900, 'date_acquired': '2024-01-01', 'location': 'Small pen',
+        }, secure=True)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('location', response.json())
+    
+    def test_status_changes_back_on_site_respect_capacity(self):
+        self.new_animal(tag_number='T-sold', location=self.pen, status='SOLD').save()
+        with self.assertRaises(occupancy.CapacityExceeded):
+            occupancy.update_animals(Animal.objects.filter(tag_number='T-sold'), status='AVAILABLE')
+        response = self.client.post('/api/animals/resolve-tags/', {
+            'tags': ['T-first', 'T-sold'], 'status': 'AVAILABLE',
+        }, content_type='application/json', secure=True)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Animal.objects.get(tag_number='T-sold').status, 'SOLD')
+        self.assertEqual(occupancy.occupied(self.pen.pk), 1)
+        
+        # Already on site: changing between present statuses takes no extra room
+        occupancy.update_animals(Animal.objects.filter(tag_number='T-first'), status='RESERVED')
+        self.assertEqual(occupancy.occupied(self.pen.pk), 1)
+    
+    def test_new_animals_do_not_write_their_default_location(self):
+        Location.objects.filter(name='Main Farm').delete()
+        with self.assertNumQueries(1):  # looking the default up, nothing more
+            animal = self.new_animal()
+        self.assertIsNone(animal.location_id)
+        self.assertFalse(Location.objects.filter(name='Main Farm').exists())
+        animal.save()
+        self.assertEqual(animal.location.name, 'Main Farm')
+
+
+class CatalogSnapshotTests(TestCase):
+    def setUp(self):
+        static_root = tempfile.TemporaryDirectory()
+        self.addCleanup(static_root.cleanup)
+        self.enterContext(override_settings(STATIC_ROOT=static_root.name))
+    
+    def test_publish_writes_versioned_files_and_manifest(self):
+        seed_offers(0, 2)
+        seed_animals(0, 3)
+        manifest = snapshots.publish_catalog()
+        directory = snapshots.snapshot_dir()
+        with open(os.path.join(directory, 'manifest.json')) as fh:
+            self.assertEqual(json.load(fh), manifest)
+        self.assertEqual(manifest['documents']['offers']['count'], 2)
+        self.assertEqual(manifest['documents']['animals']['count'], 3)
+        
+        versioned = manifest['documents']['animals']['url'].rsplit('/', 1)[1]
+        for name in (versioned, f'{versioned}.gz', 'animals.json', 'animals.json.gz'):
+            self.assertTrue(os.path.exists(os.path.join(directory, name)), name)
+        
+        # Unchanged content keeps its version; a change gets a new one
+        self.assertEqual(snapshots.publish_catalog()['documents']['animals']['version'],
+                         manifest['documents']['animals']['version'])
+        Animal.objects.filter(tag_number='T-00000').update(status='SOLD')
+        self.assertEqual(snapshots.publish_catalog()['documents']['animals']['count'], 2)
+    
+    def test_test_runs_schedule_no_publish(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            snapshots.schedule_publish()
+        self.assertEqual(callbacks, [])
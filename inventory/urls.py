@@ -1,12 +1,14 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import BreedViewSet, AnimalViewSet, OfferViewSet
+from .views import BreedViewSet, AnimalViewSet, LocationViewSet, OfferViewSet, StockThresholdViewSet
 
 app_name = 'inventory'
 
 router = DefaultRouter()
 router.register(r'breeds', BreedViewSet)
 router.register(r'animals', AnimalViewSet)
+router.register(r'locations', LocationViewSet)
 router.register(r'offers', OfferViewSet)
+router.register(r'stock-thresholds', StockThresholdViewSet)
 
 urlpatterns = router.urls
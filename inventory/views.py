@@ -1,33 +1,183 @@
-from rest_framework import viewsets, filters
+from rest_framework import viewsets, filters, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
+from django.db import transaction
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Breed, Animal, Offer
-from .serializers import BreedSerializer, AnimalSerializer, OfferSerializer
+from farmcloud.mixins import CachedResponseMixin, ConditionalGetMixin, ExportMixin, ReplicaReadMixin
+from .models import Breed, Animal, AnimalEvent, Location, Offer, StockThreshold
+from . import lifecycle, occupancy
+from .serializers import (
+    BreedSerializer, AnimalSerializer, OfferSerializer, StockThresholdSerializer, TagBatchSerializer,
+    LocationSerializer, HerdMoveSerializer, AnimalEventSerializer, HerdAtSerializer,
+)
+from .snapshots import schedule_publish
 
 
-class BreedViewSet(viewsets.ModelViewSet):
+class BreedViewSet(ReplicaReadMixin, CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Breed.objects.all().order_by('animal_type', 'name')
     serializer_class = BreedSerializer
     permission_classes = [AllowAny]  # Changed for development
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['animal_type']
     search_fields = ['name']
+    cache_actions = {'list': None, 'retrieve': None}
+    cache_models = [Breed]
 
 
-class AnimalViewSet(viewsets.ModelViewSet):
-    queryset = Animal.objects.all().order_by('-created_at')
+class AnimalViewSet(ReplicaReadMixin, ExportMixin, CachedResponseMixin, ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = Animal.objects.all().select_related('location').order_by('-created_at')
     serializer_class = AnimalSerializer
     permission_classes = [AllowAny]  # Changed for development
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['status', 'animal_type', 'breed', 'gender', 'location']
+    filterset_fields = ['status', 'animal_type', 'breed', 'gender', 'location', 'location__name']
     search_fields = ['tag_number', 'breed__name']
     ordering_fields = ['created_at', 'weight', 'price']
+    # Rows carry breed and location names
+    cache_actions = {'list': None, 'retrieve': None}
+    cache_models = [Animal, Breed, Location]
+    export_fields = {
+        'id': 'id', 'tag_number': 'tag_number', 'animal_type': 'animal_type', 'breed': 'breed_id',
+        'breed_name': 'breed__name', 'weight': 'weight', 'age_months': 'age_months', 'gender': 'gender',
+        'color': 'color', 'status': 'status', 'price': 'price', 'date_acquired': 'date_acquired',
+        'location': 'location__name', 'created_at': 'created_at',
+    }
+    
+    def perform_create(self, serializer):
+        try:
+            serializer.save()
+        except occupancy.CapacityExceeded as exc:
+            raise ValidationError({'location': [str(exc)]})
+    
+    def perform_update(self, serializer):
+        try:
+            serializer.save()
+        except occupancy.CapacityExceeded as exc:
+            raise ValidationError({'location': [str(exc)]})
+    
+    @action(detail=False, methods=['post'], url_path='resolve-tags')
+    def resolve_tags(self, request):
+        """
+        Resolve up to 1000 scanned tags with one exact-match query, optionally
+        moving every resolved animal to `status` in a single update.
+        """
+        batch = TagBatchSerializer(data=request.data)
+        batch.is_valid(raise_exception=True)
+        tags = batch.validated_data['tags']
+        new_status = batch.validated_data.get('status')
+        
+        animals = list(Animal.objects.filter(tag_number__in=tags).select_related('breed', 'location'))
+        found = {animal.tag_number for animal in animals}
+        unknown = [tag for tag in tags if tag not in found]
+        
+        updated = 0
+        if new_status and animals:
+            now = timezone.now()
+            try:
+                with transaction.atomic():
+                    updated = occupancy.update_animals(
+                        Animal.objects.filter(pk__in=[animal.pk for animal in animals]),
+                        status=new_status, updated_at=now,
+                    )
+                    schedule_publish()
+            except occupancy.CapacityExceeded as exc:
+                return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+            for animal in animals:
+                animal.status = new_status
+                animal.updated_at = now
+        
+        return Response({
+            'found': AnimalSerializer(animals, many=True, context=self.get_serializer_context()).data,
+            'unknown': unknown,
+            'updated': updated,
+        }, status=status.HTTP_200_OK)
+    
+    @action(detail=True, methods=['get'])
+    def history(self, request, pk=None):
+        """Lifecycle events of one animal, oldest first"""
+        animal = self.get_object()
+        events = AnimalEvent.objects.filter(animal_id=animal.pk).order_by('occurred_at', 'id')
+        page = self.paginate_queryset(events)
+        if page is not None:
+            return self.get_paginated_response(AnimalEventSerializer(page, many=True).data)
+        return Response(AnimalEventSerializer(events, many=True).data)
+    
+    @action(detail=False, methods=['get'], url_path='herd-at')
+    def herd_at(self, request):
+        """
+        The herd as it was at `?at=` (date or datetime), rebuilt from the nearest
+        snapshot plus the events since. Optional status/animal_type/location filters.
+        """
+        params = HerdAtSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        query = params.validated_data
+        state, snapshot, replayed = lifecycle.herd_at(query['at'])
+        
+        animals = [
+            {'id': int(animal_id), **values} for animal_id, values in state.items()
+            if values['status'] == query.get('status', values['status'])
+            and values['animal_type'] == query.get('animal_type', values['animal_type'])
+            and values['location_id'] == query.get('location', values['location_id'])
+        ]
+        animals.sort(key=lambda animal: animal['id'])
+        location_names = dict(Location.objects.values_list('pk', 'name'))
+        by_status, by_location = {}, {}
+        for animal in animals:
+            animal['location'] = location_names.get(animal['location_id'])
+            by_status[animal['status']] = by_status.get(animal['status'], 0) + 1
+            by_location[animal['location']] = by_location.get(animal['location'], 0) + 1
+        
+        return Response({
+            'at': query['at'],
+            'snapshot_taken_at': snapshot.taken_at if snapshot else None,
+            'events_replayed': replayed,
+            'count': len(animals),
+            'by_status': by_status,
+            'by_location': by_location,
+            'animals': animals,
+        })
 
 
-class OfferViewSet(viewsets.ModelViewSet):
+class LocationViewSet(viewsets.ModelViewSet):
+    queryset = Location.objects.all().prefetch_related('occupancy').order_by('name')
+    serializer_class = LocationSerializer
+    permission_classes = [AllowAny]  # Changed for development
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filterset_fields = ['is_active']
+    search_fields = ['name']
+    
+    @action(detail=True, methods=['post'], url_path='move-herd')
+    def move_herd(self, request, pk=None):
+        """Relocate a herd to this location in one update, keeping counters consistent"""
+        location = self.get_object()
+        move = HerdMoveSerializer(data=request.data)
+        move.is_valid(raise_exception=True)
+        try:
+            moved = occupancy.move_herd(move.get_queryset(), location)
+        except occupancy.CapacityExceeded as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        schedule_publish()
+        
+        location = self.get_queryset().get(pk=location.pk)
+        return Response({'moved': moved, 'location': self.get_serializer(location).data})
+
+
+class OfferViewSet(ReplicaReadMixin, CachedResponseMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Offer.objects.all().order_by('display_order', '-created_at')
     serializer_class = OfferSerializer
     permission_classes = [AllowAny]  # Changed for development
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['is_active', 'is_featured', 'offer_type', 'animal_type']
     search_fields = ['name', 'description']
+    cache_actions = {'list': None, 'retrieve': None}
+    cache_models = [Offer]
+
+
+class StockThresholdViewSet(viewsets.ModelViewSet):
+    queryset = StockThreshold.objects.all().select_related('offer', 'breed').order_by('threshold')
+    serializer_class = StockThresholdSerializer
+    permission_classes = [AllowAny]  # Changed for development
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['offer', 'breed', 'is_active', 'is_below']
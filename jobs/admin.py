@@ -0,0 +1,27 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import Job, JobStatus, ScheduledJob
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'task', 'status', 'attempts', 'run_at', 'created_at', 'finished_at']
+    list_filter = ['status', 'task']
+    search_fields = ['task', 'last_error']
+    readonly_fields = ['attempts', 'last_error', 'locked_by', 'locked_at', 'created_at', 'finished_at']
+    date_hierarchy = 'created_at'
+    
+    actions = ['retry_now']
+    
+    def retry_now(self, request, queryset):
+        queryset.filter(status=JobStatus.FAILED).update(
+            status=JobStatus.QUEUED, run_at=timezone.now(), attempts=0, finished_at=None,
+        )
+    retry_now.short_description = "Retry selected failed jobs now"
+
+
+@admin.register(ScheduledJob)
+class ScheduledJobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'task', 'interval', 'next_run_at', 'last_enqueued_at', 'enabled']
+    list_editable = ['enabled']
+    readonly_fields = ['last_enqueued_at']
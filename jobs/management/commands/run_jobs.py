@@ -0,0 +1,77 @@
+"""
+Run background jobs (jobs.queue) in a pool of worker processes
+Run: docker-compose exec web python manage.py run_jobs [--workers 2] [--once]
+
+Each worker process claims due jobs with SKIP LOCKED, so any number of
+run_jobs commands can share one database. TERM or INT to the command stops
+the pool: the workers finish the jobs they claimed, then exit. A worker
+that dies is replaced. --once drains the due jobs in this process and
+exits (cron, tests, debugging).
+"""
+import logging
+import multiprocessing
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from farmcloud import dbpool
+from jobs import queue
+
+logger = logging.getLogger(__name__)
+
+
+def _work(stop):
+    """Body of a worker process: run jobs until the pool stops"""
+    # The parent sets `stop` on TERM/INT (a terminal's Ctrl-C reaches the whole group)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    try:
+        queue.work(stop)
+    finally:
+        dbpool.close_pools()
+
+
+class Command(BaseCommand):
+    help = 'Run queued and scheduled background jobs in worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.JOB_WORKERS, help='Worker processes')
+        parser.add_argument('--once', action='store_true', help='Run the due jobs in this process, then exit')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers must be positive')
+        if options['once']:
+            done = queue.work(threading.Event(), once=True)
+            self.stdout.write(self.style.SUCCESS(f'✓ Ran {done} jobs'))
+            return
+
+        dbpool.close_pools()  # forked workers must open their own connections
+        context = multiprocessing.get_context('fork')
+        stop = context.Event()
+
+        def spawn():
+            process = context.Process(target=_work, args=(stop,), name='farmcloud-jobs')
+            process.start()
+            return process
+
+        # Only flag the signal: setting `stop` in the handler could deadlock on its lock
+        signals = []
+        signal.signal(signal.SIGTERM, lambda signum, frame: signals.append(signum))
+        signal.signal(signal.SIGINT, lambda signum, frame: signals.append(signum))
+        workers = [spawn() for _ in range(options['workers'])]
+        self.stdout.write(f'Running jobs in {len(workers)} worker processes (TERM or Ctrl-C to stop)')
+
+        while not signals:
+            time.sleep(0.5)
+            for i, process in enumerate(workers):
+                if not process.is_alive():
+                    logger.warning('Job worker %s exited with %s, starting another', process.pid, process.exitcode)
+                    workers[i] = spawn()
+        stop.set()
+        for process in workers:
+            process.join()
+        self.stdout.write(self.style.SUCCESS('✓ Job workers stopped'))
@@ -0,0 +1,54 @@
+# Generated by Django 5.1.5 on 2026-10-19 15:28
+
+import datetime
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduledJob',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('task', models.CharField(max_length=100)),
+                ('kwargs', models.JSONField(blank=True, default=dict)),
+                ('interval', models.DurationField(default=datetime.timedelta(days=1))),
+                ('next_run_at', models.DateTimeField()),
+                ('enabled', models.BooleanField(default=True)),
+                ('last_enqueued_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'scheduled_jobs',
+                'ordering': ['next_run_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task', models.CharField(help_text='Registered task name, e.g. orders.status_changed', max_length=100)),
+                ('kwargs', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('QUEUED', 'Queued'), ('RUNNING', 'Running'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='QUEUED', max_length=10)),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Not run before this time')),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('max_attempts', models.PositiveIntegerField(default=5)),
+                ('last_error', models.TextField(blank=True)),
+                ('locked_by', models.CharField(blank=True, help_text='host:pid of the worker running it', max_length=100)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(condition=models.Q(('status', 'QUEUED')), fields=['run_at'], name='job_queued_idx'), models.Index(fields=['status', 'locked_at'], name='jobs_status_560e50_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.5 on 2026-10-19 15:30
+
+from datetime import datetime, time, timedelta
+
+from django.db import migrations
+from django.utils import timezone
+
+# name: (task, interval, local time of the first run - None for now)
+SCHEDULE = {
+    'refresh-sales-rollup': ('reports.refresh_rollup', timedelta(minutes=10), None),
+    'snapshot-herd': ('inventory.snapshot_herd', timedelta(days=1), time(2)),
+    'purge-revoked-tokens': ('users.purge_revoked_tokens', timedelta(days=1), time(3)),
+    'purge-finished-jobs': ('jobs.purge_finished', timedelta(days=1), time(4)),
+}
+
+
+def forwards(apps, schema_editor):
+    """Schedule the periodic maintenance tasks, nightly ones in the small hours"""
+    ScheduledJob = apps.get_model('jobs', 'ScheduledJob')
+    db_alias = schema_editor.connection.alias
+    tomorrow = timezone.localdate() + timedelta(days=1)
+    ScheduledJob.objects.using(db_alias).bulk_create([
+        ScheduledJob(
+            name=name, task=task, interval=interval,
+            next_run_at=timezone.make_aware(datetime.combine(tomorrow, at)) if at else timezone.now(),
+        )
+        for name, (task, interval, at) in SCHEDULE.items()
+    ], ignore_conflicts=True)
+
+
+def backwards(apps, schema_editor):
+    ScheduledJob = apps.get_model('jobs', 'ScheduledJob')
+    ScheduledJob.objects.using(schema_editor.connection.alias).filter(name__in=SCHEDULE).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
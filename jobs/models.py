@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+from django.db import models
+from django.utils import timezone
+
+
+class JobStatus(models.TextChoices):
+    QUEUED = 'QUEUED', 'Queued'
+    RUNNING = 'RUNNING', 'Running'
+    DONE = 'DONE', 'Done'
+    FAILED = 'FAILED', 'Failed'
+
+
+class Job(models.Model):
+    """One call of a registered task (see jobs.queue), run by `manage.py run_jobs`"""
+    
+    task = models.CharField(max_length=100, help_text="Registered task name, e.g. orders.status_changed")
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=JobStatus.choices, default=JobStatus.QUEUED)
+    run_at = models.DateTimeField(default=timezone.now, help_text="Not run before this time")
+    
+    # Attempts
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    last_error = models.TextField(blank=True)
+    locked_by = models.CharField(max_length=100, blank=True, help_text="host:pid of the worker running it")
+    locked_at = models.DateTimeField(null=True, blank=True)
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'jobs'
+        ordering = ['-created_at']
+        indexes = [
+            # Workers claim queued jobs in run_at order; finished jobs stay out of the index
+            models.Index(fields=['run_at'], condition=models.Q(status='QUEUED'), name='job_queued_idx'),
+            models.Index(fields=['status', 'locked_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
+
+
+class ScheduledJob(models.Model):
+    """A task enqueued every `interval`, from `next_run_at` on (nightly tasks and the like)"""
+    
+    name = models.CharField(max_length=100, primary_key=True)
+    task = models.CharField(max_length=100)
+    kwargs = models.JSONField(default=dict, blank=True)
+    interval = models.DurationField(default=timedelta(days=1))
+    next_run_at = models.DateTimeField()
+    enabled = models.BooleanField(default=True)
+    last_enqueued_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'scheduled_jobs'
+        ordering = ['next_run_at']
+    
+    def __str__(self):
+        return f"{self.name} every {self.interval}"
@@ -0,0 +1,180 @@
+"""
+Background job queue in the database - no broker
+
+A task is a function registered under a name in some app's tasks.py;
+enqueue() stores a Job row, in the caller's transaction, so a job exists
+only if the change that asked for it commits:
+
+    @task('orders.status_changed')
+    def status_changed(order_id, status): ...
+
+    enqueue('orders.status_changed', order_id=order.pk, status=order.status)
+
+`manage.py run_jobs` runs work() in a pool of processes. Each claims up to
+JOB_BATCH_SIZE due jobs with SELECT ... FOR UPDATE SKIP LOCKED, so
+workers never wait on, or run, each other's jobs. A claimed job's lock is
+renewed when it starts, and one taken back in the meantime (see below) is
+skipped; its outcome is recorded only while the worker still holds it. A job that raises is
+retried after JOB_RETRY_BACKOFF * 2^(attempt - 1) seconds (capped at
+JOB_RETRY_BACKOFF_MAX, plus jitter) until max_attempts, then left FAILED.
+Jobs RUNNING for over JOB_TIMEOUT seconds belong to a dead worker and are
+queued again (or failed, when out of attempts), so tasks must tolerate
+running more than once.
+
+ScheduledJob rows enqueue their task every `interval`; the workers check
+them on every poll.
+"""
+import logging
+import os
+import random
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job, JobStatus, ScheduledJob
+
+logger = logging.getLogger(__name__)
+
+# Task name -> function, filled by the @task decorators of the apps' tasks.py
+TASKS = {}
+
+
+def task(name):
+    """Register the decorated function as the job task `name`"""
+    def register(func):
+        if name in TASKS:
+            raise ValueError(f'Job task {name!r} is registered twice')
+        TASKS[name] = func
+        return func
+    return register
+
+
+def enqueue(name, run_at=None, max_attempts=None, **kwargs):
+    """Queue a call of task `name` with JSON-serializable kwargs; returns the Job"""
+    if name not in TASKS:
+        raise ValueError(f'Unknown job task {name!r}')
+    return Job.objects.create(
+        task=name, kwargs=kwargs, run_at=run_at or timezone.now(),
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+
+
+def backoff(attempts):
+    """Seconds before retrying a job that failed `attempts` times"""
+    delay = min(settings.JOB_RETRY_BACKOFF * 2 ** (attempts - 1), settings.JOB_RETRY_BACKOFF_MAX)
+    return delay * random.uniform(1, 1.1)  # spread retries of jobs that failed together
+
+
+def claim(worker, limit):
+    """Lock up to `limit` due jobs for `worker` and mark them RUNNING"""
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=JobStatus.QUEUED, run_at__lte=now)
+            .order_by('run_at', 'pk')[:limit]
+        )
+        if jobs:
+            Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                status=JobStatus.RUNNING, locked_by=worker, locked_at=now, attempts=F('attempts') + 1,
+            )
+    for job in jobs:
+        job.status, job.locked_by, job.locked_at, job.attempts = JobStatus.RUNNING, worker, now, job.attempts + 1
+    return jobs
+
+
+def _held(job):
+    """The job's row, if the worker that claimed it still holds it"""
+    return Job.objects.filter(pk=job.pk, status=JobStatus.RUNNING, locked_by=job.locked_by)
+
+
+def run(job):
+    """
+    Call a claimed job's task and record the outcome; returns True if it
+    succeeded, None if the job was taken back before it started
+    """
+    # Jobs wait in their batch for the ones before them: renew the lock, or skip a job requeue_stale() took back
+    job.locked_at = timezone.now()
+    if not _held(job).update(locked_at=job.locked_at):
+        logger.warning('Job %s was taken back from %s before it started', job, job.locked_by)
+        return None
+    func = TASKS.get(job.task)
+    try:
+        if func is None:
+            raise LookupError(f'Unknown job task {job.task!r}')
+        func(**job.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        now = timezone.now()
+        if func is not None and job.attempts < job.max_attempts:
+            delay = backoff(job.attempts)
+            logger.warning('Job %s failed (attempt %d/%d), retrying in %.0fs\n%s',
+                           job, job.attempts, job.max_attempts, delay, error)
+            updates = {'status': JobStatus.QUEUED, 'run_at': now + timedelta(seconds=delay)}
+        else:
+            logger.error('Job %s failed for good after %d attempts\n%s', job, job.attempts, error)
+            updates = {'status': JobStatus.FAILED, 'finished_at': now}
+        _held(job).update(last_error=error, locked_by='', locked_at=None, **updates)
+        return False
+    _held(job).update(status=JobStatus.DONE, finished_at=timezone.now(), locked_by='', locked_at=None)
+    return True
+
+
+def enqueue_scheduled():
+    """Queue the scheduled jobs that are due; runs missed while no worker was up are skipped"""
+    now = timezone.now()
+    count = 0
+    with transaction.atomic():
+        due = ScheduledJob.objects.select_for_update(skip_locked=True).filter(enabled=True, next_run_at__lte=now)
+        for schedule in due:
+            Job.objects.create(task=schedule.task, kwargs=schedule.kwargs, max_attempts=settings.JOB_MAX_ATTEMPTS)
+            periods = (now - schedule.next_run_at) // schedule.interval + 1
+            schedule.next_run_at += schedule.interval * periods
+            schedule.last_enqueued_at = now
+            schedule.save(update_fields=['next_run_at', 'last_enqueued_at'])
+            count += 1
+    return count
+
+
+def requeue_stale():
+    """Queue again the jobs of workers that died while running them, or fail those out of attempts"""
+    now = timezone.now()
+    stale = Job.objects.filter(status=JobStatus.RUNNING, locked_at__lt=now - timedelta(seconds=settings.JOB_TIMEOUT))
+    lost = {'locked_by': '', 'locked_at': None, 'last_error': 'Worker lost while running the job'}
+    stale.filter(attempts__gte=F('max_attempts')).update(status=JobStatus.FAILED, finished_at=now, **lost)
+    return stale.update(status=JobStatus.QUEUED, **lost)
+
+
+def work(stop, once=False):
+    """
+    Claim and run jobs until the `stop` event is set; with once=True, return
+    when no job is due instead of polling. Returns the number of jobs run.
+    """
+    worker = f'{socket.gethostname()}:{os.getpid()}'
+    done = 0
+    while not stop.is_set():
+        enqueue_scheduled()
+        requeue_stale()
+        jobs = claim(worker, settings.JOB_BATCH_SIZE)
+        for job in jobs:
+            if run(job) is not None:
+                done += 1
+        if once:
+            if not jobs:
+                break
+            continue
+        close_old_connections()  # drop broken or expired connections between batches
+        if not jobs:
+            stop.wait(settings.JOB_POLL_INTERVAL)
+    return done
+
+
+def purge_finished():
+    """Delete DONE jobs older than JOB_RETENTION_DAYS (FAILED ones stay for inspection)"""
+    cutoff = timezone.now() - timedelta(days=settings.JOB_RETENTION_DAYS)
+    return Job.objects.filter(status=JobStatus.DONE, finished_at__lt=cutoff).delete()[0]
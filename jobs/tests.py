@@ -0,0 +1,145 @@
+import io
+import threading
+from datetime import timedelta
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from customers.models import Customer
+from orders.models import DeliveryMethod, Order
+from settings.models import Settings
+from . import queue
+from .models import Job, JobStatus, ScheduledJob
+
+calls = []
+
+
+@queue.task('jobs.tests.flaky')
+def flaky(fail):
+    calls.append(fail)
+    if fail:
+        raise RuntimeError('gateway down')
+
+
+@queue.task('jobs.tests.taken_over')
+def taken_over():
+    # As if this worker stalled past JOB_TIMEOUT and another claimed the job
+    Job.objects.filter(status=JobStatus.RUNNING).update(locked_by='other-worker')
+
+
+def run_due():
+    return queue.work(threading.Event(), once=True)
+
+
+def clear_schedule():
+    # The default maintenance schedule (migration 0002) would queue its jobs too
+    ScheduledJob.objects.all().delete()
+
+
+class OrderNotificationJobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        clear_schedule()
+        cls.customer = Customer.objects.create(full_name='Ahmed', phone_number='0500000001', email='ahmed@example.com',
+                                               address_line1='Street 1', city='Dubai', emirate='DUBAI')
+        app_settings = Settings.load()
+        app_settings.email_notifications = app_settings.order_alerts = True
+        app_settings.save()
+
+    def test_lifecycle_changes_queue_jobs(self):
+        order = Order.objects.create(customer=self.customer, delivery_method=DeliveryMethod.FARM_PICKUP)
+        order = Order.objects.get(pk=order.pk)
+        order.delivery_notes = 'Gate 2'
+        order.save()
+        order.status = 'CONFIRMED'
+        order.save()
+        self.assertEqual(list(Job.objects.order_by('pk').values_list('task', 'kwargs')), [
+            ('orders.order_placed', {'order_id': order.pk}),
+            ('orders.status_changed', {'order_id': order.pk, 'status': 'CONFIRMED'}),
+        ])
+
+    def test_worker_sends_the_notifications(self):
+        order = Order.objects.create(customer=self.customer, delivery_method=DeliveryMethod.FARM_PICKUP)
+        order.status = 'CONFIRMED'
+        order.save()
+        self.assertEqual(len(mail.outbox), 0)  # nothing is sent in the request
+        call_command('run_jobs', '--once', stdout=io.StringIO())
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox),
+                         ['admin@farmcloud.ae', 'ahmed@example.com', 'ahmed@example.com'])
+        self.assertIn('is now confirmed', mail.outbox[-1].body)
+        self.assertFalse(Job.objects.exclude(status=JobStatus.DONE).exists())
+
+
+@override_settings(JOB_RETRY_BACKOFF=60)
+class JobQueueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        clear_schedule()
+
+    def setUp(self):
+        calls.clear()
+
+    def test_failed_jobs_retry_with_backoff_then_fail(self):
+        job = queue.enqueue('jobs.tests.flaky', max_attempts=2, fail=True)
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            self.assertEqual(run_due(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (JobStatus.QUEUED, 1))
+        self.assertGreaterEqual(job.run_at, timezone.now() + timedelta(seconds=55))
+        self.assertEqual(run_due(), 0)  # not due yet
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            run_due()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (JobStatus.FAILED, 2))
+        self.assertIn('gateway down', job.last_error)
+        self.assertEqual(calls, [True, True])
+
+    def test_unknown_tasks_are_refused(self):
+        with self.assertRaises(ValueError):
+            queue.enqueue('jobs.tests.missing')
+
+    def test_scheduled_jobs_are_queued_once_per_interval(self):
+        schedule = ScheduledJob.objects.create(name='test-flaky', task='jobs.tests.flaky', kwargs={'fail': False},
+                                               next_run_at=timezone.now() - timedelta(hours=25))
+        self.assertEqual(queue.enqueue_scheduled(), 1)
+        self.assertEqual(queue.enqueue_scheduled(), 0)
+        schedule.refresh_from_db()
+        # The missed run is skipped, not caught up
+        self.assertGreater(schedule.next_run_at, timezone.now())
+        self.assertLess(schedule.next_run_at, timezone.now() + timedelta(days=1))
+        run_due()
+        self.assertEqual(calls, [False])
+
+    @override_settings(JOB_TIMEOUT=60)
+    def test_jobs_of_lost_workers_run_again(self):
+        job = queue.enqueue('jobs.tests.flaky', fail=False)
+        queue.claim('dead-worker', 1)
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(run_due(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (JobStatus.DONE, 2))
+
+    @override_settings(JOB_TIMEOUT=60)
+    def test_claimed_jobs_are_locked_from_when_they_start(self):
+        first = queue.enqueue('jobs.tests.flaky', fail=False)
+        second = queue.enqueue('jobs.tests.flaky', fail=False)
+        claimed = queue.claim('slow-worker', 2)
+        # The first job took five minutes: the second has waited that long in the batch
+        Job.objects.update(locked_at=timezone.now() - timedelta(minutes=5))
+        self.assertTrue(queue.run(claimed[0]))
+        self.assertEqual(queue.requeue_stale(), 1)
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            self.assertIsNone(queue.run(claimed[1]))  # taken back: the next claim runs it
+        self.assertEqual(calls, [False])
+        self.assertEqual(Job.objects.get(pk=first.pk).status, JobStatus.DONE)
+        self.assertEqual(Job.objects.get(pk=second.pk).status, JobStatus.QUEUED)
+
+    def test_outcomes_are_recorded_only_by_the_holder(self):
+        job = queue.enqueue('jobs.tests.taken_over')
+        self.assertEqual(run_due(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by), (JobStatus.RUNNING, 'other-worker'))
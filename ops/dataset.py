@@ -0,0 +1,490 @@
+"""
+Deterministic synthetic dataset for load and performance testing
+
+`generate()` fills breeds, locations, offers, customers (UAE phones and
+emirates), animals, orders, order items and deliveries at a size set by
+`scale` (1.0 = SCALE_ROWS; 50 gives a million customers and 2.5 million
+orders).
+
+Rows are produced in chunks, column by column, from an RNG seeded with
+(seed, table, chunk): the same seed, end date and chunk size give the same
+data however many workers load it. Primary keys are assigned up front, so
+related rows never have to be read back, and chunks load in parallel worker
+processes - with COPY on PostgreSQL, batched INSERTs elsewhere.
+"""
+import io
+import itertools
+import json
+import math
+import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from time import perf_counter
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max, OuterRef, Subquery
+from django.utils import timezone
+
+from customers.models import Customer
+from farmcloud import dbpool, respcache
+from inventory.models import (
+    Animal, AnimalEvent, Breed, HerdSnapshot, Location, LocationOccupancy, Offer, StockAlert, StockThreshold,
+)
+from orders.models import Delivery, Order, OrderItem
+
+# Rows per table at scale 1.0
+SCALE_ROWS = {
+    'customers': 20_000,
+    'animals': 10_000,
+    'offers': 200,
+    'orders': 50_000,
+}
+HISTORY_DAYS = 730
+INSERT_BATCH_SIZE = 2000
+MAX_ITEMS_PER_ORDER = 4
+
+# Children before parents, so plain DELETEs respect foreign keys
+TRUNCATE_MODELS = [
+    OrderItem, Delivery, Order, Customer, StockAlert, StockThreshold, AnimalEvent, HerdSnapshot,
+    LocationOccupancy, Animal, Offer, Breed, Location,
+]
+
+BREEDS = [
+    # name, animal_type, weight range (kg), description
+    ('Boer', 'GOAT', 25, 35, 'Premium meat goat breed'),
+    ('Damascus', 'GOAT', 30, 40, 'Large Syrian goat'),
+    ('Jamnapari', 'GOAT', 35, 50, 'Tall Indian goat'),
+    ('Barbari', 'GOAT', 20, 30, 'Compact goat, popular for home slaughter'),
+    ('Nubian', 'GOAT', 30, 45, 'Dual-purpose goat'),
+    ('Najdi', 'SHEEP', 35, 45, 'Traditional Arabian sheep'),
+    ('Awassi', 'SHEEP', 38, 48, 'Hardy Middle Eastern sheep'),
+    ('Naeimi', 'SHEEP', 30, 42, 'Gulf fat-tailed sheep'),
+    ('Harri', 'SHEEP', 32, 44, 'Saudi desert sheep'),
+    ('Sawakni', 'SHEEP', 28, 40, 'Sudanese sheep, Eid favourite'),
+]
+SITES = ['Main Farm', 'Al Ain', 'Liwa', 'Al Dhaid', 'Hatta', 'Mleiha', 'Al Khatim', 'Sweihan']
+
+EMIRATES = [
+    # code, weight, cities, areas
+    ('DUBAI', 35, ['Dubai'], ['Al Barsha', 'Deira', 'Jumeirah', 'Mirdif', 'Al Quoz', 'Dubai Marina', 'Al Warqa']),
+    ('ABU_DHABI', 25, ['Abu Dhabi', 'Al Ain'], ['Khalifa City', 'Al Reem', 'Mussafah', 'Al Mushrif', 'Al Jimi']),
+    ('SHARJAH', 18, ['Sharjah'], ['Al Majaz', 'Al Nahda', 'Muwaileh', 'Al Khan']),
+    ('AJMAN', 8, ['Ajman'], ['Al Nuaimiya', 'Al Rashidiya', 'Al Jurf']),
+    ('RAS_AL_KHAIMAH', 6, ['Ras Al Khaimah'], ['Al Nakheel', 'Al Hamra', 'Khuzam']),
+    ('FUJAIRAH', 4, ['Fujairah'], ['Al Faseel', 'Merashid']),
+    ('UMM_AL_QUWAIN', 4, ['Umm Al Quwain'], ['Al Salamah', 'Al Raas']),
+]
+FIRST_NAMES = [
+    'Mohammed', 'Ahmed', 'Ali', 'Omar', 'Khalid', 'Saeed', 'Hamdan', 'Rashid', 'Yousef', 'Abdullah', 'Sultan',
+    'Fatima', 'Mariam', 'Aisha', 'Noura', 'Hessa', 'Latifa', 'Sara', 'Layla', 'Rahul', 'Arjun', 'Priya',
+    'Imran', 'Bilal', 'Jose', 'Maria', 'John', 'Anna',
+]
+LAST_NAMES = [
+    'Al Mansoori', 'Al Nuaimi', 'Al Shamsi', 'Al Ketbi', 'Al Falasi', 'Al Mazrouei', 'Al Suwaidi', 'Al Hashimi',
+    'Al Zaabi', 'Al Marri', 'Khalil', 'Hassan', 'Haddad', 'Nair', 'Menon', 'Sharma', 'Khan', 'Qureshi',
+    'Santos', 'Reyes', 'Smith',
+]
+# UAE mobile prefixes: 050, 052, 054, 055, 056, 058
+MOBILE_PREFIXES = '024568'
+
+OFFER_TYPES = [('WHOLE', 'Whole', 1.0), ('HALF', 'Half', 0.55), ('QUARTER', 'Quarter', 0.3),
+               ('PACKAGE', 'Family Pack', 0.4), ('CUTS', 'Premium Cuts', 0.35)]
+ORDER_STATUS_SETTLED = (['COMPLETED', 'DELIVERED', 'CANCELLED'], [80, 10, 10])
+ORDER_STATUS_OPEN = (['PENDING', 'CONFIRMED', 'PREPARING', 'READY', 'OUT_FOR_DELIVERY'], [30, 25, 20, 15, 10])
+TIME_SLOTS = ['8:00 AM - 10:00 AM', '10:00 AM - 12:00 PM', '2:00 PM - 4:00 PM', '4:00 PM - 6:00 PM', '6:00 PM - 8:00 PM']
+DRIVERS = ['Imran Khan', 'Suresh Kumar', 'Abdul Rahman', 'Joseph Mathew', 'Tariq Mahmood', 'Ravi Nair']
+
+
+def plan(scale):
+    """Row counts per table for a scale"""
+    counts = {table: max(1, round(rows * scale)) for table, rows in SCALE_ROWS.items()}
+    counts['breeds'] = len(BREEDS)
+    counts['locations'] = max(2, round(10 * math.sqrt(scale)))
+    return counts
+
+
+def _rng(seed, table, chunk):
+    return random.Random(f'{seed}:{table}:{chunk}')
+
+
+def _money(value):
+    return f'{value:.2f}'
+
+
+def phone_number(n):
+    """Unique UAE mobile number for customer n (unique up to 60 million customers)"""
+    body = (n // len(MOBILE_PREFIXES) * 2654435761) % 10_000_000
+    return f'05{MOBILE_PREFIXES[n % len(MOBILE_PREFIXES)]}{body:07d}'
+
+
+# Generators: (rng, first id, row count, context) -> {column: [values]}
+
+def breeds_columns(rng, start, n, context):
+    rows = BREEDS[start - 1:start - 1 + n]
+    return {
+        'id': list(range(start, start + n)),
+        'name': [row[0] for row in rows],
+        'animal_type': [row[1] for row in rows],
+        'typical_weight_min': [_money(row[2]) for row in rows],
+        'typical_weight_max': [_money(row[3]) for row in rows],
+        'description': [row[4] for row in rows],
+    }
+
+
+def locations_columns(rng, start, n, context):
+    ids = list(range(start, start + n))
+    names = ['Main Farm' if i == 1 else f'{SITES[i % len(SITES)]} Pen {i}' for i in ids]
+    created = context['start_at']
+    return {
+        'id': ids,
+        'name': names,
+        'capacity': [None if i == 1 else rng.choice([200, 500, 1000, 2000]) for i in ids],
+        'created_at': [created] * n,
+        'updated_at': [created] * n,
+    }
+
+
+def offers_columns(rng, start, n, context):
+    ids = list(range(start, start + n))
+    kinds = rng.choices(OFFER_TYPES, k=n)
+    breeds = rng.choices(BREEDS, k=n)
+    prices = [round(rng.uniform(900, 2200) * kind[2], -1) for kind in kinds]
+    discounted = [rng.random() < 0.25 for _ in ids]
+    created = context['start_at']
+    names = [f'{kind[1]} {breed[1].title()} - {breed[0]}' for kind, breed in zip(kinds, breeds)]
+    return {
+        'id': ids,
+        'name': names,
+        'slug': [f'{name.lower().replace(" - ", "-").replace(" ", "-")}-{i}' for name, i in zip(names, ids)],
+        'offer_type': [kind[0] for kind in kinds],
+        'animal_type': [breed[1] for breed in breeds],
+        'description': [f'{breed[0]} {breed[1].lower()}, {breed[2]}-{breed[3]}kg live weight' for breed in breeds],
+        'price': [_money(price) for price in prices],
+        'original_price': [_money(price * 1.15) if sale else None for price, sale in zip(prices, discounted)],
+        'is_active': [rng.random() < 0.9 for _ in ids],
+        'is_featured': [rng.random() < 0.1 for _ in ids],
+        'stock_quantity': [rng.randint(0, 40) for _ in ids],
+        'display_order': ids,
+        'created_at': [created] * n,
+        'updated_at': [created] * n,
+    }
+
+
+def customers_columns(rng, start, n, context):
+    ids = list(range(start, start + n))
+    emirates = rng.choices(EMIRATES, weights=[e[1] for e in EMIRATES], k=n)
+    firsts = rng.choices(FIRST_NAMES, k=n)
+    lasts = rng.choices(LAST_NAMES, k=n)
+    joined = [context['start_at'] + timedelta(seconds=rng.randrange(context['history_seconds'])) for _ in ids]
+    return {
+        'id': ids,
+        'full_name': [f'{first} {last}' for first, last in zip(firsts, lasts)],
+        'phone_number': [phone_number(i) for i in ids],
+        'email': [
+            f'{first.lower()}.{last.lower().replace(" ", "")}{i}@example.ae' if rng.random() < 0.6 else ''
+            for first, last, i in zip(firsts, lasts, ids)
+        ],
+        'address_line1': [
+            f'Villa {rng.randint(1, 300)}, Street {rng.randint(1, 80)}, {rng.choice(emirate[3])}' for emirate in emirates
+        ],
+        'city': [rng.choice(emirate[2]) for emirate in emirates],
+        'emirate': [emirate[0] for emirate in emirates],
+        'customer_type': rng.choices(['INDIVIDUAL', 'BUSINESS'], weights=[92, 8], k=n),
+        'preferred_language': rng.choices(['EN', 'AR'], weights=[60, 40], k=n),
+        'is_vip': [rng.random() < 0.03 for _ in ids],
+        'created_at': joined,
+        'updated_at': joined,
+    }
+
+
+def animals_columns(rng, start, n, context):
+    ids = list(range(start, start + n))
+    breed_ids = [rng.randint(1, len(BREEDS)) for _ in ids]
+    breeds = [BREEDS[breed_id - 1] for breed_id in breed_ids]
+    weights = [rng.uniform(breed[2] * 0.85, breed[3] * 1.1) for breed in breeds]
+    acquired = [context['end_date'] - timedelta(days=rng.randrange(HISTORY_DAYS)) for _ in ids]
+    acquired_at = [timezone.make_aware(datetime.combine(day, time(8))) for day in acquired]
+    return {
+        'id': ids,
+        'tag_number': [f'{"GT" if breed[1] == "GOAT" else "SH"}-{i:07d}' for breed, i in zip(breeds, ids)],
+        'animal_type': [breed[1] for breed in breeds],
+        'breed_id': breed_ids,
+        'weight': [_money(weight) for weight in weights],
+        'age_months': [rng.randint(6, 36) for _ in ids],
+        'gender': rng.choices(['MALE', 'FEMALE'], weights=[65, 35], k=n),
+        'color': rng.choices(['', 'White', 'Brown', 'Black', 'Mixed'], k=n),
+        'status': rng.choices(['AVAILABLE', 'RESERVED', 'SOLD', 'PROCESSING'], weights=[55, 10, 30, 5], k=n),
+        'price': [_money(round(weight * rng.uniform(38, 55), -1)) for weight in weights],
+        'date_acquired': acquired,
+        'location_id': [rng.randint(1, context['counts']['locations']) for _ in ids],
+        'created_at': acquired_at,
+        'updated_at': acquired_at,
+    }
+
+
+def orders_columns(rng, start, n, context):
+    """Orders plus their items and deliveries, as {table: columns}"""
+    offers = context['offers']
+    end_at, history = context['end_at'], context['history_seconds']
+    orders = {column: [] for column in (
+        'id', 'order_number', 'customer_id', 'status', 'delivery_method', 'delivery_address', 'delivery_date',
+        'delivery_time_slot', 'payment_status', 'payment_method', 'subtotal', 'delivery_fee', 'discount_amount',
+        'total_amount', 'amount_paid', 'created_at', 'updated_at', 'confirmed_at', 'completed_at',
+    )}
+    items = {column: [] for column in (
+        'id', 'order_id', 'offer_id', 'item_name', 'quantity', 'unit_price', 'total_price', 'created_at',
+    )}
+    deliveries = {column: [] for column in (
+        'id', 'order_id', 'driver_name', 'driver_phone', 'dispatched_at', 'delivered_at', 'created_at', 'updated_at',
+    )}
+
+    for order_id in range(start, start + n):
+        # Skewed towards recent months
+        created = end_at - timedelta(seconds=int(history * rng.random() ** 1.5))
+        settled = end_at - created > timedelta(days=7)
+        statuses, weights = ORDER_STATUS_SETTLED if settled else ORDER_STATUS_OPEN
+        status = rng.choices(statuses, weights=weights)[0]
+        home = rng.random() < 0.7
+
+        subtotal = Decimal(0)
+        for position in range(rng.choices([1, 2, 3, 4], weights=[45, 30, 15, 10])[0]):
+            offer_id, name, price = offers[rng.randrange(len(offers))]
+            quantity = rng.choices([1, 2, 3], weights=[80, 15, 5])[0]
+            subtotal += price * quantity
+            items['id'].append((order_id - 1) * MAX_ITEMS_PER_ORDER + position + 1)
+            items['order_id'].append(order_id)
+            items['offer_id'].append(offer_id)
+            items['item_name'].append(name)
+            items['quantity'].append(quantity)
+            items['unit_price'].append(str(price))
+            items['total_price'].append(str(price * quantity))
+            items['created_at'].append(created)
+
+        fee = Decimal(50) if home else Decimal(0)
+        discount = (subtotal * Decimal('0.05')).quantize(Decimal('0.01')) if rng.random() < 0.1 else Decimal(0)
+        total = subtotal + fee - discount
+        paid = total if status in ('COMPLETED', 'DELIVERED') else (
+            Decimal(0) if status in ('PENDING', 'CANCELLED') else rng.choice([Decimal(0), total])
+        )
+        delivery_day = (created + timedelta(days=rng.randint(1, 5))).date()
+        finished = created + timedelta(days=rng.randint(1, 5), hours=rng.randint(1, 8))
+        done = status in ('COMPLETED', 'DELIVERED')
+
+        orders['id'].append(order_id)
+        orders['order_number'].append(f'ORD-{created:%Y%m%d}-{order_id:07d}')
+        orders['customer_id'].append(rng.randint(1, context['counts']['customers']))
+        orders['status'].append(status)
+        orders['delivery_method'].append('HOME_DELIVERY' if home else 'FARM_PICKUP')
+        orders['delivery_address'].append(
+            f'Villa {rng.randint(1, 300)}, Street {rng.randint(1, 80)}' if home else ''
+        )
+        orders['delivery_date'].append(delivery_day)
+        orders['delivery_time_slot'].append(rng.choice(TIME_SLOTS))
+        orders['payment_status'].append('PAID' if paid >= total else 'UNPAID')
+        orders['payment_method'].append(rng.choice(['CASH', 'CARD', 'BANK_TRANSFER', 'ONLINE']))
+        orders['subtotal'].append(str(subtotal))
+        orders['delivery_fee'].append(str(fee))
+        orders['discount_amount'].append(str(discount))
+        orders['total_amount'].append(str(total))
+        orders['amount_paid'].append(str(paid))
+        orders['created_at'].append(created)
+        orders['updated_at'].append(finished if done else created)
+        orders['confirmed_at'].append(None if status == 'PENDING' else created + timedelta(hours=1))
+        orders['completed_at'].append(finished if done else None)
+
+        if home and status != 'CANCELLED':
+            dispatched = status in ('OUT_FOR_DELIVERY', 'DELIVERED', 'COMPLETED')
+            deliveries['id'].append(order_id)
+            deliveries['order_id'].append(order_id)
+            deliveries['driver_name'].append(rng.choice(DRIVERS) if dispatched else '')
+            deliveries['driver_phone'].append(phone_number(rng.randrange(10_000)) if dispatched else '')
+            deliveries['dispatched_at'].append(finished - timedelta(hours=1) if dispatched else None)
+            deliveries['delivered_at'].append(finished if done else None)
+            deliveries['created_at'].append(created)
+            deliveries['updated_at'].append(finished if done else created)
+
+    return {'orders': orders, 'items': items, 'deliveries': deliveries}
+
+
+TABLES = {
+    # name: (model, generator); orders also yields items and deliveries
+    'breeds': (Breed, breeds_columns),
+    'locations': (Location, locations_columns),
+    'offers': (Offer, offers_columns),
+    'customers': (Customer, customers_columns),
+    'animals': (Animal, animals_columns),
+    'orders': (Order, orders_columns),
+    'items': (OrderItem, None),
+    'deliveries': (Delivery, None),
+}
+# Loaded in this order; tables within one phase load in parallel
+PHASES = [['breeds', 'locations', 'offers'], ['customers', 'animals'], ['orders']]
+
+
+def _copy_value(value):
+    if value is None:
+        return '\\N'
+    if value is True or value is False:
+        return 't' if value else 'f'
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def load(model, columns):
+    """Insert {column: [values]}; columns left out get the field default"""
+    n = len(columns['id'])
+    fields = model._meta.concrete_fields
+    names = [field.column for field in fields]
+    values = [
+        columns[field.attname] if field.attname in columns else itertools.repeat(field.get_default(), n)
+        for field in fields
+    ]
+    table = connection.ops.quote_name(model._meta.db_table)
+    quoted = ', '.join(connection.ops.quote_name(name) for name in names)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            buffer = io.StringIO()
+            for row in zip(*values):
+                buffer.write('\t'.join(_copy_value(value) for value in row))
+                buffer.write('\n')
+            buffer.seek(0)
+            sql = f'COPY {table} ({quoted}) FROM STDIN'
+            raw = cursor.cursor
+            if hasattr(raw, 'copy_expert'):  # psycopg2
+                raw.copy_expert(sql, buffer)
+            else:  # psycopg 3
+                with raw.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
+        else:
+            prepared = [
+                [field.get_db_prep_save(value, connection) for value in column]
+                if field.get_internal_type() in ('DateTimeField', 'DateField', 'DecimalField', 'JSONField')
+                else column
+                for field, column in zip(fields, values)
+            ]
+            sql = f'INSERT INTO {table} ({quoted}) VALUES ({", ".join(["%s"] * len(fields))})'
+            rows = list(zip(*prepared))
+            for offset in range(0, n, INSERT_BATCH_SIZE):
+                cursor.executemany(sql, rows[offset:offset + INSERT_BATCH_SIZE])
+    return n
+
+
+def load_chunk(job):
+    """Generate and load one chunk (runs in a worker process)"""
+    table, chunk, start, n, context = job
+    model, generator = TABLES[table]
+    columns = generator(_rng(context['seed'], table, chunk), start, n, context)
+    try:
+        if table == 'orders':
+            return {name: load(TABLES[name][0], data) for name, data in columns.items() if data['id']}
+        return {table: load(model, columns)}
+    finally:
+        connection.close()
+
+
+def _worker_init():
+    import django
+    django.setup()
+
+
+def truncate():
+    tables = [model._meta.db_table for model in TRUNCATE_MODELS]
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'TRUNCATE {", ".join(connection.ops.quote_name(t) for t in tables)} RESTART IDENTITY CASCADE')
+        else:
+            for table in tables:
+                cursor.execute(f'DELETE FROM {connection.ops.quote_name(table)}')
+            if connection.vendor == 'sqlite':
+                cursor.execute(
+                    f'DELETE FROM sqlite_sequence WHERE name IN ({", ".join(["%s"] * len(tables))})', tables
+                )
+
+
+def finalize():
+    """
+    Derived state the bulk load skipped: sequences, customer last orders,
+    occupancy, the animals' lifecycle history, sales rollup, cache versions
+    """
+    from inventory import lifecycle, occupancy
+    from inventory.reference import BREEDS as BREED_CACHE, OFFERS as OFFER_CACHE
+    from reports import rollup
+
+    models = [TABLES[table][0] for table in TABLES]
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), models):
+            cursor.execute(sql)
+    Customer.objects.update(last_order_date=Subquery(
+        Order.objects.filter(customer=OuterRef('pk')).order_by().values('customer')
+        .annotate(last=Max('created_at')).values('last')
+    ))
+    occupancy.rebuild()
+    lifecycle.start_history()
+    rollup.reset()  # rebuilt by the next rollup_sales run
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE ' + ', '.join(connection.ops.quote_name(model._meta.db_table) for model in models))
+    BREED_CACHE.invalidate()
+    OFFER_CACHE.invalidate()
+    respcache.bump(*models)
+
+
+def generate(scale=1.0, seed=42, workers=1, chunk_size=20_000, end_date=None):
+    """
+    Truncate and regenerate the dataset; returns {step: (rows, seconds)},
+    where tables loaded in the same phase share the phase's seconds
+    """
+    counts = plan(scale)
+    end_date = end_date or timezone.localdate()
+    end_at = timezone.make_aware(datetime.combine(end_date, time(20)))
+    context = {
+        'seed': seed,
+        'counts': counts,
+        'end_date': end_date,
+        'end_at': end_at,
+        'start_at': end_at - timedelta(days=HISTORY_DAYS),
+        'history_seconds': HISTORY_DAYS * 86400,
+    }
+    if connection.vendor == 'sqlite':
+        workers = 1  # a single writer
+
+    timings = {}
+    started = perf_counter()
+    truncate()
+    timings['truncate'] = (0, perf_counter() - started)
+
+    for phase in PHASES:
+        started = perf_counter()
+        if 'orders' in phase:
+            # Workers price order items from the offers just loaded
+            context['offers'] = list(Offer.objects.order_by('pk').values_list('pk', 'name', 'price'))
+        jobs = [
+            (table, chunk, start + 1, min(chunk_size, counts[table] - start), context)
+            for table in phase
+            for chunk, start in enumerate(range(0, counts[table], chunk_size))
+        ]
+        if workers > 1 and len(jobs) > 1:
+            # Forked workers must open their own connections: closing them is not enough with
+            # DB_POOL, they would inherit the pool and its open sockets
+            dbpool.close_pools()
+            with ProcessPoolExecutor(max_workers=workers, initializer=_worker_init) as pool:
+                results = list(pool.map(load_chunk, jobs))
+        else:
+            results = [load_chunk(job) for job in jobs]
+        loaded = {}
+        for result in results:
+            for table, rows in result.items():
+                loaded[table] = loaded.get(table, 0) + rows
+        elapsed = perf_counter() - started
+        timings.update((table, (rows, elapsed)) for table, rows in loaded.items())
+
+    started = perf_counter()
+    finalize()
+    timings['finalize'] = (0, perf_counter() - started)
+    return timings
@@ -0,0 +1,190 @@
+"""
+Mixed-workload HTTP load test for the API
+
+Each virtual user is an asyncio task on a shared httpx.AsyncClient that
+keeps picking a weighted operation - list, filter, search, create order,
+status transition - until the deadline, with its own seeded RNG so a run's
+request sequence is repeatable. Latencies are recorded per operation and
+summarized as throughput and p50/p95/p99:
+
+    fixtures = load_fixtures()
+    samples = asyncio.run(run(base_url, headers, fixtures, duration=30, concurrency=32))
+    summarize(samples, 30)  # {operation: {requests, errors, rps, p50_ms, ...}}
+
+Orders created by the test stay in the database (regenerate the dataset to
+reset it).
+"""
+import asyncio
+import random
+import socket
+import time
+
+import httpx
+
+from customers.models import Customer
+from inventory.models import Offer
+from orders.models import DeliveryMethod, OrderStatus
+
+# Status transitions exercised by the `transition_order` operation
+NEXT_STATUS = {
+    OrderStatus.PENDING: OrderStatus.CONFIRMED,
+    OrderStatus.CONFIRMED: OrderStatus.PREPARING,
+    OrderStatus.PREPARING: OrderStatus.READY,
+    OrderStatus.READY: OrderStatus.COMPLETED,
+}
+FIXTURE_SAMPLE = 500
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def load_fixtures():
+    """Ids and search terms the operations pick from, sampled from the current data"""
+    customers = list(Customer.objects.order_by('?').values_list('pk', 'full_name')[:FIXTURE_SAMPLE])
+    offers = list(Offer.objects.filter(is_active=True).values_list('pk', flat=True))
+    if not customers or not offers:
+        raise ValueError('No customers or active offers - generate a dataset first')
+    return {
+        'customers': [pk for pk, name in customers],
+        'search_terms': sorted({name.split()[-1] for pk, name in customers}),
+        'offers': offers,
+    }
+
+
+# Operations: async (client, rng, fixtures, state) -> response
+
+async def list_orders(client, rng, fixtures, state):
+    return await client.get('/api/orders/', params={'page': rng.randint(1, 5)})
+
+
+async def list_animals(client, rng, fixtures, state):
+    return await client.get('/api/animals/')
+
+
+async def filter_orders(client, rng, fixtures, state):
+    params = {'status': rng.choice(list(OrderStatus)).value, 'delivery_method': rng.choice(list(DeliveryMethod)).value}
+    return await client.get('/api/orders/', params=params)
+
+
+async def filter_animals(client, rng, fixtures, state):
+    return await client.get('/api/animals/', params={'status': 'AVAILABLE', 'animal_type': rng.choice(['GOAT', 'SHEEP'])})
+
+
+async def search_customers(client, rng, fixtures, state):
+    return await client.get('/api/customers/', params={'search': rng.choice(fixtures['search_terms'])})
+
+
+async def search_orders(client, rng, fixtures, state):
+    return await client.get('/api/orders/', params={'search': rng.choice(fixtures['search_terms'])})
+
+
+async def create_order(client, rng, fixtures, state):
+    # Timed together with adding its first item, as a checkout would
+    response = await client.post('/api/orders/', json={
+        'customer': rng.choice(fixtures['customers']),
+        'delivery_method': DeliveryMethod.FARM_PICKUP,
+        'payment_method': 'CASH',
+    })
+    if response.status_code == 201:
+        order = response.json()
+        await client.post('/api/order-items/', json={'order': order['id'], 'offer': rng.choice(fixtures['offers'])})
+        state['orders'].append((order['id'], order['status']))
+    return response
+
+
+async def transition_order(client, rng, fixtures, state):
+    if not state['orders']:
+        return await create_order(client, rng, fixtures, state)
+    index = rng.randrange(len(state['orders']))
+    pk, status = state['orders'][index]
+    status = NEXT_STATUS[status]
+    response = await client.patch(f'/api/orders/{pk}/', json={'status': status})
+    if status in NEXT_STATUS:
+        state['orders'][index] = (pk, status)
+    else:
+        state['orders'].pop(index)
+    return response
+
+
+OPERATIONS = {
+    # name: (weight, operation)
+    'list_orders': (20, list_orders),
+    'list_animals': (15, list_animals),
+    'filter_orders': (15, filter_orders),
+    'filter_animals': (10, filter_animals),
+    'search_customers': (15, search_customers),
+    'search_orders': (10, search_orders),
+    'create_order': (8, create_order),
+    'transition_order': (7, transition_order),
+}
+
+
+async def run(base_url, headers, fixtures, duration, concurrency, seed=42, warmup=0.0, operations=None):
+    """Drive the mix for `duration` seconds; returns {operation: [(seconds, status code), ...]}"""
+    operations = operations or OPERATIONS
+    names = list(operations)
+    weights = [operations[name][0] for name in names]
+    samples = {name: [] for name in names}
+    loop = asyncio.get_running_loop()
+    record_from = loop.time() + warmup
+    deadline = record_from + duration
+
+    async def user(number):
+        rng = random.Random(f'{seed}:{number}')
+        state = {'orders': []}
+        while loop.time() < deadline:
+            name = rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            try:
+                status = (await operations[name][1](client, rng, fixtures, state)).status_code
+            except httpx.HTTPError:
+                status = 0
+            if loop.time() >= record_from:
+                samples[name].append((time.perf_counter() - started, status))
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=30) as client:
+        await asyncio.gather(*(user(number) for number in range(concurrency)))
+    return samples
+
+
+def _percentile(ordered, fraction):
+    """Nearest-rank percentile of a sorted list"""
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+def _stats(latencies, errors, duration):
+    ordered = sorted(latencies)
+    result = {'requests': len(latencies) + errors, 'errors': errors, 'rps': round(len(latencies) / duration, 1)}
+    for key, fraction in (('p50_ms', 0.50), ('p95_ms', 0.95), ('p99_ms', 0.99)):
+        result[key] = round(_percentile(ordered, fraction) * 1000, 2) if ordered else None
+    result['mean_ms'] = round(sum(ordered) / len(ordered) * 1000, 2) if ordered else None
+    return result
+
+
+def summarize(samples, duration):
+    """Per-operation and overall stats; non-2xx responses count as errors and are left out of latencies"""
+    summary = {}
+    every, every_errors = [], 0
+    for name, results in samples.items():
+        latencies = [seconds for seconds, status in results if 200 <= status < 300]
+        errors = len(results) - len(latencies)
+        summary[name] = _stats(latencies, errors, duration)
+        every += latencies
+        every_errors += errors
+    summary['total'] = _stats(every, every_errors, duration)
+    return summary
+
+
+def compare(current, baseline):
+    """{operation: (rps change, p95 change)} as fractions of the baseline, for operations in both runs"""
+    changes = {}
+    for name, stats in current.items():
+        before = baseline.get(name)
+        if not before or not before['rps'] or not before['p95_ms'] or stats['p95_ms'] is None:
+            continue
+        changes[name] = (stats['rps'] / before['rps'] - 1, stats['p95_ms'] / before['p95_ms'] - 1)
+    return changes
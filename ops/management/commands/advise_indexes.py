@@ -0,0 +1,243 @@
+"""
+Propose indexes from the API query shapes recorded in production
+Run: docker-compose exec web python manage.py advise_indexes [--write-migrations]
+
+Shapes are logged by farmcloud.middleware.QueryShapeMiddleware. Each of the
+most frequent shapes is rebuilt through its viewset's own filter backends
+and replayed with EXPLAIN ANALYZE (plain EXPLAIN off PostgreSQL); shapes that
+still sequential-scan their table get a composite index proposal - partial
+when a boolean filter is fixed, covering `updated_at` when the viewset's
+conditional-GET validators aggregate over it.
+"""
+import glob
+import hashlib
+import json
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, models
+from django.db.migrations import Migration
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.operations import AddIndex
+from django.db.migrations.writer import MigrationWriter
+from django.utils.module_loading import import_string
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from farmcloud.mixins import ConditionalGetMixin
+
+SEQ_SCAN_PATTERNS = [
+    re.compile(r'Seq Scan on "?(\w+)"?'),            # PostgreSQL
+    re.compile(r'\bSCAN "?(\w+)"?(?! USING)(?:\s|$)'),  # SQLite
+]
+TRUE_VALUES = {'true', 'True', '1'}
+BOOLEAN_VALUES = TRUE_VALUES | {'false', 'False', '0'}
+
+
+class Command(BaseCommand):
+    help = 'Replay recorded API query shapes with EXPLAIN ANALYZE and propose indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--log', default=str(settings.BASE_DIR / 'logs' / 'query_shapes.log'),
+            help='Query shape log (rotated files next to it are read too)',
+        )
+        parser.add_argument('--top', type=int, default=25, help='Replay the N most frequent shapes')
+        parser.add_argument('--min-hits', type=int, default=1, help='Ignore shapes seen fewer times')
+        parser.add_argument('--database', default='default', help='Database alias to replay against')
+        parser.add_argument('--write-migrations', action='store_true', help='Write migrations for the proposals')
+
+    def handle(self, *args, **options):
+        self.connection = connections[options['database']]
+        shapes = self.load_shapes(options['log'])
+        if not shapes:
+            raise CommandError(f'No query shapes recorded in {options["log"]}*')
+
+        proposals = {}
+        for key, hits in shapes.most_common(options['top']):
+            if hits < options['min_hits']:
+                break
+            shape = json.loads(key)
+            try:
+                view_class = import_string(shape['view'])
+            except ImportError:
+                self.stderr.write(f'Skipping unknown view {shape["view"]}')
+                continue
+
+            queryset = self.build_queryset(view_class, shape, options['database'])
+            model = queryset.model
+            scans = self.sequential_scans(view_class, queryset)
+            label = self.describe(shape)
+            if model._meta.db_table not in scans:
+                self.stdout.write(f'  ok   {hits:>6} hits  {model.__name__} {label}')
+                continue
+
+            index = self.propose(view_class, model, shape, queryset)
+            if index is None:
+                self.stdout.write(f'  scan {hits:>6} hits  {model.__name__} {label}  (no index helps: search/unfiltered)')
+                continue
+            self.stdout.write(self.style.WARNING(f'  scan {hits:>6} hits  {model.__name__} {label}  -> {index.name}'))
+            proposals.setdefault(model._meta.app_label, {})[index.name] = (model._meta.model_name, index)
+
+        if not proposals:
+            self.stdout.write(self.style.SUCCESS('✓ No sequential scans left on recorded shapes'))
+            return
+
+        self.stdout.write('\nAdd to the models\' Meta.indexes:')
+        for app_label, indexes in proposals.items():
+            for model_name, index in indexes.values():
+                self.stdout.write(f'  # {app_label}.{model_name}\n  {self.render_index(index)},')
+
+        if options['write_migrations']:
+            for app_label, indexes in proposals.items():
+                path = self.write_migration(app_label, list(indexes.values()))
+                self.stdout.write(self.style.SUCCESS(f'✓ Wrote {path}'))
+
+    def load_shapes(self, path):
+        shapes = Counter()
+        for filename in sorted(glob.glob(f'{path}*')):
+            with open(filename) as fh:
+                for line in fh:
+                    line = line.strip()
+                    if line.startswith('{'):
+                        shapes[line] += 1
+        return shapes
+
+    def describe(self, shape):
+        parts = [f'{name}={value}' for name, value in sorted(shape['filters'].items())]
+        if shape['ordering']:
+            parts.append(f'ordering={shape["ordering"]}')
+        if shape['search']:
+            parts.append('search')
+        return '[' + ', '.join(parts) + ']'
+
+    def sample_value(self, model, name, database):
+        """Most common value of a filter column, standing in for '?'"""
+        row = (
+            model._default_manager.using(database)
+            .values_list(name).annotate(n=models.Count('pk')).order_by('-n').first()
+        )
+        return '' if row is None or row[0] is None else str(row[0])
+
+    def build_queryset(self, view_class, shape, database):
+        """The list queryset exactly as the viewset's filter backends build it"""
+        model = view_class.queryset.model
+        params = {
+            name: self.sample_value(model, name, database) if value == '?' else value
+            for name, value in shape['filters'].items()
+        }
+        if shape['ordering']:
+            params['ordering'] = shape['ordering']
+        if shape['search']:
+            params['search'] = 'a'
+
+        view = view_class()
+        view.request = Request(APIRequestFactory().get('/', params))
+        view.format_kwarg = None
+        view.action = 'list'
+        view.args, view.kwargs = (), {}
+        return view.filter_queryset(view.get_queryset()).using(database)
+
+    def sequential_scans(self, view_class, queryset):
+        """Tables sequentially scanned by the page query or the count/validator query"""
+        options = {'analyze': True} if self.connection.vendor == 'postgresql' else {}
+        page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE') or 50
+        columns = ['pk']
+        if issubclass(view_class, ConditionalGetMixin):
+            columns.append(view_class.validator_field)
+
+        plans = [
+            queryset[:page_size].explain(**options),
+            queryset.order_by().values(*columns).explain(**options),
+        ]
+        tables = set()
+        for plan in plans:
+            for pattern in SEQ_SCAN_PATTERNS:
+                tables.update(pattern.findall(plan))
+        return tables
+
+    def propose(self, view_class, model, shape, queryset):
+        keys, conditions = [], {}
+        for name, value in sorted(shape['filters'].items()):
+            field = model._meta.get_field(name)
+            if field.get_internal_type() == 'BooleanField' and value in BOOLEAN_VALUES:
+                # Fixed boolean filters become the partial-index condition
+                conditions[name] = value in TRUE_VALUES
+            else:
+                keys.append((bool(field.choices), name))
+        # Selective columns first, low-cardinality choice columns after
+        fields = [name for _, name in sorted(keys)]
+
+        ordering = shape['ordering'].split(',') if shape['ordering'] else list(queryset.query.order_by)
+        for term in ordering:
+            term = term.strip()
+            if term and term.lstrip('-') not in {f.lstrip('-') for f in fields}:
+                fields.append(term)
+
+        if shape['search'] and not shape['filters']:
+            return None
+        if not fields:
+            return None
+        if self.already_indexed(model, fields, conditions):
+            return None
+
+        include = []
+        if issubclass(view_class, ConditionalGetMixin) and self.connection.features.supports_covering_indexes:
+            validator = view_class.validator_field
+            if validator not in {f.lstrip('-') for f in fields}:
+                include.append(validator)
+
+        condition = models.Q(**conditions) if conditions else None
+        digest = hashlib.md5(repr((fields, sorted(conditions.items()), include)).encode()).hexdigest()[:8]
+        name = f'adv_{model._meta.model_name[:10]}_{digest}'
+        return models.Index(fields=fields, name=name, condition=condition, include=include or None)
+
+    def already_indexed(self, model, fields, conditions):
+        existing = [list(index.fields) for index in model._meta.indexes if index.condition is None]
+        for field in model._meta.fields:
+            if field.db_index or field.unique:
+                existing.append([field.name])
+        plain = [f.lstrip('-') for f in fields]
+        for columns in existing:
+            columns = [c.lstrip('-') for c in columns]
+            if columns[:len(plain)] == plain:
+                return True
+        return False
+
+    def render_index(self, index):
+        parts = [f'fields={list(index.fields)!r}', f'name={index.name!r}']
+        if index.condition is not None:
+            kwargs = ', '.join(f'{k}={v!r}' for k, v in index.condition.children)
+            parts.append(f'condition=models.Q({kwargs})')
+        if index.include:
+            parts.append(f'include={list(index.include)!r}')
+        return f'models.Index({", ".join(parts)})'
+
+    def write_migration(self, app_label, indexes):
+        loader = MigrationLoader(self.connection, ignore_no_migrations=True)
+        leaves = loader.graph.leaf_nodes(app_label)
+        number = max((int(name.split('_')[0]) for _, name in leaves), default=0) + 1
+
+        concurrent = self.connection.vendor == 'postgresql'
+        if concurrent:
+            from django.contrib.postgres.operations import AddIndexConcurrently as operation
+        else:
+            operation = AddIndex
+
+        migration = Migration(f'{number:04d}_advised_indexes', app_label)
+        migration.dependencies = leaves
+        migration.operations = [operation(model_name=model_name, index=index) for model_name, index in indexes]
+
+        writer = MigrationWriter(migration)
+        source = writer.as_string()
+        if concurrent:
+            # CREATE INDEX CONCURRENTLY can't run inside a transaction
+            source = source.replace(
+                'class Migration(migrations.Migration):\n',
+                'class Migration(migrations.Migration):\n\n    atomic = False\n',
+            )
+        with open(writer.path, 'w') as fh:
+            fh.write(source)
+        return writer.path
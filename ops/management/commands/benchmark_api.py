@@ -0,0 +1,180 @@
+"""
+Load-test the API with a concurrent mixed workload and save the results as JSON
+Run: docker-compose exec web python manage.py benchmark_api [--scale 1 --noinput] [--duration 30] [--concurrency 32]
+
+Boots the production server (python -m farmcloud.serve) on a free local
+port - or targets --url - and drives it with --concurrency asyncio clients
+running the mix in ops.loadtest for --duration seconds, after --warmup
+unrecorded seconds. With --scale the dataset is regenerated first (see
+generate_dataset); otherwise the current data is used. Requests are made
+as a benchmark admin user, with throttling lifted on the booted server.
+
+Throughput and p50/p95/p99 per operation are printed and written to
+--output (default benchmarks/api-<commit>-<time>.json) together with the
+commit, options and row counts; --compare prints the change against an
+earlier result file.
+"""
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from rest_framework_simplejwt.tokens import AccessToken
+
+from customers.models import Customer
+from inventory.models import Animal
+from ops import loadtest
+from orders.models import Order, OrderItem
+from users.models import User
+
+
+def _git_commit():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=settings.BASE_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f'{commit}-dirty' if dirty else commit
+
+
+class Command(BaseCommand):
+    help = 'Benchmark API endpoints under a concurrent mixed workload'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Benchmark a running server instead of booting one')
+        parser.add_argument('--workers', type=int, default=settings.SERVE_WORKERS, help='Booted server workers')
+        parser.add_argument('--scale', type=float, help='Regenerate the dataset at this scale first')
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive',
+                            help='Do not ask before regenerating the dataset')
+        parser.add_argument('--duration', type=float, default=30.0, help='Recorded seconds of load')
+        parser.add_argument('--warmup', type=float, default=5.0, help='Unrecorded seconds of load first')
+        parser.add_argument('--concurrency', type=int, default=32, help='Concurrent virtual users')
+        parser.add_argument('--seed', type=int, default=42, help='Seed of the virtual users')
+        parser.add_argument('--operations', nargs='+', choices=sorted(loadtest.OPERATIONS),
+                            help='Run only these operations (default: the full mix)')
+        parser.add_argument('--output', help='Result file (default: benchmarks/api-<commit>-<time>.json)')
+        parser.add_argument('--compare', help='Earlier result file to compare against')
+        parser.add_argument('--startup-timeout', type=float, default=60.0, help='Seconds to wait for the server')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as file:
+                baseline = json.load(file)
+
+        if options['scale'] is not None:
+            generate = ['--scale', str(options['scale'])] + ([] if options['interactive'] else ['--noinput'])
+            call_command('generate_dataset', *generate, stdout=self.stdout)
+
+        fixtures = loadtest.load_fixtures()
+        rows = {
+            'customers': Customer.objects.count(),
+            'animals': Animal.objects.count(),
+            'orders': Order.objects.count(),
+            'items': OrderItem.objects.count(),
+        }
+        user, _ = User.objects.get_or_create(
+            username='benchmark-admin', defaults={'role': 'ADMIN', 'is_staff': True, 'is_superuser': True},
+        )
+        host = next((h for h in settings.ALLOWED_HOSTS if h != '*'), 'localhost').lstrip('.')
+        headers = {'Host': host, 'X-Forwarded-Proto': 'https', 'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+        operations = {name: loadtest.OPERATIONS[name] for name in options['operations'] or loadtest.OPERATIONS}
+        connections.close_all()
+
+        self.stdout.write(
+            f'{len(operations)} operations x {options["concurrency"]} users for {options["duration"]:.0f}s '
+            f'({rows["orders"]:,} orders, {rows["customers"]:,} customers)'
+        )
+        started_at = datetime.now(timezone.utc)
+        if options['url']:
+            samples = self.load(options['url'].rstrip('/'), headers, fixtures, operations, options)
+        else:
+            samples = self.boot_and_load(headers, fixtures, operations, options)
+        results = loadtest.summarize(samples, options['duration'])
+
+        self.report(results, baseline['results'] if baseline else None)
+        commit = _git_commit()
+        output = options['output'] or os.path.join(
+            settings.BASE_DIR, 'benchmarks', f'api-{commit or "unknown"}-{started_at:%Y%m%dT%H%M%S}.json',
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w') as file:
+            json.dump({
+                'commit': commit,
+                'started_at': started_at.isoformat(),
+                'target': options['url'] or f'farmcloud.serve ({options["workers"]} workers)',
+                'options': {key: options[key] for key in ('duration', 'warmup', 'concurrency', 'seed')},
+                'operations': {name: weight for name, (weight, operation) in operations.items()},
+                'rows': rows,
+                'results': results,
+            }, file, indent=2)
+
+        total = results['total']
+        if total['errors']:
+            self.stdout.write(self.style.WARNING(f'{total["errors"]} requests failed'))
+        self.stdout.write(self.style.SUCCESS(f'✓ {total["rps"]:.0f} req/s, p95 {total["p95_ms"]} ms - saved {output}'))
+
+    def load(self, base_url, headers, fixtures, operations, options):
+        return asyncio.run(loadtest.run(
+            base_url, headers, fixtures, options['duration'], options['concurrency'],
+            seed=options['seed'], warmup=options['warmup'], operations=operations,
+        ))
+
+    def boot_and_load(self, headers, fixtures, operations, options):
+        port = loadtest.free_port()
+        env = {**os.environ, 'THROTTLE_ANON_RATE': '1000000/second', 'THROTTLE_USER_RATE': '1000000/second'}
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'farmcloud.serve', '--bind', f'127.0.0.1:{port}', '--workers', str(options['workers'])],
+            env=env, cwd=settings.BASE_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
+        )
+        try:
+            base_url = f'http://127.0.0.1:{port}'
+            self.wait_until_up(process, base_url, headers, options)
+            return self.load(base_url, headers, fixtures, operations, options)
+        finally:
+            os.killpg(process.pid, signal.SIGTERM)
+            process.wait()
+
+    def wait_until_up(self, process, base_url, headers, options):
+        deadline = time.monotonic() + options['startup_timeout']
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f'{" ".join(process.args)} exited with {process.returncode}')
+            try:
+                response = httpx.get(f'{base_url}/api/breeds/', headers=headers, timeout=5)
+            except httpx.TransportError:
+                time.sleep(0.1)
+                continue
+            if response.status_code != 200:
+                raise CommandError(f'GET /api/breeds/ returned {response.status_code}')
+            return
+        raise CommandError(f'Server did not start within {options["startup_timeout"]:.0f}s')
+
+    def report(self, results, baseline):
+        header = f'{"operation":<18} {"requests":>9} {"errors":>7} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8}'
+        changes = loadtest.compare(results, baseline) if baseline else {}
+        if baseline:
+            header += f' {"Δ req/s":>8} {"Δ p95":>7}'
+        self.stdout.write(header)
+        for name, stats in results.items():
+            line = (
+                f'{name:<18} {stats["requests"]:>9} {stats["errors"]:>7} {stats["rps"]:>8.1f} '
+                + ' '.join(f'{stats[key]:>8.1f}' if stats[key] is not None else f'{"-":>8}'
+                           for key in ('p50_ms', 'p95_ms', 'p99_ms'))
+            )
+            if name in changes:
+                rps, p95 = changes[name]
+                line += f' {rps:>+8.0%} {p95:>+7.0%}'
+            self.stdout.write(line)
@@ -0,0 +1,141 @@
+"""
+Compare request latency with per-request, persistent and pooled database connections
+Run: docker-compose exec web python manage.py benchmark_db_pool [--duration 15] [--concurrency 16] [--servers wsgi asgi]
+
+For each server entrypoint - wsgi: the production server (python -m
+farmcloud.serve), asgi: uvicorn on farmcloud.asgi, if installed - and each
+connection mode, the server is booted on a free local port and GET --path
+is requested by --concurrency asyncio clients for --duration seconds, after
+--warmup unrecorded seconds:
+
+    connect      DB_POOL=False, DB_CONN_MAX_AGE=0: connect and authenticate per request
+    persistent   DB_POOL=False, DB_CONN_MAX_AGE=600: one connection per worker thread
+    pool         DB_POOL=True: farmcloud.dbpool, DB_POOL_* settings
+
+The response cache and throttling are off on the servers under test, so
+every request reads the database.
+"""
+import asyncio
+import importlib.util
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from ops import loadtest
+
+MODES = {
+    'connect': {'DB_POOL': 'False', 'DB_CONN_MAX_AGE': '0'},
+    'persistent': {'DB_POOL': 'False', 'DB_CONN_MAX_AGE': '600'},
+    'pool': {'DB_POOL': 'True'},
+}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark request latency with per-request, persistent and pooled database connections'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/breeds/', help='Endpoint to request')
+        parser.add_argument('--servers', nargs='+', choices=['wsgi', 'asgi'], default=['wsgi'],
+                            help='Entrypoints to boot (asgi needs uvicorn)')
+        parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES),
+                            help='Connection modes to compare')
+        parser.add_argument('--duration', type=float, default=15.0, help='Recorded seconds of load per run')
+        parser.add_argument('--warmup', type=float, default=3.0, help='Unrecorded seconds of load first')
+        parser.add_argument('--concurrency', type=int, default=16, help='Concurrent clients')
+        parser.add_argument('--workers', type=int, default=settings.SERVE_WORKERS, help='Server worker processes')
+        parser.add_argument('--threads', type=int, default=settings.SERVE_THREADS, help='Threads per wsgi worker')
+        parser.add_argument('--startup-timeout', type=float, default=60.0, help='Seconds to wait for a server')
+
+    def handle(self, *args, **options):
+        if 'asgi' in options['servers'] and importlib.util.find_spec('uvicorn') is None:
+            raise CommandError('The asgi server needs uvicorn: pip install uvicorn')
+        self.host = next((h for h in settings.ALLOWED_HOSTS if h != '*'), 'localhost').lstrip('.')
+        connections.close_all()
+
+        self.stdout.write(
+            f'GET {options["path"]} x {options["concurrency"]} clients for {options["duration"]:.0f}s '
+            f'({options["workers"]} workers, {options["threads"]} threads)'
+        )
+        self.stdout.write(
+            f'{"server":<6} {"mode":<11} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"errors":>7}'
+        )
+        results = {}
+        for server in options['servers']:
+            for mode in options['modes']:
+                stats = results[server, mode] = self.measure(server, mode, options)
+                self.stdout.write(
+                    f'{server:<6} {mode:<11} {stats["rps"]:>8.1f} '
+                    + ' '.join(f'{stats[key]:>8.1f}' if stats[key] is not None else f'{"-":>8}'
+                               for key in ('p50_ms', 'p95_ms', 'p99_ms'))
+                    + f' {stats["errors"]:>7}'
+                )
+
+        for server in options['servers']:
+            pooled, connecting = results.get((server, 'pool')), results.get((server, 'connect'))
+            if pooled and connecting and pooled['p50_ms'] and connecting['p50_ms']:
+                self.stdout.write(self.style.SUCCESS(
+                    f'✓ {server}: pooled p50 {pooled["p50_ms"]:.1f} ms vs {connecting["p50_ms"]:.1f} ms '
+                    f'connecting per request ({pooled["p50_ms"] / connecting["p50_ms"] - 1:+.0%})'
+                ))
+
+    def command(self, server, port, options):
+        if server == 'asgi':
+            return [
+                sys.executable, '-m', 'uvicorn', 'farmcloud.asgi:application', '--host', '127.0.0.1',
+                '--port', str(port), '--workers', str(options['workers']), '--no-access-log',
+            ]
+        return [
+            sys.executable, '-m', 'farmcloud.serve', '--bind', f'127.0.0.1:{port}',
+            '--workers', str(options['workers']), '--threads', str(options['threads']),
+        ]
+
+    def measure(self, server, mode, options):
+        port = loadtest.free_port()
+        env = {
+            **os.environ, **MODES[mode],
+            'DEBUG_TOOLBAR': 'False', 'RESPONSE_CACHE_ENABLED': 'False',
+            'THROTTLE_ANON_RATE': '1000000/second', 'THROTTLE_USER_RATE': '1000000/second',
+        }
+        process = subprocess.Popen(
+            self.command(server, port, options), env=env, cwd=settings.BASE_DIR,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
+        )
+        base_url = f'http://127.0.0.1:{port}'
+        headers = {'Host': self.host, 'X-Forwarded-Proto': 'https'}
+        path = options['path']
+
+        async def get(client, rng, fixtures, state):
+            return await client.get(path)
+
+        try:
+            self.wait_until_up(process, base_url, headers, options)
+            samples = asyncio.run(loadtest.run(
+                base_url, headers, {}, options['duration'], options['concurrency'],
+                warmup=options['warmup'], operations={'get': (1, get)},
+            ))
+        finally:
+            os.killpg(process.pid, signal.SIGTERM)
+            process.wait()
+        return loadtest.summarize(samples, options['duration'])['total']
+
+    def wait_until_up(self, process, base_url, headers, options):
+        deadline = time.monotonic() + options['startup_timeout']
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f'{" ".join(process.args)} exited with {process.returncode}')
+            try:
+                response = httpx.get(f'{base_url}{options["path"]}', headers=headers, timeout=5)
+            except httpx.TransportError:
+                time.sleep(0.1)
+                continue
+            if response.status_code != 200:
+                raise CommandError(f'GET {options["path"]} returned {response.status_code}')
+            return
+        raise CommandError(f'{" ".join(process.args)} did not start within {options["startup_timeout"]:.0f}s')
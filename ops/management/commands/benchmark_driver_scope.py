@@ -0,0 +1,78 @@
+"""
+Show that a driver's scoped order list doesn't grow with the order table
+Run: docker-compose exec web python manage.py benchmark_driver_scope [--sizes 1000 10000 100000]
+
+Everything runs inside one transaction that is rolled back at the end: a
+driver with --assigned orders is created, then the table is padded with
+other drivers' orders up to each size and GET /api/orders/ is timed as
+that driver (full middleware/DRF stack, JWT auth).
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+
+from customers.models import Customer
+from orders.models import Delivery, DeliveryMethod, Order
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Benchmark a driver's scoped order list against growing order counts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                            help='Total order counts to measure at')
+        parser.add_argument('--assigned', type=int, default=20, help="Orders assigned to the benchmark driver")
+        parser.add_argument('--requests', type=int, default=50, help='Requests per size')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options)
+            transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS('✓ Benchmark data rolled back'))
+
+    def pad_orders(self, customer, driver, start, stop):
+        batch = 5000
+        for offset in range(start, stop, batch):
+            orders = Order.objects.bulk_create([
+                Order(order_number=f'BENCH-{n:08d}', customer=customer, delivery_method=DeliveryMethod.HOME_DELIVERY)
+                for n in range(offset, min(offset + batch, stop))
+            ])
+            Delivery.objects.bulk_create([Delivery(order=order, driver=driver) for order in orders])
+
+    def run(self, options):
+        customer = Customer.objects.create(
+            full_name='Benchmark Customer', phone_number='0500000000', address_line1='-', city='Dubai', emirate='DUBAI',
+        )
+        driver = User.objects.create(username='bench-driver', role='DELIVERY')
+        others = User.objects.create(username='bench-other-driver', role='DELIVERY')
+        self.pad_orders(customer, driver, 0, options['assigned'])
+
+        host = next((h for h in settings.ALLOWED_HOSTS if h != '*'), 'localhost').lstrip('.')
+        client = Client(HTTP_HOST=host, HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(driver)}')
+
+        total = options['assigned']
+        self.stdout.write(f'{"orders":>10} {"ms/request":>11} {"queries":>8}  rows returned')
+        for size in sorted(options['sizes']):
+            if size > total:
+                self.pad_orders(customer, others, total, size)
+                total = size
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE orders_order; ANALYZE orders_delivery')
+
+            response = client.get('/api/orders/', secure=True)
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                for _ in range(options['requests']):
+                    client.get('/api/orders/', secure=True)
+                elapsed = (time.perf_counter() - started) / options['requests']
+            self.stdout.write(
+                f'{total:>10} {elapsed * 1000:>11.2f} {len(queries) / options["requests"]:>8.1f}  '
+                f'{response.json()["count"]}'
+            )
@@ -0,0 +1,135 @@
+"""
+Compare startup time and throughput of runserver and the production server
+Run: docker-compose exec web python manage.py benchmark_serving [--duration 10] [--concurrency 16]
+
+Both servers are started as subprocesses on a free local port with the
+current settings. Startup is the time from launch until the first 200
+response and "first ms" the latency of that response; throughput is
+--concurrency client threads requesting --path for --duration seconds.
+Throttle rates are lifted for the servers under test so the rate limit
+doesn't cut the run short.
+"""
+import http.client
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ops.loadtest import free_port
+
+
+class Command(BaseCommand):
+    help = 'Benchmark runserver against the production server (python -m farmcloud.serve)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/breeds/', help='Endpoint to request')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds of load per server')
+        parser.add_argument('--concurrency', type=int, default=16, help='Concurrent client threads')
+        parser.add_argument('--workers', type=int, default=settings.SERVE_WORKERS, help='Production server workers')
+        parser.add_argument('--startup-timeout', type=float, default=60.0, help='Seconds to wait for a server')
+
+    def handle(self, *args, **options):
+        self.host = next((h for h in settings.ALLOWED_HOSTS if h != '*'), 'localhost').lstrip('.')
+        manage = str(settings.BASE_DIR / 'manage.py')
+        servers = {
+            'runserver': lambda port: [sys.executable, manage, 'runserver', f'127.0.0.1:{port}'],
+            'serve': lambda port: [
+                sys.executable, '-m', 'farmcloud.serve', '--bind', f'127.0.0.1:{port}', '--workers', str(options['workers']),
+            ],
+        }
+
+        self.stdout.write(
+            f'GET {options["path"]} x {options["concurrency"]} clients for {options["duration"]:.0f}s '
+            f'(serve: {options["workers"]} workers)'
+        )
+        self.stdout.write(f'{"server":<10} {"startup":>9} {"first ms":>9} {"req/s":>9} {"p50 ms":>8} {"p95 ms":>8} {"errors":>7}')
+        results = {}
+        for name, command in servers.items():
+            results[name] = self.measure(command, options)
+            startup, first, rps, p50, p95, errors = results[name]
+            self.stdout.write(f'{name:<10} {startup:>8.2f}s {first:>9.1f} {rps:>9.0f} {p50:>8.1f} {p95:>8.1f} {errors:>7}')
+
+        speedup = results['serve'][2] / results['runserver'][2]
+        self.stdout.write(self.style.SUCCESS(f'✓ Production server: {speedup:.1f}x runserver throughput'))
+
+    def request(self, port, path):
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        try:
+            connection.request('GET', path, headers={'Host': self.host, 'X-Forwarded-Proto': 'https'})
+            response = connection.getresponse()
+            response.read()
+            return response.status
+        finally:
+            connection.close()
+
+    def measure(self, command, options):
+        port = free_port()
+        env = {**os.environ, 'THROTTLE_ANON_RATE': '1000000/second', 'THROTTLE_USER_RATE': '1000000/second'}
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            command(port), env=env, cwd=settings.BASE_DIR,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
+        )
+        try:
+            startup, first = self.wait_until_up(process, port, options, started)
+            return (startup, first, *self.load(port, options))
+        finally:
+            os.killpg(process.pid, signal.SIGTERM)
+            process.wait()
+
+    def wait_until_up(self, process, port, options, started):
+        while time.perf_counter() - started < options['startup_timeout']:
+            if process.poll() is not None:
+                raise CommandError(f'{" ".join(process.args)} exited with {process.returncode}')
+            sent = time.perf_counter()
+            try:
+                status = self.request(port, options['path'])
+            except OSError:
+                time.sleep(0.05)
+                continue
+            if status != 200:
+                raise CommandError(f'GET {options["path"]} returned {status}')
+            now = time.perf_counter()
+            return now - started, (now - sent) * 1000
+        raise CommandError(f'{" ".join(process.args)} did not start within {options["startup_timeout"]:.0f}s')
+
+    def load(self, port, options):
+        latencies, errors = [], []
+        deadline = time.perf_counter() + options['duration']
+
+        def client():
+            own_latencies, own_errors = [], 0
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    ok = self.request(port, options['path']) == 200
+                except OSError:
+                    ok = False
+                if ok:
+                    own_latencies.append(time.perf_counter() - started)
+                else:
+                    own_errors += 1
+            latencies.extend(own_latencies)
+            errors.append(own_errors)
+
+        threads = [threading.Thread(target=client) for _ in range(options['concurrency'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if not latencies:
+            raise CommandError(f'No successful requests to {options["path"]}')
+        latencies.sort()
+        return (
+            len(latencies) / options['duration'],
+            statistics.median(latencies) * 1000,
+            latencies[int(len(latencies) * 0.95)] * 1000,
+            sum(errors),
+        )
@@ -0,0 +1,16 @@
+from django.db import models
+
+
+class ReferenceVersion(models.Model):
+    """
+    Version stamp of one reference-data cache (see farmcloud.refcache).
+    Used when no shared Redis cache is configured.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    version = models.PositiveBigIntegerField(default=1)
+    
+    class Meta:
+        db_table = 'reference_versions'
+    
+    def __str__(self):
+        return f"{self.name} v{self.version}"
@@ -0,0 +1,90 @@
+from datetime import date
+from unittest import skipUnless
+
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from customers.models import Customer
+from inventory.models import Animal, Offer
+from farmcloud import dbpool, metrics
+from orders.models import Delivery, Order, OrderItem
+from . import dataset
+
+SCALE = 0.01
+END_DATE = date(2025, 6, 1)
+
+
+def snapshot():
+    return [
+        list(model.objects.order_by('pk').values_list())
+        for model in (Customer, Animal, Offer, Order, OrderItem, Delivery)
+    ]
+
+
+class GenerateDatasetTests(TestCase):
+    def generate(self, seed=42):
+        with self.captureOnCommitCallbacks(execute=True):
+            return dataset.generate(scale=SCALE, seed=seed, chunk_size=100, end_date=END_DATE)
+
+    def test_counts_follow_the_plan(self):
+        timings = self.generate()
+        counts = dataset.plan(SCALE)
+        for table in ('breeds', 'locations', 'offers', 'customers', 'animals', 'orders'):
+            self.assertEqual(timings[table][0], counts[table], table)
+        self.assertEqual(OrderItem.objects.count(), timings['items'][0])
+        self.assertFalse(Customer.objects.filter(orders__isnull=False, last_order_date__isnull=True).exists())
+
+    def test_same_seed_same_rows(self):
+        self.generate()
+        first = snapshot()
+        self.generate()
+        self.assertEqual(snapshot(), first)
+        self.generate(seed=7)
+        self.assertNotEqual(snapshot(), first)
+
+    def test_rows_pass_model_validation(self):
+        self.generate()
+        for model in (Customer, Animal, Offer, Order, OrderItem, Delivery):
+            for obj in model.objects.all()[:50]:
+                try:
+                    obj.full_clean(validate_unique=False)
+                except ValidationError as exc:
+                    self.fail(f'{model.__name__} {obj.pk}: {exc}')
+
+
+@skipUnless(connection.vendor == 'postgresql' and connection.settings_dict['OPTIONS'].get('pool'),
+            'needs a pooled PostgreSQL database')
+class ConnectionPoolTests(TestCase):
+    @override_settings(METRICS_TOKEN='scrape')
+    def test_scrape_records_pool_stats(self):
+        self.assertEqual(self.client.get('/api/breeds/', secure=True).status_code, 200)
+        self.assertIn('default', dict(dbpool.open_pools()))
+        response = self.client.get('/api/ops/metrics/', secure=True, HTTP_AUTHORIZATION='Bearer scrape')
+        self.assertEqual(response.status_code, 200)
+        payload = response.content.decode()
+        # The test's own connection stays checked out for the whole test
+        self.assertIn('farmcloud_db_pool_connections{database="default",state="in_use"} 1.0', payload)
+        self.assertIn('farmcloud_db_pool_saturation{database="default"}', payload)
+        self.assertIn('farmcloud_db_pool_wait_seconds_total{database="default"}', payload)
+
+
+class QueryRecorderTests(TestCase):
+    def test_counts_queries_only_while_active(self):
+        metrics.install(connection)
+        metrics.install(connection)
+        self.assertEqual(connection.execute_wrappers.count(metrics.record_queries), 1)
+        Customer.objects.count()
+        with metrics.QueryRecorder(statements=True) as recorder:
+            Customer.objects.count()
+            Customer.objects.count()
+        Customer.objects.count()
+        self.assertEqual(recorder.count, 2)
+        self.assertEqual(list(recorder.statements.values()), [2])
+
+    def test_unsampled_requests_skip_statement_counts(self):
+        metrics.install(connection)
+        with metrics.QueryRecorder() as recorder:
+            Customer.objects.count()
+        self.assertEqual(recorder.count, 1)
+        self.assertIsNone(recorder.statements)
@@ -0,0 +1,12 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import MetricsViewSet, ReferenceCacheViewSet, ResponseCacheViewSet
+
+router = DefaultRouter()
+router.register(r'ops/reference-cache', ReferenceCacheViewSet, basename='reference-cache')
+router.register(r'ops/response-cache', ResponseCacheViewSet, basename='response-cache')
+router.register(r'ops/metrics', MetricsViewSet, basename='metrics')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from rest_framework import viewsets
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.permissions import BasePermission, IsAdminUser
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from farmcloud import dbpool, metrics, refcache, respcache
+
+
+class ReferenceCacheViewSet(viewsets.ViewSet):
+    """Hit/miss counters of the reference-data caches in the serving worker"""
+    permission_classes = [IsAdminUser]
+    
+    def list(self, request):
+        return Response({
+            'stamps': refcache.stamps.store.__class__.__name__,
+            'caches': refcache.stats(),
+        })
+
+
+class ResponseCacheViewSet(viewsets.ViewSet):
+    """Hit/miss counters of the response cache in the serving worker"""
+    permission_classes = [IsAdminUser]
+    
+    def list(self, request):
+        return Response({
+            'enabled': settings.RESPONSE_CACHE_ENABLED,
+            'views': respcache.stats(),
+        })
+
+
+class MetricsTokenAuthentication(BaseAuthentication):
+    """`Authorization: Bearer <METRICS_TOKEN>` for scrapers without a user account"""
+    
+    def authenticate(self, request):
+        token = settings.METRICS_TOKEN
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        if token and constant_time_compare(header, f'Bearer {token}'):
+            return AnonymousUser(), 'metrics-token'
+        return None
+
+
+class HasMetricsToken(BasePermission):
+    def has_permission(self, request, view):
+        return request.auth == 'metrics-token'
+
+
+class MetricsViewSet(viewsets.ViewSet):
+    """Request metrics (farmcloud.metrics) and this worker's pool stats in Prometheus text format"""
+    authentication_classes = [MetricsTokenAuthentication, *api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    permission_classes = [HasMetricsToken | IsAdminUser]
+    throttle_classes = []
+    
+    def list(self, request):
+        dbpool.record_stats()
+        payload, content_type = metrics.render()
+        return HttpResponse(payload, content_type=content_type)
@@ -1,6 +1,9 @@
 from django.contrib import admin
+from django.db import transaction
 from django.utils.html import format_html
 from django.utils import timezone
+from jobs.queue import enqueue
+from webhooks import outbox
 from .models import Order, OrderItem, Delivery
 
 
@@ -14,7 +17,8 @@ class OrderItemInline(admin.TabularInline):
 class DeliveryInline(admin.StackedInline):
     model = Delivery
     extra = 0
-    fields = ['driver_name', 'driver_phone', 'vehicle_info', 'dispatched_at', 'delivered_at', 'delivery_notes']
+    fields = ['driver', 'driver_name', 'driver_phone', 'vehicle_info', 'dispatched_at', 'delivered_at', 'delivery_notes']
+    raw_id_fields = ['driver']
 
 
 @admin.register(Order)
@@ -24,6 +28,7 @@ class OrderAdmin(admin.ModelAdmin):
     search_fields = ['order_number', 'customer__full_name', 'customer__phone_number']
     readonly_fields = ['order_number', 'total_amount', 'created_at', 'updated_at', 'confirmed_at', 'completed_at', 'balance_due']
     inlines = [OrderItemInline, DeliveryInline]
+    list_select_related = ['customer']
     
     fieldsets = (
         ('Order Information', {
@@ -86,22 +91,32 @@ class OrderAdmin(admin.ModelAdmin):
     actions = ['mark_as_confirmed', 'mark_as_preparing', 'mark_as_completed']
     
     def mark_as_confirmed(self, request, queryset):
-        queryset.update(status='CONFIRMED', confirmed_at=timezone.now())
+        self.set_status(queryset, 'CONFIRMED', confirmed_at=timezone.now())
     mark_as_confirmed.short_description = "Confirm selected orders"
     
     def mark_as_preparing(self, request, queryset):
-        queryset.update(status='PREPARING')
+        self.set_status(queryset, 'PREPARING')
     mark_as_preparing.short_description = "Mark as Preparing"
     
     def mark_as_completed(self, request, queryset):
-        queryset.update(status='COMPLETED', completed_at=timezone.now())
+        self.set_status(queryset, 'COMPLETED', completed_at=timezone.now())
     mark_as_completed.short_description = "Mark as Completed"
+    
+    def set_status(self, queryset, status, **fields):
+        """Bulk status change; queues the notifications and webhook events a save would (orders.signals)"""
+        with transaction.atomic():
+            previous = dict(queryset.exclude(status=status).values_list('pk', 'status'))
+            Order.objects.filter(pk__in=list(previous)).update(status=status, updated_at=timezone.now(), **fields)
+            for order in Order.objects.filter(pk__in=list(previous)):
+                enqueue('orders.status_changed', order_id=order.pk, status=status)
+                outbox.record('order.status_changed', outbox.order_payload(order, previous_status=previous[order.pk]))
 
 
 @admin.register(OrderItem)
 class OrderItemAdmin(admin.ModelAdmin):
     list_display = ['order', 'item_name', 'quantity', 'unit_price', 'total_price']
     list_filter = ['order__status']
+    list_select_related = ['order__customer']
     search_fields = ['order__order_number', 'item_name']
 
 
@@ -109,4 +124,6 @@ class OrderItemAdmin(admin.ModelAdmin):
 class DeliveryAdmin(admin.ModelAdmin):
     list_display = ['order', 'driver_name', 'driver_phone', 'dispatched_at', 'delivered_at']
     list_filter = ['dispatched_at', 'delivered_at']
+    list_select_related = ['order__customer']
+    raw_id_fields = ['driver']
     search_fields = ['order__order_number', 'driver_name']
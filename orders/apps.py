@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class OrdersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'orders'
-    verbose_name = 'Order Management'
\ No newline at end of file
+    verbose_name = 'Order Management'
+
+    def ready(self):
+        from . import signals  # noqa: F401
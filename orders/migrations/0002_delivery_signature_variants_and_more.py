@@ -0,0 +1,24 @@
+# Generated by Django 5.1.5 on 2026-10-19 14:12
+
+import inventory.images
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='delivery',
+            name='signature_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Rendered thumbnail/WebP variants'),
+        ),
+        migrations.AlterField(
+            model_name='delivery',
+            name='customer_signature',
+            field=models.ImageField(blank=True, null=True, storage=inventory.images.image_storage, upload_to='signatures/'),
+        ),
+    ]
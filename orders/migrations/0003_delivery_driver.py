@@ -0,0 +1,25 @@
+# Generated by Django 5.1.5 on 2026-10-19 14:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_delivery_signature_variants_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='delivery',
+            name='driver',
+            field=models.ForeignKey(blank=True, db_index=False, help_text="Driver account; scopes the driver's API to these orders", limit_choices_to={'role': 'DELIVERY'}, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='deliveries', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='delivery',
+            index=models.Index(fields=['driver', 'order'], name='delivery_driver_order_idx'),
+        ),
+    ]
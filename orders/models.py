@@ -1,7 +1,10 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, router, transaction
 from django.core.validators import MinValueValidator
 from django.utils import timezone
+from farmcloud.respcache import VersionedQuerySet
 from customers.models import Customer
+from inventory.images import image_storage
 from inventory.models import Animal, Offer
 
 
@@ -75,17 +78,32 @@ class Order(models.Model):
     confirmed_at = models.DateTimeField(null=True, blank=True)
     completed_at = models.DateTimeField(null=True, blank=True)
     
+    objects = VersionedQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['order_number']),
             models.Index(fields=['status', 'delivery_date']),
             models.Index(fields=['customer', '-created_at']),
+            # Default ordering: newest-first pages and exports read the index instead of sorting the table
+            models.Index(fields=['-created_at'], name='order_created_idx'),
+            # Rollup refreshes (reports.rollup) scan the orders updated since their watermark
+            models.Index(fields=['updated_at'], name='order_updated_idx'),
         ]
     
     def __str__(self):
         return f"Order #{self.order_number} - {self.customer.full_name}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded status and payment so saves can tell a change
+        instance._loaded_status = instance.__dict__.get('status')
+        if 'payment_status' in instance.__dict__ and 'amount_paid' in instance.__dict__:
+            instance._loaded_payment = (instance.payment_status, instance.amount_paid)
+        return instance
+    
     def save(self, *args, **kwargs):
         if not self.order_number:
             # Generate order number: ORD-YYYYMMDD-XXXX
@@ -110,7 +128,13 @@ class Order(models.Model):
         else:
             self.payment_status = PaymentStatus.UNPAID
         
-        super().save(*args, **kwargs)
+        # The jobs and webhook events of the post_save handlers (orders.signals) commit with the order
+        with transaction.atomic(using=kwargs.get('using') or router.db_for_write(Order, instance=self)):
+            super().save(*args, **kwargs)
+    
+    def is_assigned_to(self, user):
+        """Whether `user` drives this order's delivery"""
+        return Delivery.objects.filter(order=self, driver=user).exists()
     
     @property
     def balance_due(self):
@@ -140,6 +164,8 @@ class OrderItem(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = VersionedQuerySet.as_manager()
+    
     class Meta:
         ordering = ['id']
     
@@ -156,6 +182,11 @@ class Delivery(models.Model):
     
     order = models.OneToOneField(Order, on_delete=models.CASCADE, related_name='delivery')
     
+    driver = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, db_index=False,
+        related_name='deliveries', limit_choices_to={'role': 'DELIVERY'},
+        help_text="Driver account; scopes the driver's API to these orders",
+    )
     driver_name = models.CharField(max_length=100, blank=True)
     driver_phone = models.CharField(max_length=15, blank=True)
     vehicle_info = models.CharField(max_length=100, blank=True)
@@ -164,10 +195,26 @@ class Delivery(models.Model):
     delivered_at = models.DateTimeField(null=True, blank=True)
     
     delivery_notes = models.TextField(blank=True)
-    customer_signature = models.ImageField(upload_to='signatures/', blank=True, null=True)
+    customer_signature = models.ImageField(upload_to='signatures/', storage=image_storage, blank=True, null=True)
+    signature_variants = models.JSONField(default=dict, blank=True, editable=False, help_text="Rendered thumbnail/WebP variants")
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = VersionedQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            # A driver's orders: index range scan on driver, then orders by PK
+            models.Index(fields=['driver', 'order'], name='delivery_driver_order_idx'),
+        ]
+    
     def __str__(self):
         return f"Delivery for {self.order.order_number}"
+    
+    def save(self, *args, **kwargs):
+        # Keep the printed driver details in step with the assigned account
+        if self.driver_id and not self.driver_name:
+            self.driver_name = self.driver.get_full_name() or self.driver.username
+            self.driver_phone = self.driver_phone or (self.driver.phone_number or '')[:15]
+        super().save(*args, **kwargs)
@@ -1,22 +1,71 @@
 from rest_framework import serializers
+from farmcloud.mixins import RoleFieldsMixin
+from inventory.images import variant_urls
+from inventory.models import Offer
+from inventory.reference import OFFERS
 from .models import Order, OrderItem, Delivery
 
 
-class OrderItemSerializer(serializers.ModelSerializer):
+class CachedOfferField(serializers.PrimaryKeyRelatedField):
+    """Resolves offer ids through the reference cache instead of one query per item"""
+    
+    def to_internal_value(self, data):
+        try:
+            offer = OFFERS.get().get(int(data))
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if offer is None:
+            # Not cached yet (e.g. created a moment ago in another worker)
+            return super().to_internal_value(data)
+        return offer
+
+
+class OrderItemSerializer(RoleFieldsMixin, serializers.ModelSerializer):
+    offer = CachedOfferField(queryset=Offer.objects.all(), required=False, allow_null=True)
+    
     class Meta:
         model = OrderItem
         fields = '__all__'
         read_only_fields = ['total_price', 'created_at']
+        extra_kwargs = {
+            'item_name': {'required': False},
+            'unit_price': {'required': False},
+        }
+        # Prices are hidden from operational roles
+        role_fields = {
+            role: ['id', 'order', 'animal', 'offer', 'item_name', 'item_description', 'quantity',
+                   'processing_instructions', 'created_at']
+            for role in ('STAFF', 'DELIVERY')
+        }
+    
+    def validate(self, attrs):
+        # Offer items default to the offer's current name and price
+        offer = attrs.get('offer')
+        if offer is not None:
+            attrs.setdefault('item_name', offer.name)
+            attrs.setdefault('unit_price', offer.price)
+        if self.instance is None:
+            missing = {field: "This field is required." for field in ('item_name', 'unit_price') if field not in attrs}
+            if missing:
+                raise serializers.ValidationError(missing)
+        return attrs
 
 
-class DeliverySerializer(serializers.ModelSerializer):
+class DeliverySerializer(RoleFieldsMixin, serializers.ModelSerializer):
+    signature_variants = serializers.SerializerMethodField()
+    
     class Meta:
         model = Delivery
         fields = '__all__'
         read_only_fields = ['created_at', 'updated_at']
+        # Drivers record progress on their deliveries; staff assign them
+        role_read_only_fields = {'DELIVERY': ['driver']}
+    
+    def get_signature_variants(self, obj):
+        return variant_urls(obj.customer_signature, obj.signature_variants, self.context.get('request'))
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(RoleFieldsMixin, serializers.ModelSerializer):
     items = OrderItemSerializer(many=True, read_only=True)
     customer_name = serializers.CharField(source='customer.full_name', read_only=True)
     balance_due = serializers.ReadOnlyField()
@@ -25,3 +74,16 @@ class OrderSerializer(serializers.ModelSerializer):
         model = Order
         fields = '__all__'
         read_only_fields = ['order_number', 'total_amount', 'created_at', 'updated_at', 'confirmed_at', 'completed_at']
+        # Operational roles don't see pricing or payment
+        role_fields = {
+            'STAFF': [
+                'id', 'order_number', 'customer', 'customer_name', 'status', 'items',
+                'delivery_method', 'delivery_address', 'delivery_date', 'delivery_time_slot', 'delivery_notes',
+                'customer_notes', 'internal_notes', 'created_at', 'updated_at', 'confirmed_at', 'completed_at',
+            ],
+            'DELIVERY': [
+                'id', 'order_number', 'customer_name', 'status', 'items',
+                'delivery_method', 'delivery_address', 'delivery_date', 'delivery_time_slot', 'delivery_notes',
+                'customer_notes', 'updated_at',
+            ],
+        }
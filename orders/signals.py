@@ -0,0 +1,37 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from inventory.images import schedule_variants
+from jobs.queue import enqueue
+from webhooks import outbox
+from .models import Delivery, Order
+
+
+@receiver(post_save, sender=Delivery)
+def render_signature_variants(sender, instance, **kwargs):
+    """Render thumbnails/WebP for new or replaced signatures after commit"""
+    schedule_variants(instance, 'customer_signature', 'signature_variants')
+
+
+@receiver(post_save, sender=Order)
+def queue_order_events(sender, instance, created, using, **kwargs):
+    """
+    Queue notifications (orders.tasks) and webhook events (webhooks.outbox)
+    for new orders, status and payment changes, in the transaction of the save
+    """
+    previous_status = getattr(instance, '_loaded_status', None)
+    previous_payment = getattr(instance, '_loaded_payment', None)
+    payment = (instance.payment_status, instance.amount_paid)
+    if created:
+        enqueue('orders.order_placed', order_id=instance.pk)
+        outbox.record('order.created', outbox.order_payload(instance), using=using)
+    else:
+        if previous_status is not None and previous_status != instance.status:
+            enqueue('orders.status_changed', order_id=instance.pk, status=instance.status)
+            outbox.record('order.status_changed', outbox.order_payload(instance, previous_status=previous_status),
+                          using=using)
+        if previous_payment is not None and previous_payment != payment:
+            outbox.record('order.payment_updated', outbox.order_payload(
+                instance, previous_payment_status=previous_payment[0], previous_amount_paid=previous_payment[1],
+            ), using=using)
+    instance._loaded_status = instance.status
+    instance._loaded_payment = payment
@@ -0,0 +1,59 @@
+"""
+Order notifications, sent by the job queue (jobs.queue) instead of the request
+
+Settings.order_alerts mails the business about each new order;
+email_notifications and sms_notifications tell the customer about a new
+order and its status changes. The flags are read when the job runs.
+"""
+import logging
+
+from django.conf import settings
+from django.core.mail import send_mail
+
+from jobs.queue import task
+from settings.models import Settings
+from .models import Order
+
+logger = logging.getLogger(__name__)
+
+
+@task('orders.order_placed')
+def order_placed(order_id):
+    order = Order.objects.select_related('customer').filter(pk=order_id).first()
+    if order is None:
+        return  # deleted since
+    app_settings = Settings.load()
+    if app_settings.order_alerts:
+        send_mail(
+            f"[{app_settings.business_name}] New order {order.order_number}",
+            f"{order.customer.full_name} ({order.customer.phone_number}) placed order {order.order_number} "
+            f"for {order.total_amount} {app_settings.currency}, {order.get_delivery_method_display().lower()}.",
+            settings.DEFAULT_FROM_EMAIL, [app_settings.email],
+        )
+    _notify_customer(
+        app_settings, order, f"Order {order.order_number} received",
+        f"Thank you, {order.customer.full_name}. We received your order {order.order_number} "
+        f"({order.total_amount} {app_settings.currency}) and will confirm it shortly.",
+    )
+
+
+@task('orders.status_changed')
+def status_changed(order_id, status):
+    order = Order.objects.select_related('customer').filter(pk=order_id).first()
+    if order is None or order.status != status:
+        return  # deleted, or changed again: the newer status has a job of its own
+    app_settings = Settings.load()
+    _notify_customer(
+        app_settings, order, f"Order {order.order_number}: {order.get_status_display()}",
+        f"Your order {order.order_number} is now {order.get_status_display().lower()}.",
+    )
+
+
+def _notify_customer(app_settings, order, subject, body):
+    customer = order.customer
+    subject = f"[{app_settings.business_name}] {subject}"
+    if app_settings.email_notifications and customer.email:
+        send_mail(subject, body, settings.DEFAULT_FROM_EMAIL, [customer.email])
+    if app_settings.sms_notifications:
+        # No SMS gateway is integrated yet; keep the message in the log
+        logger.warning('SMS to %s: %s', customer.phone_number, body)
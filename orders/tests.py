@@ -0,0 +1,185 @@
+import csv
+import io
+import json
+import zipfile
+
+from customers.models import Customer
+from farmcloud.testing import QueryCountTestCase
+from inventory.models import Offer
+from rest_framework_simplejwt.tokens import AccessToken
+from users.models import User
+from .models import Delivery, DeliveryMethod, Order, OrderItem
+from .views import DeliveryViewSet, OrderItemViewSet, OrderViewSet
+
+
+def seed_orders(start, stop):
+    """Orders with two items and a delivery each, all assigned to one driver"""
+    driver, _ = User.objects.get_or_create(username='qc-driver', defaults={'role': 'DELIVERY'})
+    offer, _ = Offer.objects.get_or_create(
+        slug='qc-offer', defaults={'name': 'QC Offer', 'offer_type': 'WHOLE', 'description': '-', 'price': 800},
+    )
+    Customer.objects.bulk_create([
+        Customer(full_name=f'Customer {i}', phone_number=f'05{i:08d}', address_line1='Street 1', city='Dubai',
+                 emirate='DUBAI')
+        for i in range(start, stop)
+    ])
+    customers = Customer.objects.order_by('id')[start:stop]
+    orders = Order.objects.bulk_create([
+        Order(order_number=f'QC-{i:05d}', customer=customer, delivery_method=DeliveryMethod.HOME_DELIVERY)
+        for i, customer in zip(range(start, stop), customers)
+    ])
+    OrderItem.objects.bulk_create([
+        OrderItem(order=order, offer=offer, item_name=offer.name, unit_price=800, total_price=800)
+        for order in orders for _ in range(2)
+    ])
+    Delivery.objects.bulk_create([Delivery(order=order, driver=driver) for order in orders])
+
+
+class OrderQueryCountTests(QueryCountTestCase):
+    def test_order_list(self):
+        self.assertConstantQueries('/api/orders/', seed_orders, user=self.admin)
+    
+    def test_order_list_as_driver(self):
+        self.seed_to(seed_orders, self.SMALL)
+        driver = User.objects.get(username='qc-driver')
+        small = len(self.count_queries('/api/orders/', driver))
+        self.seed_to(seed_orders, self.LARGE)
+        self.assertEqual(small, len(self.count_queries('/api/orders/', driver)))
+    
+    def test_order_item_list(self):
+        self.assertConstantQueries('/api/order-items/', seed_orders, user=self.admin)
+    
+    def test_delivery_list(self):
+        self.assertConstantQueries('/api/deliveries/', seed_orders, user=self.admin)
+
+
+class OrderSerializationTimeTests(QueryCountTestCase):
+    def test_orders(self):
+        self.assertSerializesWithinBudget(OrderViewSet, seed_orders)
+    
+    def test_order_items(self):
+        self.assertSerializesWithinBudget(OrderItemViewSet, seed_orders)
+    
+    def test_deliveries(self):
+        self.assertSerializesWithinBudget(DeliveryViewSet, seed_orders)
+
+
+class OrderAdminQueryCountTests(QueryCountTestCase):
+    def test_order_changelist(self):
+        self.assertConstantChangelistQueries(Order, seed_orders)
+    
+    def test_order_item_changelist(self):
+        self.assertConstantChangelistQueries(OrderItem, seed_orders)
+    
+    def test_delivery_changelist(self):
+        self.assertConstantChangelistQueries(Delivery, seed_orders)
+
+
+class OrderExportTests(QueryCountTestCase):
+    def setUp(self):
+        super().setUp()
+        self.seed_to(seed_orders, 5)
+        Order.objects.filter(order_number='QC-00002').update(status='CANCELLED')
+    
+    def export(self, query, user=None):
+        response = self.client.get(
+            f'/api/orders/export/?{query}', secure=True,
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user or self.admin)}',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+    
+    def test_csv_honors_filters(self):
+        rows = list(csv.reader(io.StringIO(self.export('status=CANCELLED').decode('utf-8-sig'))))
+        self.assertIn('total_amount', rows[0])
+        self.assertEqual([row[rows[0].index('order_number')] for row in rows[1:]], ['QC-00002'])
+    
+    def test_csv_defuses_formulas(self):
+        Customer.objects.filter(orders__order_number='QC-00002').update(full_name='=HYPERLINK("http://evil.example")')
+        rows = list(csv.reader(io.StringIO(self.export('status=CANCELLED').decode('utf-8-sig'))))
+        self.assertEqual(rows[1][rows[0].index('customer_name')], '\'=HYPERLINK("http://evil.example")')
+        self.assertFalse(rows[1][rows[0].index('total_amount')].startswith("'"))
+    
+    def test_ndjson_limits_columns_by_role(self):
+        staff = User.objects.create(username='export-staff', role='STAFF')
+        lines = self.export('file_format=ndjson', staff).decode().splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertNotIn('total_amount', json.loads(lines[0]))
+    
+    def test_xlsx_is_a_workbook(self):
+        archive = zipfile.ZipFile(io.BytesIO(self.export('file_format=xlsx')))
+        self.assertIsNone(archive.testzip())
+        self.assertEqual(archive.read('xl/worksheets/sheet1.xml').count(b'<row>'), 6)
+    
+    def test_requires_authentication_and_a_known_format(self):
+        self.assertEqual(self.client.get('/api/orders/export/', secure=True).status_code, 401)
+        response = self.client.get(
+            '/api/orders/export/?file_format=pdf', secure=True,
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.admin)}',
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class OrderConditionalGetTests(QueryCountTestCase):
+    def setUp(self):
+        super().setUp()
+        self.seed_to(seed_orders, 2)
+        self.order = Order.objects.order_by('pk').first()
+    
+    def fetch(self, path, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(path, secure=True, HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.admin)}',
+                               **headers)
+    
+    def test_new_items_change_the_order_etag(self):
+        path = f'/api/orders/{self.order.pk}/'
+        etag = self.fetch(path)['ETag']
+        self.assertEqual(self.fetch(path, etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderItem.objects.create(order=self.order, item_name='Extra', unit_price=50, total_price=50)
+        response = self.fetch(path, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['items']), 3)
+    
+    def test_deletions_change_the_list_etag(self):
+        response = self.fetch('/api/orders/')
+        self.assertNotIn('Last-Modified', response)  # deletions can't move it
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.filter(pk=self.order.pk).delete()
+        self.assertEqual(self.fetch('/api/orders/', response['ETag']).status_code, 200)
+
+
+class DriverWriteScopeTests(QueryCountTestCase):
+    def setUp(self):
+        super().setUp()
+        self.seed_to(seed_orders, 2)
+        self.driver = User.objects.get(username='qc-driver')
+        self.own, self.other = Order.objects.order_by('pk')
+        Delivery.objects.filter(order=self.other).update(driver=None)
+        self.unassigned = Order.objects.create(customer=self.own.customer,
+                                               delivery_method=DeliveryMethod.HOME_DELIVERY)
+    
+    def post(self, path, data, method='post'):
+        return getattr(self.client, method)(
+            path, data, content_type='application/json', secure=True,
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.driver)}',
+        )
+    
+    def test_drivers_add_items_to_their_orders_only(self):
+        # Drivers don't see prices: the item takes the offer's
+        item = {'offer': Offer.objects.get(slug='qc-offer').pk}
+        self.assertEqual(self.post('/api/order-items/', {**item, 'order': self.own.pk}).status_code, 201)
+        self.assertEqual(self.post('/api/order-items/', {**item, 'order': self.other.pk}).status_code, 403)
+    
+    def test_drivers_cannot_assign_deliveries_to_themselves(self):
+        response = self.post('/api/deliveries/', {'order': self.unassigned.pk, 'driver': self.driver.pk})
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Delivery.objects.filter(order=self.unassigned).exists())
+        
+        delivery = Delivery.objects.get(order=self.own)
+        response = self.post(f'/api/deliveries/{delivery.pk}/', {'driver': None, 'delivery_notes': 'Left at gate'},
+                             method='patch')
+        self.assertEqual(response.status_code, 200)
+        delivery.refresh_from_db()
+        self.assertEqual((delivery.driver, delivery.delivery_notes), (self.driver, 'Left at gate'))
@@ -1,11 +1,13 @@
 from rest_framework import viewsets, filters
 from rest_framework.permissions import AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
+from farmcloud.mixins import ConditionalGetMixin, ExportMixin, ReplicaReadMixin, RoleScopedMixin
+from customers.models import Customer
 from .models import Order, OrderItem, Delivery
 from .serializers import OrderSerializer, OrderItemSerializer, DeliverySerializer
 
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(ReplicaReadMixin, RoleScopedMixin, ExportMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Order.objects.all().select_related('customer').prefetch_related('items').order_by('-created_at')
     serializer_class = OrderSerializer
     permission_classes = [AllowAny]  # Changed for development
@@ -13,17 +15,46 @@ class OrderViewSet(viewsets.ModelViewSet):
     filterset_fields = ['status', 'payment_status', 'delivery_method', 'customer']
     search_fields = ['order_number', 'customer__full_name', 'customer__phone_number']
     ordering_fields = ['created_at', 'delivery_date', 'total_amount']
+    replica_actions = {'export'}
+    # Rows carry their items and the customer's name
+    validator_models = [OrderItem, Customer]
+    export_fields = {
+        'id': 'id', 'order_number': 'order_number', 'customer': 'customer_id', 'customer_name': 'customer__full_name',
+        'status': 'status', 'delivery_method': 'delivery_method', 'delivery_address': 'delivery_address',
+        'delivery_date': 'delivery_date', 'delivery_time_slot': 'delivery_time_slot',
+        'payment_status': 'payment_status', 'payment_method': 'payment_method', 'subtotal': 'subtotal',
+        'delivery_fee': 'delivery_fee', 'discount_amount': 'discount_amount', 'total_amount': 'total_amount',
+        'amount_paid': 'amount_paid', 'created_at': 'created_at', 'confirmed_at': 'confirmed_at',
+        'completed_at': 'completed_at',
+    }
+    
+    def scope_delivery(self, queryset, user):
+        # Served by delivery_driver_order_idx: cost follows the driver's orders, not the table
+        return queryset.filter(delivery__driver=user)
 
 
-class OrderItemViewSet(viewsets.ModelViewSet):
+class OrderItemViewSet(RoleScopedMixin, viewsets.ModelViewSet):
     queryset = OrderItem.objects.all().order_by('id')
     serializer_class = OrderItemSerializer
     permission_classes = [AllowAny]  # Changed for development
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['order']
+    
+    def scope_delivery(self, queryset, user):
+        return queryset.filter(order__delivery__driver=user)
+    
+    def allows_delivery(self, attrs, user):
+        return 'order' not in attrs or attrs['order'].is_assigned_to(user)
 
 
-class DeliveryViewSet(viewsets.ModelViewSet):
+class DeliveryViewSet(RoleScopedMixin, viewsets.ModelViewSet):
     queryset = Delivery.objects.all().select_related('order').order_by('-created_at')
     serializer_class = DeliverySerializer
     permission_classes = [AllowAny]  # Changed for development
+    
+    def scope_delivery(self, queryset, user):
+        return queryset.filter(driver=user)
+    
+    def allows_delivery(self, attrs, user):
+        # Creating a delivery for an unassigned order would pull it into the driver's scope
+        return 'order' not in attrs or attrs['order'].is_assigned_to(user)
@@ -0,0 +1,51 @@
+# Generated by Django 5.1.5 on 2026-10-19 15:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('inventory', '0007_animal_lifecycle_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DirtyDay',
+            fields=[
+                ('date', models.DateField(primary_key=True, serialize=False)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('changed_since', models.DateTimeField()),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('emirate', models.CharField(blank=True, help_text="The customer's emirate when the day was rolled up", max_length=50)),
+                ('delivery_method', models.CharField(choices=[('FARM_PICKUP', 'Farm Pickup'), ('HOME_DELIVERY', 'Home Delivery')], max_length=20)),
+                ('animal_type', models.CharField(blank=True, choices=[('GOAT', 'Goat'), ('SHEEP', 'Sheep')], max_length=10)),
+                ('orders', models.PositiveIntegerField(default=0, help_text='Orders with lines in this cell')),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, help_text='Sum of line totals', max_digits=14)),
+                ('discounts', models.DecimalField(decimal_places=2, default=0, help_text='Order discounts, split over lines by their share of the subtotal', max_digits=14)),
+                ('breed', models.ForeignKey(blank=True, help_text='Breed of the sold animal, if the line was an animal', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='inventory.breed')),
+                ('offer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='inventory.offer')),
+            ],
+            options={
+                'verbose_name_plural': 'daily sales',
+                'db_table': 'daily_sales',
+                'indexes': [models.Index(fields=['date'], name='daily_sales_date_34eaa5_idx')],
+            },
+        ),
+    ]
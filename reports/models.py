@@ -0,0 +1,58 @@
+from django.db import models
+from inventory.models import AnimalType, Breed, Offer
+from orders.models import DeliveryMethod
+
+
+class DailySales(models.Model):
+    """
+    Fulfilled order lines pre-aggregated per local order day and dimension
+    (see reports.rollup). Rebuilt a whole day at a time, never edited.
+    """
+    
+    date = models.DateField()
+    emirate = models.CharField(max_length=50, blank=True, help_text="The customer's emirate when the day was rolled up")
+    delivery_method = models.CharField(max_length=20, choices=DeliveryMethod.choices)
+    offer = models.ForeignKey(Offer, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    breed = models.ForeignKey(Breed, on_delete=models.SET_NULL, null=True, blank=True, related_name='+',
+                              help_text="Breed of the sold animal, if the line was an animal")
+    animal_type = models.CharField(max_length=10, choices=AnimalType.choices, blank=True)
+    
+    # Measures
+    orders = models.PositiveIntegerField(default=0, help_text="Orders with lines in this cell")
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Sum of line totals")
+    discounts = models.DecimalField(max_digits=14, decimal_places=2, default=0,
+                                    help_text="Order discounts, split over lines by their share of the subtotal")
+    
+    class Meta:
+        db_table = 'daily_sales'
+        verbose_name_plural = 'daily sales'
+        indexes = [
+            models.Index(fields=['date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} {self.emirate} {self.animal_type or '-'}: {self.quantity}"
+
+
+class RollupWatermark(models.Model):
+    """Orders updated at or after `changed_since` have not been rolled up yet"""
+    
+    name = models.CharField(max_length=50, primary_key=True)
+    changed_since = models.DateTimeField()
+    refreshed_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name} since {self.changed_since:%Y-%m-%d %H:%M}"
+
+
+class DirtyDay(models.Model):
+    """
+    Local order day to roll up again on the next refresh, for changes that
+    don't move Order.updated_at (line edits, deleted orders)
+    """
+    
+    date = models.DateField(primary_key=True)
+    
+    def __str__(self):
+        return str(self.date)
@@ -0,0 +1,196 @@
+"""
+Sales metrics for an arbitrary date range, one grouped query each
+
+Revenue counts the same orders as Customer.total_spent: COMPLETED and
+DELIVERED. A range is a pair of inclusive local dates read on one of two
+bases:
+
+- 'created': when the order was placed. Filtered as a half-open created_at
+  range between local midnights (order_created_idx), grouped with
+  TruncDate/TruncWeek/TruncMonth in the current time zone.
+- 'delivery': the order's delivery_date. Filtered as status IN (...) AND
+  delivery_date BETWEEN ..., the (status, delivery_date) index.
+
+breakdown() reads the daily rollup (reports.rollup) instead of orders.
+"""
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db.models import Count, DateField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from orders.models import Order, OrderItem, OrderStatus
+from .models import DailySales
+
+FULFILLED = [OrderStatus.COMPLETED, OrderStatus.DELIVERED]
+BASES = ['created', 'delivery']
+GROUP_BY = {
+    'day': TruncDate,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+BREAKDOWNS = {
+    # by: {key in the result: DailySales column}
+    'emirate': {'emirate': 'emirate'},
+    'delivery_method': {'delivery_method': 'delivery_method'},
+    'offer': {'offer': 'offer_id', 'offer_name': 'offer__name'},
+    'breed': {'breed': 'breed_id', 'breed_name': 'breed__name'},
+    'animal_type': {'animal_type': 'animal_type'},
+}
+CENTS = Decimal('0.01')
+
+
+def _midnight(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def order_window(basis, start, end, prefix=''):
+    """Q for orders of the inclusive local-date range [start, end]"""
+    if basis == 'delivery':
+        return Q(**{f'{prefix}delivery_date__gte': start, f'{prefix}delivery_date__lte': end})
+    return Q(**{
+        f'{prefix}created_at__gte': _midnight(start),
+        f'{prefix}created_at__lt': _midnight(end + timedelta(days=1)),
+    })
+
+
+def _money(value):
+    return (value or Decimal(0)).quantize(CENTS)
+
+
+def _percent(part, whole):
+    return round(float(part) / float(whole) * 100, 1) if whole else None
+
+
+def summary(start, end, basis='created'):
+    """
+    Revenue, order count, average order value, completion rate and growth
+    against the previous period of the same length. The previous period is
+    aggregated in the same query with conditional aggregates.
+    """
+    previous_start = start - timedelta(days=(end - start).days + 1)
+    current = order_window(basis, start, end)
+    previous = order_window(basis, previous_start, start - timedelta(days=1))
+    fulfilled = Q(status__in=FULFILLED)
+    totals = Order.objects.filter(
+        order_window(basis, previous_start, end), status__in=[*FULFILLED, OrderStatus.CANCELLED],
+    ).aggregate(
+        revenue=Sum('total_amount', filter=current & fulfilled),
+        orders=Count('pk', filter=current & fulfilled),
+        discounts=Sum('discount_amount', filter=current & fulfilled),
+        cancelled=Count('pk', filter=current & Q(status=OrderStatus.CANCELLED)),
+        previous_revenue=Sum('total_amount', filter=previous & fulfilled),
+        previous_orders=Count('pk', filter=previous & fulfilled),
+    )
+    revenue, previous_revenue = _money(totals['revenue']), _money(totals['previous_revenue'])
+    orders = totals['orders']
+    return {
+        'revenue': revenue,
+        'orders': orders,
+        'average_order_value': _money(revenue / orders) if orders else _money(None),
+        'discounts': _money(totals['discounts']),
+        'cancelled_orders': totals['cancelled'],
+        # Share of orders that reached an end state (fulfilled or cancelled) and were fulfilled
+        'completion_rate': _percent(orders, orders + totals['cancelled']),
+        'previous_revenue': previous_revenue,
+        'previous_orders': totals['previous_orders'],
+        'growth_rate': _percent(revenue - previous_revenue, previous_revenue),
+    }
+
+
+def _period_start(day, group_by):
+    if group_by == 'week':
+        return day - timedelta(days=day.weekday())
+    if group_by == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _next_period(day, group_by):
+    if group_by == 'week':
+        return day + timedelta(days=7)
+    if group_by == 'month':
+        return (day + timedelta(days=32)).replace(day=1)
+    return day + timedelta(days=1)
+
+
+def sales(start, end, group_by='day', basis='created'):
+    """Revenue and orders per day, week (starting Monday) or month; periods without sales are zero"""
+    if basis == 'delivery':
+        # Already a date: days need no truncation
+        period = F('delivery_date') if group_by == 'day' else GROUP_BY[group_by]('delivery_date')
+    else:
+        period = GROUP_BY[group_by]('created_at', output_field=DateField())
+    rows = (
+        Order.objects.filter(order_window(basis, start, end), status__in=FULFILLED)
+        .annotate(period=period)
+        .values('period')
+        .annotate(revenue=Sum('total_amount'), orders=Count('pk'))
+        .order_by('period')
+    )
+    found = {row['period']: row for row in rows}
+    periods = []
+    period = _period_start(start, group_by)
+    while period <= end:
+        row = found.get(period, {})
+        periods.append({'period': period, 'revenue': _money(row.get('revenue')), 'orders': row.get('orders', 0)})
+        period = _next_period(period, group_by)
+    return periods
+
+
+def top_customers(start, end, limit=10, basis='created'):
+    """Customers by revenue in the range"""
+    rows = (
+        Order.objects.filter(order_window(basis, start, end), status__in=FULFILLED)
+        .values('customer_id', 'customer__full_name')
+        .annotate(revenue=Sum('total_amount'), orders=Count('pk'))
+        .order_by('-revenue', 'customer_id')[:limit]
+    )
+    return [
+        {'id': row['customer_id'], 'full_name': row['customer__full_name'],
+         'revenue': _money(row['revenue']), 'orders': row['orders']}
+        for row in rows
+    ]
+
+
+def animals_sold(start, end, basis='created'):
+    """Quantity and revenue of fulfilled order lines per animal type (the animal's, else the offer's)"""
+    rows = (
+        OrderItem.objects.filter(order_window(basis, start, end, prefix='order__'), order__status__in=FULFILLED)
+        .annotate(kind=Coalesce('animal__animal_type', 'offer__animal_type', Value('')))
+        .values('kind')
+        .annotate(quantity=Sum('quantity'), revenue=Sum('total_price'))
+        .order_by('kind')
+    )
+    by_type = [
+        {'animal_type': row['kind'] or None, 'quantity': row['quantity'], 'revenue': _money(row['revenue'])}
+        for row in rows
+    ]
+    return {'total': sum(row['quantity'] for row in by_type), 'by_animal_type': by_type}
+
+
+def breakdown(start, end, by='animal_type'):
+    """
+    Quantity, revenue and discounts per emirate, delivery method, offer,
+    breed or animal type, read from the daily rollup. An order with lines in
+    several rollup cells counts once in each of them.
+    """
+    columns = BREAKDOWNS[by]
+    rows = (
+        DailySales.objects.filter(date__gte=start, date__lte=end)
+        .values(*columns.values())
+        .annotate(
+            order_count=Sum('orders'), total_quantity=Sum('quantity'),
+            total_revenue=Sum('revenue'), total_discounts=Sum('discounts'),
+        )
+        .order_by('-total_revenue', *columns.values())
+    )
+    return [
+        {
+            **{key: row[column] for key, column in columns.items()},
+            'orders': row['order_count'], 'quantity': row['total_quantity'],
+            'revenue': _money(row['total_revenue']), 'discounts': _money(row['total_discounts']),
+        }
+        for row in rows
+    ]
@@ -0,0 +1,178 @@
+"""
+Daily sales rollup: the DailySales fact table
+
+Fulfilled order lines (the same orders reports count as revenue) are summed
+per local order day, customer emirate, delivery method, offer, breed and
+animal type, so analytics read a few rows per day instead of every line.
+
+A day is always rebuilt whole, in one transaction: its rows are deleted and
+re-aggregated from orders and lines with one grouped query. `refresh()`
+rebuilds the days of orders updated since the watermark, plus the days
+marked dirty by line edits and deleted orders; `backfill()` rebuilds a date
+range in chunks, in parallel worker processes on PostgreSQL:
+
+    rollup.backfill(workers=4)   # once, or after bulk loads
+    rollup.refresh()             # then periodically (manage.py rollup_sales)
+"""
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, Count, DecimalField, F, Max, Min, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from farmcloud import dbpool, respcache
+from orders.models import Order, OrderItem
+from .models import DailySales, DirtyDay, RollupWatermark
+from .queries import FULFILLED, order_window
+
+WATERMARK = 'daily_sales'
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+
+def aggregate(start, end):
+    """DailySales rows (unsaved) of the local order days start..end"""
+    discount_share = Case(
+        When(order__subtotal__gt=0, then=F('total_price') * F('order__discount_amount') / F('order__subtotal')),
+        default=Value(Decimal(0)), output_field=MONEY,
+    )
+    rows = (
+        OrderItem.objects.filter(order_window('created', start, end, prefix='order__'), order__status__in=FULFILLED)
+        .order_by()
+        .values(
+            'offer', 'animal__breed',
+            day=TruncDate('order__created_at'),
+            emirate=F('order__customer__emirate'),
+            delivery_method=F('order__delivery_method'),
+            animal_type=Coalesce('animal__animal_type', 'offer__animal_type', Value('')),
+        )
+        .annotate(
+            order_count=Count('order', distinct=True),
+            total_quantity=Sum('quantity'),
+            total_revenue=Sum('total_price'),
+            total_discounts=Sum(discount_share),
+        )
+    )
+    return [
+        DailySales(
+            date=row['day'], emirate=row['emirate'], delivery_method=row['delivery_method'],
+            offer_id=row['offer'], breed_id=row['animal__breed'], animal_type=row['animal_type'],
+            orders=row['order_count'], quantity=row['total_quantity'],
+            revenue=row['total_revenue'], discounts=row['total_discounts'] or 0,
+        )
+        for row in rows
+    ]
+
+
+def rebuild(start, end):
+    """Replace the rollup of days start..end; returns the number of rows written"""
+    with transaction.atomic():
+        DailySales.objects.filter(date__gte=start, date__lte=end).delete()
+        rows = DailySales.objects.bulk_create(aggregate(start, end), batch_size=2000)
+        respcache.bump(DailySales)
+    return len(rows)
+
+
+def _runs(days):
+    """Sorted days as (first, last) runs of consecutive days"""
+    runs = []
+    for day in sorted(days):
+        if runs and day == runs[-1][1] + timedelta(days=1):
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return runs
+
+
+def mark_dirty(order):
+    """Have the next refresh rebuild a fulfilled order's day, for changes that don't save the order"""
+    if order.status in FULFILLED and order.created_at:
+        DirtyDay.objects.bulk_create([DirtyDay(date=timezone.localdate(order.created_at))], ignore_conflicts=True)
+
+
+def refresh():
+    """
+    Rebuild the days with orders updated since the watermark, or marked
+    dirty; returns (days, rows). The scan reaches back ROLLUP_OVERLAP
+    seconds before the watermark, so orders committed late with an earlier
+    updated_at are not missed; rebuilding a day twice is harmless.
+    """
+    started = timezone.now()
+    with transaction.atomic():
+        # Concurrent refreshes queue here instead of rebuilding the same days
+        watermark = RollupWatermark.objects.select_for_update().filter(name=WATERMARK).first()
+        changed = Order.objects.order_by()
+        if watermark is not None:
+            since = watermark.changed_since - timedelta(seconds=settings.ROLLUP_OVERLAP)
+            changed = changed.filter(updated_at__gte=since)
+        # Take the dirty marks before aggregating: a line edit marking one of these days again meanwhile
+        # waits for this transaction on the deleted row, then marks it for the next refresh
+        dirty = list(DirtyDay.objects.select_for_update().values_list('date', flat=True))
+        DirtyDay.objects.filter(date__in=dirty).delete()
+        days = set(changed.annotate(day=TruncDate('created_at')).values_list('day', flat=True).distinct())
+        days.update(dirty)
+
+        rows = sum(rebuild(first, last) for first, last in _runs(days))
+        RollupWatermark.objects.update_or_create(name=WATERMARK, defaults={'changed_since': started})
+    return len(days), rows
+
+
+def _chunks(start, end, days):
+    chunks = []
+    while start <= end:
+        last = min(start + timedelta(days=days - 1), end)
+        chunks.append((start, last))
+        start = last + timedelta(days=1)
+    return chunks
+
+
+def _rebuild_chunk(chunk):
+    """rebuild() of one chunk (runs in a worker process)"""
+    try:
+        return rebuild(*chunk)
+    finally:
+        connection.close()
+
+
+def _worker_init():
+    import django
+    django.setup()
+
+
+def backfill(start=None, end=None, workers=1, chunk_days=31):
+    """
+    Rebuild start..end (default: every day with orders) in chunks of
+    chunk_days, `workers` chunks at a time. A full backfill also moves the
+    watermark to the start of the run. Returns (days, rows).
+    """
+    started = timezone.now()
+    full = start is None and end is None
+    bounds = Order.objects.aggregate(first=Min('created_at'), last=Max('created_at'))
+    if bounds['first'] is None and (start is None or end is None):
+        return 0, 0
+    start = start or timezone.localdate(bounds['first'])
+    end = end or timezone.localdate(bounds['last'])
+    chunks = _chunks(start, end, chunk_days)
+    if connection.vendor == 'sqlite':
+        workers = 1  # a single writer
+
+    if workers > 1:
+        dbpool.close_pools()  # connections and pools must not be inherited by the workers
+        with ProcessPoolExecutor(max_workers=workers, initializer=_worker_init) as pool:
+            rows = sum(pool.map(_rebuild_chunk, chunks))
+    else:
+        rows = sum(rebuild(first, last) for first, last in chunks)
+    if full:
+        RollupWatermark.objects.update_or_create(name=WATERMARK, defaults={'changed_since': started})
+    return (end - start).days + 1, rows
+
+
+def reset():
+    """Forget the rollup; the next refresh rebuilds every day"""
+    DailySales.objects.all().delete()
+    respcache.bump(DailySales)
+    DirtyDay.objects.all().delete()
+    RollupWatermark.objects.filter(name=WATERMARK).delete()
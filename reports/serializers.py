@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework import serializers
+
+from .queries import BASES, BREAKDOWNS, GROUP_BY
+
+MAX_RANGE_DAYS = 3660
+DEFAULT_RANGE_DAYS = 30
+
+
+class ReportRangeSerializer(serializers.Serializer):
+    """
+    Query parameters of a report: inclusive local dates `start`..`end`
+    (default: the `days` days up to today), the grouping of time series,
+    which order date the range applies to and the dimension of breakdowns
+    """
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    days = serializers.IntegerField(min_value=1, max_value=MAX_RANGE_DAYS, default=DEFAULT_RANGE_DAYS)
+    group_by = serializers.ChoiceField(choices=list(GROUP_BY), default='day')
+    basis = serializers.ChoiceField(choices=BASES, default='created')
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)
+    by = serializers.ChoiceField(choices=list(BREAKDOWNS), default='animal_type')
+    
+    def validate(self, attrs):
+        end = attrs.get('end') or timezone.localdate()
+        start = attrs.get('start') or end - timedelta(days=attrs['days'] - 1)
+        if start > end:
+            raise serializers.ValidationError({'start': "Must not be after end."})
+        if (end - start).days >= MAX_RANGE_DAYS:
+            raise serializers.ValidationError({'start': f"Ranges are limited to {MAX_RANGE_DAYS} days."})
+        attrs.update(start=start, end=end)
+        attrs.pop('days')
+        return attrs
@@ -0,0 +1,16 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from orders.models import Order, OrderItem
+from . import rollup
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def order_line_changed(sender, instance, **kwargs):
+    """Line edits don't move the order's updated_at: mark its day for the next rollup refresh"""
+    rollup.mark_dirty(instance.order)
+
+
+@receiver(post_delete, sender=Order)
+def order_deleted(sender, instance, **kwargs):
+    rollup.mark_dirty(instance)
@@ -0,0 +1,7 @@
+from jobs.queue import task
+from . import rollup
+
+
+@task('reports.refresh_rollup')
+def refresh_rollup():
+    rollup.refresh()
@@ -0,0 +1,197 @@
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+
+from customers.models import Customer
+from inventory.models import Offer
+from orders.models import DeliveryMethod, Order, OrderItem
+from users.models import User
+from . import queries, rollup
+from .models import DailySales, DirtyDay
+
+RANGE = 'start=2025-03-01&end=2025-03-07'
+
+
+def seed_reports():
+    """
+    Orders of 1-7 March 2025 (Asia/Dubai) plus one in the previous week:
+    (customer, status, total, created_at in UTC, goat quantity)
+    """
+    offer = Offer.objects.create(slug='report-goat', name='Goat', offer_type='WHOLE', description='-', price=100,
+                                 animal_type='GOAT')
+    customers = Customer.objects.bulk_create([
+        Customer(full_name=name, phone_number=f'05000000{i:02d}', address_line1='Street 1', city='Dubai',
+                 emirate='DUBAI')
+        for i, name in enumerate(['Ahmed', 'Fatima'])
+    ])
+    rows = [
+        (0, 'COMPLETED', 100, datetime(2025, 3, 1, 8, 0), 1),
+        # 00:30 on 2 March in Dubai
+        (1, 'COMPLETED', 300, datetime(2025, 3, 1, 20, 30), 3),
+        (1, 'DELIVERED', 200, datetime(2025, 3, 5, 9, 0), 2),
+        (0, 'CANCELLED', 500, datetime(2025, 3, 3, 9, 0), 5),
+        (0, 'PENDING', 700, datetime(2025, 3, 4, 9, 0), 7),
+        # Previous period
+        (0, 'DELIVERED', 400, datetime(2025, 2, 26, 9, 0), 4),
+        # After the range (08:00 on 8 March in Dubai)
+        (1, 'COMPLETED', 900, datetime(2025, 3, 8, 4, 0), 9),
+    ]
+    for i, (customer, status, total, created_at, quantity) in enumerate(rows):
+        order = Order.objects.create(customer=customers[customer], status=status, subtotal=total,
+                                     delivery_method=DeliveryMethod.FARM_PICKUP, delivery_date=created_at.date())
+        OrderItem.objects.create(order=order, offer=offer, item_name='Goat', quantity=quantity, unit_price=100)
+        Order.objects.filter(pk=order.pk).update(created_at=created_at.replace(tzinfo=dt_timezone.utc))
+    return customers
+
+
+class ReportQueryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customers = seed_reports()
+
+    def test_summary_compares_with_previous_period(self):
+        summary = queries.summary(date(2025, 3, 1), date(2025, 3, 7))
+        self.assertEqual(summary['revenue'], Decimal('600.00'))
+        self.assertEqual(summary['orders'], 3)
+        self.assertEqual(summary['average_order_value'], Decimal('200.00'))
+        self.assertEqual(summary['cancelled_orders'], 1)
+        self.assertEqual(summary['completion_rate'], 75.0)
+        self.assertEqual(summary['previous_revenue'], Decimal('400.00'))
+        self.assertEqual(summary['growth_rate'], 50.0)
+
+    def test_sales_are_grouped_in_local_time(self):
+        days = queries.sales(date(2025, 3, 1), date(2025, 3, 7))
+        self.assertEqual([day['period'] for day in days], [date(2025, 3, n) for n in range(1, 8)])
+        self.assertEqual([day['revenue'] for day in days], [100, 300, 0, 0, 200, 0, 0])
+        weeks = queries.sales(date(2025, 2, 24), date(2025, 3, 7), group_by='week')
+        self.assertEqual([(week['period'], week['orders']) for week in weeks],
+                         [(date(2025, 2, 24), 3), (date(2025, 3, 3), 1)])
+        months = queries.sales(date(2025, 2, 1), date(2025, 3, 31), group_by='month')
+        self.assertEqual([month['revenue'] for month in months], [400, 1500])
+
+    def test_delivery_basis_reads_delivery_date(self):
+        # Delivery dates are the UTC dates: the 20:30 order delivers on 1 March
+        days = queries.sales(date(2025, 3, 1), date(2025, 3, 2), basis='delivery')
+        self.assertEqual([day['revenue'] for day in days], [400, 0])
+
+    def test_top_customers_and_animals_sold(self):
+        top = queries.top_customers(date(2025, 3, 1), date(2025, 3, 7), limit=1)
+        self.assertEqual(top, [{'id': self.customers[1].pk, 'full_name': 'Fatima', 'revenue': Decimal('500.00'),
+                                'orders': 2}])
+        sold = queries.animals_sold(date(2025, 3, 1), date(2025, 3, 7))
+        self.assertEqual(sold['total'], 6)
+        self.assertEqual(sold['by_animal_type'], [{'animal_type': 'GOAT', 'quantity': 6, 'revenue': Decimal('600.00')}])
+
+
+class ReportApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Version bumps of the seed run now, not at a commit that never comes
+        with cls.captureOnCommitCallbacks(execute=True):
+            seed_reports()
+        cls.manager = User.objects.create(username='report-manager', role='MANAGER')
+
+    def setUp(self):
+        cache.clear()
+        self.token = AccessToken.for_user(self.manager)
+        # Resolve the manager's token once (users.cache), so the counts below are the reports' own
+        self.client.get('/api/users/me/', secure=True, HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+    def get(self, url, user=None):
+        token = self.token if user is None else AccessToken.for_user(user)
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url, secure=True, HTTP_AUTHORIZATION=f'Bearer {token}')
+        return response, len(captured)
+
+    @override_settings(RESPONSE_CACHE_ENABLED=False)
+    def test_one_query_per_metric(self):
+        for url in ('summary', 'sales', 'top-customers', 'animals-sold'):
+            response, count = self.get(f'/api/reports/{url}/?{RANGE}')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(count, 1, url)
+        response, count = self.get(f'/api/reports/?{RANGE}&group_by=week')
+        self.assertEqual(count, 4)
+        self.assertEqual(response.json()['summary']['revenue'], 600)
+
+    def test_cached_per_range_until_orders_change(self):
+        self.get(f'/api/reports/?{RANGE}')
+        stamps = self.get(f'/api/reports/?{RANGE}')[1]
+        self.assertLessEqual(stamps, 1)  # the version stamps
+        self.assertEqual(self.get('/api/reports/?start=2025-03-01&end=2025-03-08')[1], stamps + 4)
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.filter(status='PENDING').update(status='COMPLETED')
+        response, count = self.get(f'/api/reports/summary/?{RANGE}')
+        self.assertEqual(count, stamps + 1)
+        self.assertEqual(response.json()['summary']['revenue'], 1300)
+    
+    def test_invalid_range_and_restricted_roles(self):
+        response, _ = self.get('/api/reports/?start=2025-03-07&end=2025-03-01')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('start', response.json())
+        staff = User.objects.create(username='report-staff', role='STAFF')
+        self.assertEqual(self.get(f'/api/reports/?{RANGE}', staff)[0].status_code, 403)
+        self.assertEqual(self.get(f'/api/reports/?{RANGE}')[0].status_code, 200)
+        self.assertEqual(self.client.get(f'/api/reports/?{RANGE}', secure=True).status_code, 401)
+
+
+class DailySalesRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        with cls.captureOnCommitCallbacks(execute=True):
+            seed_reports()
+        Order.objects.filter(subtotal=300).update(discount_amount=30)
+        # Last touched long before the backfill
+        Order.objects.update(updated_at=datetime(2025, 3, 9, tzinfo=dt_timezone.utc))
+        DirtyDay.objects.all().delete()
+        cls.manager = User.objects.create(username='rollup-manager', role='MANAGER')
+
+    def setUp(self):
+        cache.clear()
+        rollup.backfill()
+
+    def totals(self, start=date(2025, 3, 1), end=date(2025, 3, 7)):
+        rows = DailySales.objects.filter(date__gte=start, date__lte=end)
+        return sum(row.quantity for row in rows), sum(row.revenue for row in rows), sum(row.discounts for row in rows)
+
+    def test_backfill_matches_the_order_lines(self):
+        sold = queries.animals_sold(date(2025, 3, 1), date(2025, 3, 7))
+        self.assertEqual(self.totals(), (sold['total'], Decimal('600.00'), Decimal('30.00')))
+        self.assertEqual(set(DailySales.objects.values_list('date', flat=True)),
+                         {date(2025, 2, 26), date(2025, 3, 1), date(2025, 3, 2), date(2025, 3, 5), date(2025, 3, 8)})
+        self.assertEqual(DailySales.objects.get(date=date(2025, 3, 2)).emirate, 'DUBAI')
+
+    def test_refresh_rebuilds_changed_days_only(self):
+        order = Order.objects.get(status='PENDING')
+        order.status = 'COMPLETED'
+        order.save()
+        DailySales.objects.filter(date=date(2025, 2, 26)).update(quantity=99)  # untouched by the refresh
+        days, rows = rollup.refresh()
+        self.assertEqual((days, rows), (1, 1))
+        self.assertEqual(self.totals(), (13, Decimal('1300.00'), Decimal('30.00')))
+        self.assertEqual(DailySales.objects.get(date=date(2025, 2, 26)).quantity, 99)
+        with override_settings(ROLLUP_OVERLAP=0):
+            self.assertEqual(rollup.refresh(), (0, 0))
+
+    def test_deleted_orders_mark_their_day(self):
+        Order.objects.get(subtotal=100).delete()
+        self.assertTrue(DirtyDay.objects.filter(date=date(2025, 3, 1)).exists())
+        rollup.refresh()
+        self.assertFalse(DailySales.objects.filter(date=date(2025, 3, 1)).exists())
+        self.assertFalse(DirtyDay.objects.exists())
+
+    def test_breakdown_reads_the_rollup(self):
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.manager)}'}
+        self.client.get('/api/users/me/', secure=True, **headers)  # resolves the token's user (users.cache)
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(f'/api/reports/breakdown/?{RANGE}&by=offer', secure=True, **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(captured), 3)  # watermark, version stamps, rollup rows
+        self.assertEqual(response.json()['breakdown'], [{
+            'offer': Offer.objects.get().pk, 'offer_name': 'Goat', 'orders': 3, 'quantity': 6,
+            'revenue': 600, 'discounts': 30,
+        }])
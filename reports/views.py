@@ -0,0 +1,120 @@
+import hashlib
+
+from django.conf import settings
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import BasePermission, IsAuthenticated
+from rest_framework.response import Response
+from customers.models import Customer
+from farmcloud import respcache
+from farmcloud.mixins import ReplicaReadMixin, _scoped_role
+from orders.models import Order, OrderItem
+from . import queries, rollup
+from .models import DailySales, RollupWatermark
+from .serializers import ReportRangeSerializer
+
+
+class CanSeeRevenue(BasePermission):
+    """Roles that the order serializers hide amounts from don't get reports either"""
+    
+    def has_permission(self, request, view):
+        return _scoped_role(request) not in ('STAFF', 'DELIVERY')
+
+
+class ReportViewSet(ReplicaReadMixin, viewsets.ViewSet):
+    """
+    Sales reports for a date range (see ReportRangeSerializer for the
+    parameters). Each metric is one grouped query over orders (breakdown:
+    over the daily rollup, reports.rollup); results are
+    cached per metric and parameters, keyed by the version stamps of the
+    models they read (farmcloud.respcache), so any order change is seen on
+    the next request.
+    """
+    permission_classes = [IsAuthenticated & CanSeeRevenue]
+    report_models = [Order, OrderItem, Customer, DailySales]
+    replica_actions = {'list', 'summary', 'sales', 'top_customers', 'animals_sold', 'breakdown'}
+    
+    def get_range(self):
+        params = ReportRangeSerializer(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        return params.validated_data
+    
+    def metric(self, name, compute, **params):
+        """compute(**params), from the response cache when enabled"""
+        if not settings.RESPONSE_CACHE_ENABLED:
+            return compute(**params)
+        if not hasattr(self, '_versions'):
+            self._versions = respcache.versions(self.report_models)  # one stamp read per request
+        parts = [name, *(f'{key}={value}' for key, value in sorted(params.items())), *self._versions]
+        key = 'reports:' + hashlib.md5('|'.join(parts).encode()).hexdigest()
+        data = respcache.cache().get(key)
+        respcache.record(type(self).__name__, name, hit=data is not None)
+        if data is None:
+            data = compute(**params)
+            respcache.cache().set(key, data, settings.RESPONSE_CACHE_TIMEOUT)
+        return data
+    
+    def summary_data(self, query):
+        return self.metric('summary', queries.summary, start=query['start'], end=query['end'], basis=query['basis'])
+    
+    def sales_data(self, query):
+        return self.metric('sales', queries.sales, start=query['start'], end=query['end'],
+                           group_by=query['group_by'], basis=query['basis'])
+    
+    def top_customers_data(self, query):
+        return self.metric('top_customers', queries.top_customers, start=query['start'], end=query['end'],
+                           limit=query['limit'], basis=query['basis'])
+    
+    def animals_sold_data(self, query):
+        return self.metric('animals_sold', queries.animals_sold, start=query['start'], end=query['end'],
+                           basis=query['basis'])
+    
+    def respond(self, query, **data):
+        return Response({'start': query['start'], 'end': query['end'], 'basis': query['basis'], **data})
+    
+    def list(self, request):
+        """Every metric of the reports page in one response"""
+        query = self.get_range()
+        return self.respond(
+            query,
+            summary=self.summary_data(query),
+            sales=self.sales_data(query),
+            top_customers=self.top_customers_data(query),
+            animals_sold=self.animals_sold_data(query),
+        )
+    
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """Revenue, orders, average order value, completion and growth against the previous period"""
+        query = self.get_range()
+        return self.respond(query, summary=self.summary_data(query))
+    
+    @action(detail=False, methods=['get'])
+    def sales(self, request):
+        """Revenue and orders per `group_by` period"""
+        query = self.get_range()
+        return self.respond(query, group_by=query['group_by'], sales=self.sales_data(query))
+    
+    @action(detail=False, methods=['get'], url_path='top-customers')
+    def top_customers(self, request):
+        query = self.get_range()
+        return self.respond(query, top_customers=self.top_customers_data(query))
+    
+    @action(detail=False, methods=['get'], url_path='animals-sold')
+    def animals_sold(self, request):
+        query = self.get_range()
+        return self.respond(query, animals_sold=self.animals_sold_data(query))
+    
+    @action(detail=False, methods=['get'])
+    def breakdown(self, request):
+        """
+        Sales per `by` (emirate, delivery_method, offer, breed, animal_type)
+        from the daily rollup, by order creation date
+        """
+        query = self.get_range()
+        watermark = RollupWatermark.objects.filter(name=rollup.WATERMARK).values_list('refreshed_at', flat=True).first()
+        data = self.metric('breakdown', queries.breakdown, start=query['start'], end=query['end'], by=query['by'])
+        return Response({
+            'start': query['start'], 'end': query['end'], 'basis': 'created', 'by': query['by'],
+            'rolled_up_at': watermark, 'breakdown': data,
+        })
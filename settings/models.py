@@ -1,4 +1,7 @@
+import copy
+
 from django.db import models
+from farmcloud.refcache import ReferenceCache
 
 class Settings(models.Model):
     """Application settings - Single instance model"""
@@ -38,6 +41,7 @@ class Settings(models.Model):
         # Ensure only one instance exists
         self.pk = 1
         super().save(*args, **kwargs)
+        SETTINGS_CACHE.invalidate()
     
     def delete(self, *args, **kwargs):
         # Prevent deletion
@@ -45,9 +49,11 @@ class Settings(models.Model):
     
     @classmethod
     def load(cls):
-        """Get or create the settings instance"""
-        obj, created = cls.objects.get_or_create(pk=1)
-        return obj
+        """Get the settings instance (a private copy of the cached row)"""
+        return copy.copy(SETTINGS_CACHE.get())
     
     def __str__(self):
         return f"Settings - {self.business_name}"
+
+
+SETTINGS_CACHE = ReferenceCache('settings', lambda: Settings.objects.get_or_create(pk=1)[0])
@@ -1,3 +1,14 @@
-from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from farmcloud.testing import QueryCountTestCase
+from .models import Settings
+
+
+class SettingsQueryCountTests(QueryCountTestCase):
+    def test_settings_are_served_from_the_reference_cache(self):
+        Settings.load()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get('/api/settings/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 0, '\n'.join(query['sql'] for query in queries.captured_queries))
 
-# Create your tests here.
@@ -1,10 +1,11 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from farmcloud.mixins import ConditionalGetMixin
 from .models import Settings
 from .serializers import SettingsSerializer
 
-class SettingsViewSet(viewsets.ViewSet):
+class SettingsViewSet(ConditionalGetMixin, viewsets.ViewSet):
     """
     ViewSet for application settings (singleton)
     """
@@ -12,14 +13,14 @@ class SettingsViewSet(viewsets.ViewSet):
     def list(self, request):
         """Get the settings instance"""
         settings = Settings.load()
-        serializer = SettingsSerializer(settings)
-        return Response(serializer.data)
+        return self.conditional_response(
+            request, self.get_object_validators(settings),
+            lambda: Response(SettingsSerializer(settings).data)
+        )
     
     def retrieve(self, request, pk=None):
         """Get the settings instance"""
-        settings = Settings.load()
-        serializer = SettingsSerializer(settings)
-        return Response(serializer.data)
+        return self.list(request)
     
     def update(self, request, pk=None):
         """Update settings"""
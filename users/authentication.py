@@ -0,0 +1,25 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from django.conf import settings
+from . import cache as user_cache
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the token's user from users.cache, so
+    repeated requests with the same access token skip the users query.
+    Tokens are still verified (signature, expiry) on every request.
+    """
+    
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        jti = validated_token.get(api_settings.JTI_CLAIM)
+        if not settings.JWT_USER_CACHE_TTL or user_id is None or jti is None:
+            return super().get_user(validated_token)
+        
+        user, generation = user_cache.get(user_id, jti)
+        if user is None:
+            # Raises for unknown/inactive users, which are never cached
+            user = super().get_user(validated_token)
+            user_cache.put(user_id, jti, user, generation)
+        return user
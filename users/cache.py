@@ -0,0 +1,69 @@
+"""
+Short-lived cache of users resolved from JWT access tokens
+
+Entries are keyed by (user id, token jti) and tagged with the user's cache
+generation; User.save()/delete() move the generation on commit, which
+orphans every cached entry of that user at once. Entry and generation are
+read with one get_many, so a cached request costs a single cache round trip
+and no users query. Entries hold the user's field values, never the
+password hash; the user comes back with `password` deferred, so it is
+loaded from the database only if something reads it.
+
+With Redis (REDIS_URL) the generation is shared, so a deactivation reaches
+every worker immediately; on per-process memory other workers may keep the
+old user for up to JWT_USER_CACHE_TTL seconds.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+# Kept out of the (possibly shared) cache
+UNCACHED_FIELDS = {'password'}
+
+
+def _generation_key(user_id):
+    return f'jwtuser:{user_id}:gen'
+
+
+def _entry_key(user_id, jti):
+    return f'jwtuser:{user_id}:{jti}'
+
+
+def _fields(user):
+    return {
+        field.attname: getattr(user, field.attname)
+        for field in user._meta.concrete_fields if field.attname not in UNCACHED_FIELDS
+    }
+
+
+def _user(fields):
+    from .models import User  # users.models imports this module
+    # As if loaded with .defer('password'): saving it writes back only the cached fields
+    return User.from_db(DEFAULT_DB_ALIAS, list(fields), list(fields.values()))
+
+
+def get(user_id, jti):
+    """(user or None, generation) for a token"""
+    generation_key, entry_key = _generation_key(user_id), _entry_key(user_id, jti)
+    found = cache.get_many([generation_key, entry_key])
+    generation, entry = found.get(generation_key), found.get(entry_key)
+    if entry is not None and generation is not None and entry[0] == generation:
+        return _user(entry[1]), generation
+    return None, generation
+
+
+def put(user_id, jti, user, generation):
+    """Cache `user` under the generation read before it was loaded"""
+    if generation is None:
+        cache.add(_generation_key(user_id), uuid.uuid4().hex, timeout=None)
+        generation = cache.get(_generation_key(user_id))
+    cache.set(_entry_key(user_id, jti), (generation, _fields(user)), timeout=settings.JWT_USER_CACHE_TTL)
+
+
+def invalidate(user_id):
+    """Drop every cached entry of a user once the current transaction commits"""
+    transaction.on_commit(
+        lambda: cache.set(_generation_key(user_id), uuid.uuid4().hex, timeout=None)
+    )
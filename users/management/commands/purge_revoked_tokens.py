@@ -0,0 +1,20 @@
+"""
+Delete revoked refresh tokens that have expired anyway
+Run: docker-compose exec web python manage.py purge_revoked_tokens
+
+Workers also purge on their own every REVOCATION_PURGE_INTERVAL seconds.
+"""
+from django.core.management.base import BaseCommand
+
+from users.revocation import purge_expired
+
+
+class Command(BaseCommand):
+    help = 'Purge expired rows from the refresh-token revocation table in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Rows deleted per statement')
+
+    def handle(self, *args, **options):
+        deleted = purge_expired(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✓ Purged {deleted} expired revoked tokens'))
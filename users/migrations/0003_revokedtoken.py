@@ -0,0 +1,25 @@
+# Generated by Django 5.1.5 on 2026-10-19 14:30
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevokedToken',
+            fields=[
+                ('jti', models.UUIDField(primary_key=True, serialize=False)),
+                ('revoked_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'db_table': 'revoked_tokens',
+            },
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
+from . import cache as user_cache
 
 class User(AbstractUser):
     ROLE_CHOICES = [
@@ -19,6 +21,7 @@ class User(AbstractUser):
     phone_number = models.CharField(max_length=20, blank=True, null=True)
     avatar = models.CharField(max_length=1, blank=True, null=True)
     last_login_display = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'users'
@@ -34,3 +37,25 @@ class User(AbstractUser):
         elif not self.avatar and self.username:
             self.avatar = self.username[0].upper()
         super().save(*args, **kwargs)
+        # Role/status/password changes must reach cached JWT sessions
+        user_cache.invalidate(self.pk)
+    
+    def delete(self, *args, **kwargs):
+        user_cache.invalidate(self.pk)
+        return super().delete(*args, **kwargs)
+
+
+class RevokedToken(models.Model):
+    """
+    A revoked refresh token, kept only until it would have expired anyway.
+    Checked through users.revocation, never queried directly.
+    """
+    jti = models.UUIDField(primary_key=True)
+    revoked_at = models.DateTimeField(default=timezone.now, db_index=True)
+    expires_at = models.DateTimeField(db_index=True)
+    
+    class Meta:
+        db_table = 'revoked_tokens'
+    
+    def __str__(self):
+        return f"{self.jti} (expires {self.expires_at:%Y-%m-%d %H:%M})"
@@ -0,0 +1,157 @@
+"""
+Refresh-token revocation store
+
+Revoked refresh tokens are stored as (jti, expires_at) rows in RevokedToken.
+Each worker mirrors the table in an in-memory Bloom filter, so checking a
+token that was never revoked - the common case - is a handful of hash
+probes with no database round trip. A filter hit is confirmed against the
+table (false positives are rare, revoked tokens are rarer still).
+
+The filter picks up other workers' revocations with one incremental,
+indexed query every REVOCATION_SYNC_INTERVAL seconds; revoking itself is an
+INSERT on the primary key, so a token can only ever be rotated once even
+between syncs. Rows are purged in batches once the token would have expired
+anyway, and the filter is rebuilt periodically to shed their bits. Each
+build is sized for twice the live rows (REVOCATION_BLOOM_CAPACITY at
+least), so a growing table is rebuilt at most once per doubling.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+from .models import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+# Incremental syncs re-read this far back to catch rows committed out of order
+SYNC_OVERLAP = timedelta(seconds=30)
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        added = False
+        for position in self._positions(key):
+            added = added or not self.bits[position >> 3] & (1 << (position & 7))
+            self.bits[position >> 3] |= 1 << (position & 7)
+        # Keys seen before (the incremental syncs re-read an overlap) don't count again
+        self.count += added
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+def _jti(value):
+    """Canonical form of a token id (simplejwt issues uuid4 hex)"""
+    return uuid.UUID(str(value)).hex
+
+
+class RevocationStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._watermark = None
+        self._synced_at = 0.0
+        self._built_at = 0.0
+        self._purged_at = time.monotonic()
+
+    def _build(self):
+        watermark = timezone.now()
+        rows = RevokedToken.objects.filter(expires_at__gt=watermark).values_list('jti', 'revoked_at')
+        # Room for as many again before the next rebuild
+        capacity = max(settings.REVOCATION_BLOOM_CAPACITY, 2 * rows.count())
+        bloom = BloomFilter(capacity, settings.REVOCATION_BLOOM_ERROR_RATE)
+        for jti, revoked_at in rows.iterator(chunk_size=5000):
+            bloom.add(jti.hex)
+            watermark = max(watermark, revoked_at)
+        self._bloom, self._watermark = bloom, watermark
+        self._built_at = time.monotonic()
+
+    def _catch_up(self):
+        rows = RevokedToken.objects.filter(revoked_at__gte=self._watermark - SYNC_OVERLAP)
+        for jti, revoked_at in rows.values_list('jti', 'revoked_at'):
+            self._bloom.add(jti.hex)
+            self._watermark = max(self._watermark, revoked_at)
+
+    def sync(self, force=False):
+        now = time.monotonic()
+        if not force and self._bloom is not None and now - self._synced_at < settings.REVOCATION_SYNC_INTERVAL:
+            return
+        with self._lock:
+            if (self._bloom is None or self._bloom.count > self._bloom.capacity
+                    or now - self._built_at >= settings.REVOCATION_REBUILD_INTERVAL):
+                self._build()
+            else:
+                self._catch_up()
+            self._synced_at = now
+            if now - self._purged_at >= settings.REVOCATION_PURGE_INTERVAL:
+                self._purged_at = now
+                threading.Thread(target=_purge_in_background, daemon=True).start()
+
+    def is_revoked(self, jti):
+        """O(1) for tokens that were never revoked; one PK lookup on a filter hit"""
+        jti = _jti(jti)
+        self.sync()
+        if jti not in self._bloom:
+            return False
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+    def revoke(self, jti, expires_at):
+        """Record a revocation; False if the token had already been revoked"""
+        jti = _jti(jti)
+        try:
+            with transaction.atomic():
+                RevokedToken.objects.create(jti=jti, expires_at=expires_at)
+        except IntegrityError:
+            return False
+        with self._lock:
+            if self._bloom is None:
+                self._build()
+            self._bloom.add(jti)
+        return True
+
+
+store = RevocationStore()
+
+
+def purge_expired(batch_size=None):
+    """Delete rows of tokens past their expiry, one batch per statement"""
+    batch_size = batch_size or settings.REVOCATION_PURGE_BATCH
+    deleted = 0
+    while True:
+        batch = list(
+            RevokedToken.objects.filter(expires_at__lte=timezone.now())
+            .values_list('jti', flat=True)[:batch_size]
+        )
+        if not batch:
+            return deleted
+        deleted += RevokedToken.objects.filter(jti__in=batch).delete()[0]
+
+
+def _purge_in_background():
+    try:
+        deleted = purge_expired()
+        if deleted:
+            logger.info('Purged %d expired revoked tokens', deleted)
+    except Exception:
+        logger.exception('Purging expired revoked tokens failed')
+    finally:
+        close_old_connections()
@@ -0,0 +1,7 @@
+from jobs.queue import task
+from .revocation import purge_expired
+
+
+@task('users.purge_revoked_tokens')
+def purge_revoked_tokens():
+    purge_expired()
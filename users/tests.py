@@ -0,0 +1,126 @@
+import uuid
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from rest_framework_simplejwt.tokens import AccessToken
+
+from farmcloud.testing import QueryCountTestCase
+from . import cache as user_cache
+from .models import RevokedToken, User
+from .revocation import BloomFilter, purge_expired, store
+from .tokens import RevocableRefreshToken
+from .views import UserViewSet
+
+
+def seed_users(start, stop):
+    User.objects.bulk_create([
+        User(username=f'user{i}', email=f'user{i}@example.com', role='STAFF') for i in range(start, stop)
+    ])
+
+
+class UserQueryCountTests(QueryCountTestCase):
+    def test_user_list(self):
+        self.assertConstantQueries('/api/users/', seed_users, user=self.admin)
+    
+    def test_user_serialization_time(self):
+        self.assertSerializesWithinBudget(UserViewSet, seed_users)
+    
+    def test_user_changelist(self):
+        self.assertConstantChangelistQueries(User, seed_users)
+
+
+class TokenRevocationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('revoker', 'revoker@example.com', 'pw', role='STAFF')
+    
+    def setUp(self):
+        cache.clear()  # throttle history
+        # The filter outlives each test's rows: start from the table as it is
+        store.sync(force=True)
+        self.addCleanup(setattr, store, '_bloom', None)
+    
+    def post(self, url, refresh):
+        return self.client.post(url, {'refresh': str(refresh)}, secure=True)
+    
+    def test_rotated_tokens_cannot_be_reused(self):
+        refresh = RevocableRefreshToken.for_user(self.user)
+        response = self.post('/api/auth/token/refresh/', refresh)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.post('/api/auth/token/refresh/', response.json()['refresh']).status_code, 200)
+        self.assertEqual(self.post('/api/auth/token/refresh/', refresh).status_code, 401)
+    
+    def test_revoked_tokens_are_refused(self):
+        refresh = RevocableRefreshToken.for_user(self.user)
+        self.assertEqual(self.post('/api/auth/token/revoke/', refresh).status_code, 200)
+        self.assertEqual(self.post('/api/auth/token/refresh/', refresh).status_code, 401)
+        self.assertEqual(self.post('/api/auth/token/revoke/', refresh).status_code, 401)
+    
+    def test_filter_hits_are_confirmed_in_the_table(self):
+        # A filter with every bit set: each token is a (false) hit
+        bloom = BloomFilter(1, 0.5)
+        bloom.bits = bytearray(b'\xff' * len(bloom.bits))
+        store._bloom = bloom
+        with CaptureQueriesContext(connection) as queries:
+            self.assertFalse(store.is_revoked(uuid.uuid4().hex))
+        self.assertEqual(len(queries), 1)
+        self.assertIn('revoked_tokens', queries[0]['sql'])
+    
+    def test_unrevoked_tokens_are_checked_without_queries(self):
+        with self.assertNumQueries(0):
+            self.assertFalse(store.is_revoked(uuid.uuid4().hex))
+    
+    def test_expired_rows_are_purged_in_batches(self):
+        now = timezone.now()
+        RevokedToken.objects.bulk_create(
+            [RevokedToken(jti=uuid.uuid4(), expires_at=now - timedelta(minutes=1)) for _ in range(5)]
+            + [RevokedToken(jti=uuid.uuid4(), expires_at=now + timedelta(days=1))]
+        )
+        self.assertEqual(purge_expired(batch_size=2), 5)
+        self.assertEqual(RevokedToken.objects.count(), 1)
+    
+    @override_settings(REVOCATION_BLOOM_CAPACITY=10)
+    def test_filter_is_sized_for_the_table(self):
+        expires_at = timezone.now() + timedelta(days=1)
+        RevokedToken.objects.bulk_create([RevokedToken(jti=uuid.uuid4(), expires_at=expires_at) for _ in range(30)])
+        store._bloom = None
+        store.sync(force=True)
+        self.assertEqual(store._bloom.capacity, 60)
+        bloom = store._bloom
+        store.sync(force=True)  # no rebuild: the overlap re-read adds nothing new
+        self.assertIs(store._bloom, bloom)
+        self.assertEqual(store._bloom.count, 30)
+
+
+class JWTUserCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('cached', 'cached@example.com', 'pw', role='STAFF')
+    
+    def setUp(self):
+        cache.clear()
+    
+    def me(self, token):
+        response = self.client.get('/api/users/me/', secure=True, HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+    
+    def test_cached_users_carry_no_password(self):
+        token = AccessToken.for_user(self.user)
+        self.me(token)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.me(token)['username'], 'cached')
+        
+        user, _ = user_cache.get(self.user.pk, token['jti'])
+        self.assertNotIn('password', cache.get(f"jwtuser:{self.user.pk}:{token['jti']}")[1])
+        self.assertEqual(user.get_deferred_fields(), {'password'})
+        user.first_name = 'Cached'
+        user.save()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, 'Cached')
+        self.assertTrue(self.user.check_password('pw'))
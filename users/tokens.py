@@ -0,0 +1,24 @@
+from datetime import datetime, timezone
+
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from .revocation import store
+
+
+class RevocableRefreshToken(RefreshToken):
+    """
+    Refresh token checked against users.revocation on every use. `blacklist()`
+    is what simplejwt calls on rotation (BLACKLIST_AFTER_ROTATION) and logout.
+    """
+    
+    def verify(self):
+        super().verify()
+        if store.is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError('Token is blacklisted')
+    
+    def blacklist(self):
+        expires_at = datetime.fromtimestamp(self.payload['exp'], tz=timezone.utc)
+        if not store.revoke(self.payload[api_settings.JTI_CLAIM], expires_at):
+            # Lost a race with a concurrent rotation of the same token
+            raise TokenError('Token is blacklisted')
@@ -1,11 +1,12 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from farmcloud.mixins import ConditionalGetMixin
 from .models import User
 from .serializers import UserSerializer, UserCreateSerializer
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     permission_classes = [AllowAny]  # TODO: Change to IsAuthenticated in production
     
@@ -24,6 +25,12 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(user)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def me(self, request):
+        """The authenticated user"""
+        serializer = self.get_serializer(request.user)
+        return Response(serializer.data)
+    
     @action(detail=False, methods=['get'])
     def by_role(self, request):
         """Get users filtered by role"""
@@ -0,0 +1,46 @@
+from django.contrib import admin
+from django.db.models import Count, Q
+from django.utils import timezone
+from .models import OutboxMessage, OutboxStatus, WebhookEndpoint
+
+
+@admin.register(WebhookEndpoint)
+class WebhookEndpointAdmin(admin.ModelAdmin):
+    list_display = ['name', 'url', 'events', 'enabled', 'pending_count', 'dead_count']
+    list_editable = ['enabled']
+    readonly_fields = ['locked_until', 'created_at']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            pending=Count('messages', filter=Q(messages__status=OutboxStatus.PENDING)),
+            dead=Count('messages', filter=Q(messages__status=OutboxStatus.DEAD)),
+        )
+    
+    def pending_count(self, obj):
+        return obj.pending
+    pending_count.short_description = 'Pending'
+    
+    def dead_count(self, obj):
+        return obj.dead
+    dead_count.short_description = 'Dead letters'
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ['id', 'event', 'endpoint', 'status', 'attempts', 'last_status_code', 'next_attempt_at',
+                    'created_at', 'delivered_at']
+    list_filter = ['status', 'event', 'endpoint']
+    list_select_related = ['endpoint']
+    search_fields = ['event_id', 'last_error']
+    readonly_fields = ['endpoint', 'event_id', 'event', 'payload', 'attempts', 'last_status_code', 'last_error',
+                       'created_at', 'delivered_at']
+    date_hierarchy = 'created_at'
+    
+    actions = ['redeliver']
+    
+    def redeliver(self, request, queryset):
+        # Out of order by now: receivers compare the order's updated_at
+        queryset.filter(status=OutboxStatus.DEAD).update(
+            status=OutboxStatus.PENDING, next_attempt_at=timezone.now(), attempts=0,
+        )
+    redeliver.short_description = "Redeliver selected dead letters"
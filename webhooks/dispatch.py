@@ -0,0 +1,167 @@
+"""
+Webhook delivery from the outbox (webhooks.outbox)
+
+Dispatcher.dispatch() runs one round:
+
+1. Lease each enabled endpoint whose oldest pending message is due
+   (WebhookEndpoint.locked_until), so concurrent dispatchers never deliver
+   to the same endpoint, and read up to WEBHOOK_BATCH_SIZE of its pending
+   messages, oldest first.
+2. POST them with asyncio on one httpx.AsyncClient: the endpoints
+   concurrently, each endpoint's messages one at a time and in order. A
+   message that will be retried stops its endpoint's batch, so the events
+   after it wait for it.
+3. Record the outcomes and release the leases.
+
+A 2xx response delivers the message. Connection errors, timeouts, 408, 429
+and 5xx are retried after WEBHOOK_RETRY_BACKOFF * 2^(attempt - 1) seconds
+(capped at WEBHOOK_RETRY_BACKOFF_MAX, plus jitter). After
+WEBHOOK_MAX_ATTEMPTS, or on any other response (the receiver refused the
+event), the message is dead-lettered: left DEAD for the admin's "Redeliver"
+action while the endpoint's later events go on.
+
+Delivery is at least once, so receivers dedupe on the event id:
+
+    POST <endpoint url>
+    Content-Type: application/json
+    X-FarmCloud-Event: order.status_changed
+    X-FarmCloud-Delivery: <event id>
+    X-FarmCloud-Timestamp: <unix time>
+    X-FarmCloud-Signature: sha256=<hex HMAC-SHA256 of "<timestamp>.<body>" keyed with the endpoint secret>
+
+    {"id": "<event id>", "event": "order.status_changed", "data": {"order": {...}, ...}}
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import random
+import time
+from datetime import timedelta
+
+import httpx
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import OutboxMessage, OutboxStatus, WebhookEndpoint
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = {408, 429}
+
+
+def backoff(attempts):
+    """Seconds before retrying a message that failed `attempts` times"""
+    delay = min(settings.WEBHOOK_RETRY_BACKOFF * 2 ** (attempts - 1), settings.WEBHOOK_RETRY_BACKOFF_MAX)
+    return delay * random.uniform(1, 1.1)  # spread retries of messages that failed together
+
+
+def sign(secret, timestamp, body):
+    return hmac.new(secret.encode(), f'{timestamp}.'.encode() + body, hashlib.sha256).hexdigest()
+
+
+def will_retry(message, status_code, error):
+    """Whether a failed attempt (the message's attempts not yet counting it) gets another"""
+    retryable = status_code is None or status_code >= 500 or status_code in RETRY_STATUS_CODES
+    return bool(error) and retryable and message.attempts + 1 < settings.WEBHOOK_MAX_ATTEMPTS
+
+
+def lease(now):
+    """Lease the endpoints with due messages; returns {endpoint: [its next pending messages]}"""
+    # Long enough for a whole batch of timeouts; a crashed dispatcher's lease expires by itself
+    until = now + timedelta(seconds=settings.WEBHOOK_TIMEOUT * settings.WEBHOOK_BATCH_SIZE + 60)
+    free = Q(locked_until__isnull=True) | Q(locked_until__lt=now)
+    candidates = WebhookEndpoint.objects.filter(free, enabled=True, messages__status=OutboxStatus.PENDING).distinct()
+    batches = {}
+    for endpoint in candidates:
+        pending = endpoint.messages.filter(status=OutboxStatus.PENDING).order_by('id')
+        # The oldest pending message gates the rest
+        head = pending.only('next_attempt_at').first()
+        if head is None or head.next_attempt_at > now:
+            continue
+        if not WebhookEndpoint.objects.filter(free, pk=endpoint.pk).update(locked_until=until):
+            continue  # another dispatcher took it
+        batches[endpoint] = list(pending[:settings.WEBHOOK_BATCH_SIZE])
+    return batches
+
+
+async def deliver(client, endpoint, messages):
+    """POST `messages` to `endpoint` in order; returns [(message, status code, error)] for those attempted"""
+    results = []
+    for message in messages:
+        body = json.dumps({'id': str(message.event_id), 'event': message.event, 'data': message.payload}).encode()
+        timestamp = str(int(time.time()))
+        headers = {
+            'Content-Type': 'application/json',
+            'X-FarmCloud-Event': message.event,
+            'X-FarmCloud-Delivery': str(message.event_id),
+            'X-FarmCloud-Timestamp': timestamp,
+        }
+        if endpoint.secret:
+            headers['X-FarmCloud-Signature'] = f'sha256={sign(endpoint.secret, timestamp, body)}'
+        try:
+            response = await client.post(endpoint.url, content=body, headers=headers)
+        except (httpx.HTTPError, httpx.InvalidURL) as exc:
+            status_code, error = None, f'{type(exc).__name__}: {exc}'
+        else:
+            status_code = response.status_code
+            error = '' if response.is_success else f'HTTP {status_code}: {response.text[:500]}'
+        results.append((message, status_code, error))
+        if will_retry(message, status_code, error):
+            break  # keep the endpoint's order: later events wait for this one
+    return results
+
+
+def record(results, now):
+    """Save the outcome of each attempt"""
+    messages = []
+    for message, status_code, error in results:
+        retry = will_retry(message, status_code, error)
+        message.attempts += 1
+        message.last_status_code, message.last_error = status_code, error
+        if not error:
+            message.status, message.delivered_at = OutboxStatus.DELIVERED, now
+        elif retry:
+            message.next_attempt_at = now + timedelta(seconds=backoff(message.attempts))
+            logger.warning('Webhook %s failed (attempt %d), retrying: %s', message, message.attempts, error)
+        else:
+            message.status = OutboxStatus.DEAD
+            logger.error('Webhook %s dead-lettered after %d attempts: %s', message, message.attempts, error)
+        messages.append(message)
+    OutboxMessage.objects.bulk_update(messages, [
+        'status', 'attempts', 'next_attempt_at', 'last_status_code', 'last_error', 'delivered_at',
+    ])
+
+
+class Dispatcher:
+    """Delivers the outbox round by round, keeping one event loop and HTTP client (keep-alive) throughout"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.client = httpx.AsyncClient(timeout=settings.WEBHOOK_TIMEOUT,
+                                        headers={'User-Agent': 'FarmCloud-Webhooks'})
+
+    def dispatch(self):
+        """Deliver one batch per due endpoint; returns the number of requests made"""
+        batches = lease(timezone.now())
+        if not batches:
+            return 0
+        try:
+            # Only the HTTP runs on the loop; the ORM stays in this thread, outside it
+            results = self.loop.run_until_complete(self.deliver_all(batches))
+            record(results, timezone.now())
+        finally:
+            WebhookEndpoint.objects.filter(pk__in=[endpoint.pk for endpoint in batches]).update(locked_until=None)
+        return len(results)
+
+    async def deliver_all(self, batches):
+        results = await asyncio.gather(*(
+            deliver(self.client, endpoint, messages) for endpoint, messages in batches.items()
+        ))
+        return [result for endpoint_results in results for result in endpoint_results]
+
+    def close(self):
+        self.loop.run_until_complete(self.client.aclose())
+        self.loop.close()
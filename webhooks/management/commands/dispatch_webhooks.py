@@ -0,0 +1,47 @@
+"""
+Deliver webhook events from the outbox to the configured endpoints
+Run: docker-compose exec web python manage.py dispatch_webhooks [--once]
+
+See webhooks.dispatch. Any number of dispatchers can run: each endpoint is
+leased to one at a time. TERM or INT stops the command after the current
+round. --once delivers what is due and exits (cron, tests, debugging).
+"""
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from webhooks.dispatch import Dispatcher
+
+
+class Command(BaseCommand):
+    help = 'Deliver outbox events to webhook endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Deliver the due events, then exit')
+
+    def handle(self, *args, **options):
+        signals = []
+        if not options['once']:
+            signal.signal(signal.SIGTERM, lambda signum, frame: signals.append(signum))
+            signal.signal(signal.SIGINT, lambda signum, frame: signals.append(signum))
+            self.stdout.write('Delivering webhooks (TERM or Ctrl-C to stop)')
+
+        dispatcher = Dispatcher()
+        sent = 0
+        try:
+            while not signals:
+                count = dispatcher.dispatch()
+                sent += count
+                if options['once']:
+                    if not count:
+                        break
+                    continue
+                close_old_connections()  # drop broken or expired connections between rounds
+                if not count:
+                    time.sleep(settings.WEBHOOK_POLL_INTERVAL)
+        finally:
+            dispatcher.close()
+        self.stdout.write(self.style.SUCCESS(f'✓ Made {sent} webhook requests'))
@@ -0,0 +1,56 @@
+# Generated by Django 5.1.5 on 2026-10-19 15:36
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookEndpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('url', models.URLField(max_length=500)),
+                ('secret', models.CharField(blank=True, help_text='Signs each body (X-FarmCloud-Signature)', max_length=200)),
+                ('events', models.JSONField(blank=True, default=list, help_text='Event types to send, e.g. ["order.created"]; empty for all')),
+                ('enabled', models.BooleanField(default=True)),
+                ('locked_until', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'webhook_endpoints',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='OutboxMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.UUIDField(default=uuid.uuid4, help_text='Same for every endpoint; receivers dedupe on it')),
+                ('event', models.CharField(help_text='e.g. order.status_changed', max_length=50)),
+                ('payload', models.JSONField()),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('DELIVERED', 'Delivered'), ('DEAD', 'Dead letter')], default='PENDING', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_status_code', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('delivered_at', models.DateTimeField(blank=True, null=True)),
+                ('endpoint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='webhooks.webhookendpoint')),
+            ],
+            options={
+                'db_table': 'webhook_outbox',
+                'ordering': ['-id'],
+                'indexes': [models.Index(condition=models.Q(('status', 'PENDING')), fields=['endpoint', 'id'], name='outbox_pending_idx'), models.Index(fields=['status', 'delivered_at'], name='webhook_out_status_7d22b8_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.5 on 2026-10-19 15:40
+
+from datetime import datetime, time, timedelta
+
+from django.db import migrations
+from django.utils import timezone
+
+NAME = 'purge-delivered-webhooks'
+
+
+def forwards(apps, schema_editor):
+    """Purge delivered webhook messages nightly, after the other maintenance jobs (jobs 0002)"""
+    ScheduledJob = apps.get_model('jobs', 'ScheduledJob')
+    tomorrow = timezone.localdate() + timedelta(days=1)
+    ScheduledJob.objects.using(schema_editor.connection.alias).bulk_create([
+        ScheduledJob(name=NAME, task='webhooks.purge_delivered', interval=timedelta(days=1),
+                     next_run_at=timezone.make_aware(datetime.combine(tomorrow, time(4, 30)))),
+    ], ignore_conflicts=True)
+
+
+def backwards(apps, schema_editor):
+    ScheduledJob = apps.get_model('jobs', 'ScheduledJob')
+    ScheduledJob.objects.using(schema_editor.connection.alias).filter(name=NAME).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0002_default_schedule'),
+        ('webhooks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,69 @@
+import uuid
+
+from django.db import models
+from django.utils import timezone
+
+
+class WebhookEndpoint(models.Model):
+    """An external system (accounting, WhatsApp gateway, ...) that receives order events by POST"""
+    
+    name = models.CharField(max_length=100, unique=True)
+    url = models.URLField(max_length=500)
+    secret = models.CharField(max_length=200, blank=True, help_text="Signs each body (X-FarmCloud-Signature)")
+    events = models.JSONField(default=list, blank=True,
+                              help_text='Event types to send, e.g. ["order.created"]; empty for all')
+    enabled = models.BooleanField(default=True)
+    
+    # Held by the dispatcher delivering to the endpoint, so one dispatcher at a time keeps its order
+    locked_until = models.DateTimeField(null=True, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'webhook_endpoints'
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+    
+    def wants(self, event):
+        return not self.events or event in self.events
+
+
+class OutboxStatus(models.TextChoices):
+    PENDING = 'PENDING', 'Pending'
+    DELIVERED = 'DELIVERED', 'Delivered'
+    DEAD = 'DEAD', 'Dead letter'
+
+
+class OutboxMessage(models.Model):
+    """One event for one endpoint, written with the change it describes (see webhooks.outbox)"""
+    
+    endpoint = models.ForeignKey(WebhookEndpoint, on_delete=models.CASCADE, related_name='messages')
+    event_id = models.UUIDField(default=uuid.uuid4, help_text="Same for every endpoint; receivers dedupe on it")
+    event = models.CharField(max_length=50, help_text="e.g. order.status_changed")
+    payload = models.JSONField()
+    
+    # Delivery
+    status = models.CharField(max_length=10, choices=OutboxStatus.choices, default=OutboxStatus.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'webhook_outbox'
+        ordering = ['-id']
+        indexes = [
+            # Dispatchers read each endpoint's pending messages in id order; sent ones stay out of the index
+            models.Index(fields=['endpoint', 'id'], condition=models.Q(status='PENDING'),
+                         name='outbox_pending_idx'),
+            models.Index(fields=['status', 'delivered_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.event} #{self.pk} to {self.endpoint_id} ({self.status})"
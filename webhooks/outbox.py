@@ -0,0 +1,67 @@
+"""
+Transactional outbox for webhook events
+
+record() writes one OutboxMessage per subscribed WebhookEndpoint in the
+caller's transaction, so an event exists exactly when the change it
+describes commits - the request never waits on, or fails with, an
+external system. `manage.py dispatch_webhooks` delivers them afterwards
+(webhooks.dispatch).
+
+Events carry the order as it is after the change:
+
+    order.created           a new order
+    order.status_changed    `status` changed (previous_status says from what)
+    order.payment_updated   `amount_paid` or `payment_status` changed
+"""
+import json
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .models import OutboxMessage, OutboxStatus, WebhookEndpoint
+
+EVENTS = ['order.created', 'order.status_changed', 'order.payment_updated']
+
+
+def record(event, payload, using=None):
+    """Store `event` for every enabled endpoint subscribed to it; returns the messages"""
+    if event not in EVENTS:
+        raise ValueError(f'Unknown webhook event {event!r}')
+    endpoints = [endpoint for endpoint in WebhookEndpoint.objects.using(using).filter(enabled=True)
+                 if endpoint.wants(event)]
+    if not endpoints:
+        return []
+    # Decimals and datetimes as strings, the way the API renders them
+    payload = json.loads(DjangoJSONEncoder().encode({'occurred_at': timezone.now(), **payload}))
+    event_id = uuid.uuid4()
+    return OutboxMessage.objects.using(using).bulk_create([
+        OutboxMessage(endpoint=endpoint, event_id=event_id, event=event, payload=payload)
+        for endpoint in endpoints
+    ])
+
+
+def order_payload(order, **extra):
+    """The order fields integrations need, plus `extra` (e.g. previous_status)"""
+    return {
+        'order': {
+            'id': order.pk,
+            'order_number': order.order_number,
+            'customer': order.customer_id,
+            'status': order.status,
+            'payment_status': order.payment_status,
+            'payment_method': order.payment_method,
+            'total_amount': order.total_amount,
+            'amount_paid': order.amount_paid,
+            'updated_at': order.updated_at,
+        },
+        **extra,
+    }
+
+
+def purge_delivered():
+    """Delete messages delivered over WEBHOOK_RETENTION_DAYS ago (dead letters stay for inspection)"""
+    cutoff = timezone.now() - timedelta(days=settings.WEBHOOK_RETENTION_DAYS)
+    return OutboxMessage.objects.filter(status=OutboxStatus.DELIVERED, delivered_at__lt=cutoff).delete()[0]
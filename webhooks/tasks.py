@@ -0,0 +1,7 @@
+from jobs.queue import task
+from .outbox import purge_delivered
+
+
+@task('webhooks.purge_delivered')
+def purge_delivered_messages():
+    purge_delivered()
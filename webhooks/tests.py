@@ -0,0 +1,191 @@
+import hashlib
+import hmac
+import json
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from customers.models import Customer
+from orders.models import DeliveryMethod, Order
+from .dispatch import Dispatcher
+from .models import OutboxMessage, OutboxStatus, WebhookEndpoint
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Records each POST; answers with the next status queued for its path, else 200"""
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        with server.lock:
+            server.in_flight[self.path] += 1
+            server.peak = max(server.peak, sum(server.in_flight.values()))
+            server.peak_per_path = max(server.peak_per_path, server.in_flight[self.path])
+            status = server.statuses[self.path].pop(0) if server.statuses[self.path] else 200
+        time.sleep(server.delay)
+        with server.lock:
+            server.in_flight[self.path] -= 1
+            server.requests.append((self.path, dict(self.headers), body))
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    """Local stand-in for the integrations' webhook receivers"""
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.delay = 0
+        self.statuses = defaultdict(list)
+        self.in_flight = defaultdict(int)
+        self.peak = self.peak_per_path = 0
+        self.requests = []
+
+    def url(self, path):
+        return f'http://127.0.0.1:{self.server_address[1]}{path}'
+
+    def events(self, path):
+        return [json.loads(body)['event'] for request_path, _, body in self.requests if request_path == path]
+
+
+class WebhookTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.stub = StubServer()
+        threading.Thread(target=cls.stub.serve_forever, daemon=True).start()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stub.shutdown()
+        cls.stub.server_close()
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = Customer.objects.create(full_name='Ahmed', phone_number='0500000001', address_line1='Street 1',
+                                               city='Dubai', emirate='DUBAI')
+        cls.accounting = WebhookEndpoint.objects.create(name='accounting', url=cls.stub.url('/accounting'),
+                                                        secret='s3cret')
+        cls.whatsapp = WebhookEndpoint.objects.create(name='whatsapp', url=cls.stub.url('/whatsapp'),
+                                                      events=['order.status_changed'])
+
+    def setUp(self):
+        self.stub.reset()
+        self.dispatcher = Dispatcher()
+        self.addCleanup(self.dispatcher.close)
+
+    def place_order(self):
+        return Order.objects.create(customer=self.customer, delivery_method=DeliveryMethod.FARM_PICKUP, subtotal=800)
+
+
+class OutboxTests(WebhookTestCase):
+    def test_order_changes_are_written_to_the_outbox(self):
+        order = self.place_order()
+        order = Order.objects.get(pk=order.pk)
+        order.delivery_notes = 'Gate 2'
+        order.save()
+        order.status = 'CONFIRMED'
+        order.save()
+        order.amount_paid = 300
+        order.save()
+        self.assertEqual(list(self.accounting.messages.order_by('id').values_list('event', flat=True)),
+                         ['order.created', 'order.status_changed', 'order.payment_updated'])
+        changed = self.whatsapp.messages.get()
+        self.assertEqual(changed.event_id, self.accounting.messages.get(event='order.status_changed').event_id)
+        self.assertEqual(changed.payload['previous_status'], 'PENDING')
+        self.assertEqual(changed.payload['order']['total_amount'], '800.00')
+        payment = self.accounting.messages.get(event='order.payment_updated').payload
+        self.assertEqual((payment['order']['payment_status'], payment['previous_payment_status']), ('PARTIAL', 'UNPAID'))
+
+    def test_rolled_back_changes_leave_no_events(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.place_order()
+            raise RuntimeError('payment declined')
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_disabled_endpoints_get_nothing(self):
+        WebhookEndpoint.objects.update(enabled=False)
+        self.place_order()
+        self.assertFalse(OutboxMessage.objects.exists())
+
+
+@override_settings(WEBHOOK_RETRY_BACKOFF=60, WEBHOOK_MAX_ATTEMPTS=2)
+class DispatchTests(WebhookTestCase):
+    def test_endpoints_are_served_concurrently_each_in_order(self):
+        self.stub.delay = 0.2
+        for _ in range(3):
+            order = self.place_order()
+            order.status = 'CONFIRMED'
+            order.save()
+        self.assertEqual(self.dispatcher.dispatch(), 9)
+        self.assertEqual(self.stub.events('/accounting'), ['order.created', 'order.status_changed'] * 3)
+        self.assertEqual(self.stub.events('/whatsapp'), ['order.status_changed'] * 3)
+        self.assertEqual((self.stub.peak, self.stub.peak_per_path), (2, 1))
+        self.assertFalse(OutboxMessage.objects.exclude(status=OutboxStatus.DELIVERED).exists())
+        self.assertFalse(WebhookEndpoint.objects.filter(locked_until__isnull=False).exists())
+
+    def test_requests_are_signed(self):
+        order = self.place_order()
+        self.dispatcher.dispatch()
+        _, headers, body = self.stub.requests[0]
+        expected = hmac.new(b's3cret', f"{headers['X-FarmCloud-Timestamp']}.".encode() + body,
+                            hashlib.sha256).hexdigest()
+        self.assertEqual(headers['X-FarmCloud-Signature'], f'sha256={expected}')
+        self.assertEqual(json.loads(body)['data']['order']['id'], order.pk)
+
+    def test_failures_hold_back_later_events_then_dead_letter(self):
+        self.place_order()
+        self.place_order()
+        first, second = self.accounting.messages.order_by('id')
+        self.stub.statuses['/accounting'] = [503]
+        with self.assertLogs('webhooks.dispatch', 'WARNING'):
+            self.assertEqual(self.dispatcher.dispatch(), 1)  # the second waits for the first
+        first.refresh_from_db()
+        self.assertEqual((first.status, first.attempts, first.last_status_code), (OutboxStatus.PENDING, 1, 503))
+        self.assertGreaterEqual(first.next_attempt_at, timezone.now() + timedelta(seconds=55))
+        self.assertEqual(self.dispatcher.dispatch(), 0)  # not due yet
+
+        OutboxMessage.objects.filter(pk=first.pk).update(next_attempt_at=timezone.now())
+        self.stub.statuses['/accounting'] = [503]
+        with self.assertLogs('webhooks.dispatch', 'ERROR'):
+            self.assertEqual(self.dispatcher.dispatch(), 2)  # out of attempts, so the second goes on
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.status, first.attempts), (OutboxStatus.DEAD, 2))
+        self.assertEqual(second.status, OutboxStatus.DELIVERED)
+
+    def test_refused_events_are_dead_lettered_at_once(self):
+        self.place_order()
+        self.stub.statuses['/accounting'] = [422]
+        with self.assertLogs('webhooks.dispatch', 'ERROR'):
+            self.dispatcher.dispatch()
+        self.assertEqual(self.accounting.messages.get().status, OutboxStatus.DEAD)
+
+    def test_unreachable_endpoints_are_retried(self):
+        WebhookEndpoint.objects.filter(pk=self.accounting.pk).update(url='http://127.0.0.1:9/accounting')
+        self.place_order()
+        with self.assertLogs('webhooks.dispatch', 'WARNING'):
+            self.dispatcher.dispatch()
+        message = self.accounting.messages.get()
+        self.assertEqual((message.status, message.last_status_code), (OutboxStatus.PENDING, None))
+        self.assertIn('ConnectError', message.last_error)
+
+    def test_leased_endpoints_are_left_to_their_dispatcher(self):
+        self.place_order()
+        WebhookEndpoint.objects.update(locked_until=timezone.now() + timedelta(minutes=1))
+        self.assertEqual(self.dispatcher.dispatch(), 0)